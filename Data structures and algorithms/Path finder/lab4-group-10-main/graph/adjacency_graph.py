@@ -2,6 +2,12 @@ import sys
 
 from .edge import Edge
 from .graph import Graph
+from .compact_adjacency_graph import CompactAdjacencyGraph, SNAPSHOT_KIND
+from .components import Components
+from .landmarks import Landmarks
+from .contraction_hierarchy import ContractionHierarchy
+
+from utilities.snapshot import source_key
 
 
 Node = str
@@ -9,15 +15,29 @@ Node = str
 class AdjacencyGraph(Graph[Node]):
     """
     This is a class for a generic finite graph, with string nodes.
-     - The edges are stored as an adjacency list as described in the course book and the lectures.
+     - The edges are stored as an adjacency list as described in the course book and the lectures,
+       but as (node, weight) pairs instead of `Edge` objects, which are only created when asked for.
      - The graphs can be anything, such as a road map or a web link graph.
      - The graph can be read from a simple text file with one edge per line.
+     - The parsed graph is cached in a binary snapshot file next to the text file
+       (see `CompactAdjacencyGraph`), which is much faster to read. A graph read from a snapshot
+       uses the memory-mapped arrays directly, until it is modified (see `materialize`).
     """
-    adjacency_list: dict[Node, list[Edge[Node]]]
+    adjacency_list: dict[Node, list[tuple[Node, float]]]        # the outgoing edges
+    reverse_list: dict[Node, list[tuple[Node, float]]] | None   # the incoming edges, built on demand
+    compact: CompactAdjacencyGraph | None              # the snapshot, used instead of the lists
+    hierarchy: ContractionHierarchy | None             # see `use_contraction_hierarchy`
+    landmarks: Landmarks[Node] | None                  # see `use_landmarks`
+    components: Components[Node] | None                # computed on demand
     weighted: bool
 
     def __init__(self, graph: str|None = None):
         self.adjacency_list = {}
+        self.reverse_list = None
+        self.compact = None
+        self.hierarchy = None
+        self.landmarks = None
+        self.components = None
         self.weighted = False
         if graph:
             self.init(graph)
@@ -29,6 +49,14 @@ class AdjacencyGraph(Graph[Node]):
         "from \\t to \\t weight" or "from \\t to" (where \\t == TAB).
         """
         if graph:
+            key = source_key(graph, SNAPSHOT_KIND)
+            compact = CompactAdjacencyGraph()
+            if key and compact.read_snapshot(graph, key):
+                self.adjacency_list = {}
+                self.reverse_list = None
+                self.compact = compact
+                self.weighted = compact.weighted
+                return
             with open(graph, encoding="utf-8") as IN:
                 for line in IN:
                     line = line.strip()
@@ -39,10 +67,32 @@ class AdjacencyGraph(Graph[Node]):
                         else:
                             weight = float(maybe_weight[0])
                             self.add_edge(Edge(start, end, weight))
+            # Don't cache the result if the file was modified while we were reading it.
+            if key and key == source_key(graph, SNAPSHOT_KIND):
+                compact = CompactAdjacencyGraph.from_edges(
+                    (Edge(v, w, weight) for v, neighbours in self.adjacency_list.items() for w, weight in neighbours),
+                    self.adjacency_list,
+                )
+                compact.write_snapshot(graph, key)
+
+    def materialize(self):
+        """
+        Copies the edges of the snapshot (if the graph was read from one) into the adjacency list,
+        so that the graph can be modified. Until then, no per-node lists are built at all.
+        """
+        compact = self.compact
+        if compact is not None:
+            self.adjacency_list = {v: compact.outgoing_neighbours(v) for v in compact.names}
+            self.reverse_list = None
+            self.compact = None
 
     def add_node(self, v: Node):
         """Adds a node to this graph."""
+        self.materialize()
         self.adjacency_list.setdefault(v, [])
+        self.components = None
+        if self.reverse_list is not None:
+            self.reverse_list.setdefault(v, [])
 
     def add_edge(self, e: Edge[Node]):
         """
@@ -51,21 +101,91 @@ class AdjacencyGraph(Graph[Node]):
         """
         self.add_node(e.start)
         self.add_node(e.end)
-        self.adjacency_list[e.start].append(e)
+        self.adjacency_list[e.start].append((e.end, e.weight))
+        # A new edge can make paths shorter, so the landmarks and the hierarchy are no longer valid.
+        self.hierarchy = None
+        self.landmarks = None
+        self.components = None
+        if self.reverse_list is not None:
+            self.reverse_list[e.end].append((e.start, e.weight))
         if not self.weighted and e.weight != 1:
             self.weighted = True
 
     def nodes(self) -> frozenset[Node]:
+        if self.compact is not None:
+            return self.compact.nodes()
         return frozenset(self.adjacency_list)
 
+    def num_nodes(self) -> int:
+        if self.compact is not None:
+            return self.compact.num_nodes()
+        return len(self.adjacency_list)
+
+    def num_edges(self) -> int:
+        if self.compact is not None:
+            return self.compact.num_edges()
+        return sum(len(neighbours) for neighbours in self.adjacency_list.values())
+
     def outgoing_edges(self, v: Node) -> list[Edge[Node]]:
+        return [Edge(v, w, weight) for w, weight in self.outgoing_neighbours(v)]
+
+    def incoming_edges(self, v: Node) -> list[Edge[Node]]:
+        return [Edge(u, v, weight) for u, weight in self.incoming_neighbours(v)]
+
+    def outgoing_neighbours(self, v: Node) -> list[tuple[Node, float]]:
+        if self.compact is not None:
+            return self.compact.outgoing_neighbours(v)
         return self.adjacency_list.get(v, [])
 
+    def incoming_neighbours(self, v: Node) -> list[tuple[Node, float]]:
+        """
+        The reverse adjacency list is only built the first time it is needed,
+        so that graphs that are only searched forwards don't pay for it.
+        """
+        if self.compact is not None:
+            return self.compact.incoming_neighbours(v)
+        if self.reverse_list is None:
+            # Only assigned when it is complete, since the server can search from several threads.
+            reverse_list: dict[Node, list[tuple[Node, float]]] = {u: [] for u in self.adjacency_list}
+            for u, neighbours in self.adjacency_list.items():
+                for w, weight in neighbours:
+                    reverse_list[w].append((u, weight))
+            self.reverse_list = reverse_list
+        return self.reverse_list.get(v, [])
+
+    def use_contraction_hierarchy(self, hierarchy: ContractionHierarchy):
+        """Makes this graph searchable by `ContractionHierarchySearch`."""
+        self.hierarchy = hierarchy
+
+    def use_landmarks(self, landmarks: Landmarks[Node]):
+        """Makes `guess_cost` use the ALT heuristic with the given landmarks."""
+        self.landmarks = landmarks
+
+    def guess_cost(self, v: Node, w: Node) -> float:
+        """
+        Without landmarks, we don't know anything about the nodes, so we guess 0.
+        With landmarks, we use the lower bound given by the triangle inequality.
+        """
+        if self.landmarks is None:
+            return 0.0
+        return self.landmarks.lower_bound(v, w)
+
+    def unreachable_reason(self, v: Node, w: Node) -> str | None:
+        """The components of the graph are computed the first time this is called."""
+        if self.components is None:
+            self.prepare_queries()
+        assert self.components is not None
+        return self.components.unreachable_reason(v, w)
+
+    def prepare_queries(self):
+        if self.components is None:
+            self.components = Components(self)
+
     def is_weighted(self) -> bool:
         return self.weighted
 
     def parse_node(self, s: str):
-        if s not in self.adjacency_list:
+        if s not in (self.compact.ids if self.compact is not None else self.adjacency_list):
             raise ValueError(f"Unknown node: {s}")
         return s
 
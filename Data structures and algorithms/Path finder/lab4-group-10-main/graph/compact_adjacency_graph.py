@@ -0,0 +1,264 @@
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from .edge import Edge
+from .graph import Graph
+from .components import Components
+from .landmarks import Landmarks
+from .contraction_hierarchy import ContractionHierarchy
+
+from utilities.snapshot import Snapshot, snapshot_file, source_key, encode_strings, decode_strings
+
+
+Node = str
+
+# Snapshots of adjacency graphs are shared with `AdjacencyGraph`.
+SNAPSHOT_KIND = "adjacency"
+
+class CompactAdjacencyGraph(Graph[Node]):
+    """
+    A memory-efficient version of `AdjacencyGraph`, for large graphs that are read once and never modified.
+     - Every node name is interned to an integer id, once, when the graph is read.
+     - The edges are stored in compressed sparse row (CSR) format:
+       the outgoing edges of node i are at the indices offsets[i] ... offsets[i+1]-1
+       of the flat arrays `targets` and `weights`.
+     - The arrays are Python `array`s, so each edge takes 12 bytes
+       instead of a separate `Edge` object.
+     - The arrays are cached in a binary snapshot file next to the text file.
+       Later runs memory-map the snapshot instead of parsing the text file.
+    The outgoing edges of a node are listed in the same order as in the file,
+    so searches behave exactly as on an `AdjacencyGraph`.
+    """
+    names: list[Node]                # id -> node name
+    ids: dict[Node, int]             # node name -> id
+    offsets: Sequence[int]           # length: number of nodes + 1
+    targets: Sequence[int]           # length: number of edges
+    weights: Sequence[float]         # length: number of edges
+    reverse: tuple[Sequence[int], Sequence[int], Sequence[int]] | None  # built on demand
+    hierarchy: ContractionHierarchy | None  # see `use_contraction_hierarchy`
+    landmarks: Landmarks[Node] | None       # see `use_landmarks`
+    components: Components[Node] | None     # computed on demand
+    weighted: bool
+
+    def __init__(self, graph: str|None = None):
+        self.names = []
+        self.ids = {}
+        self.offsets = array('q', [0])
+        self.targets = array('i')
+        self.weights = array('d')
+        self.reverse = None
+        self.hierarchy = None
+        self.landmarks = None
+        self.components = None
+        self.weighted = False
+        if graph:
+            self.init(graph)
+
+    def init(self, graph: str):
+        """
+        Populates the graph with edges from a text file,
+        in the same format as for `AdjacencyGraph`.
+        """
+        key = source_key(graph, SNAPSHOT_KIND)
+        if key and self.read_snapshot(graph, key):
+            return
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        with open(graph, encoding="utf-8") as IN:
+            for line in IN:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    start, end, *maybe_weight = line.split('\t')
+                    sources.append(self.intern(start))
+                    targets.append(self.intern(end))
+                    weights.append(float(maybe_weight[0]) if maybe_weight else 1.0)
+        self.build(sources, targets, weights)
+        # Don't cache the result if the file was modified while we were reading it.
+        if key and key == source_key(graph, SNAPSHOT_KIND):
+            self.write_snapshot(graph, key)
+
+    @staticmethod
+    def from_edges(edges: Iterable[Edge[Node]], nodes: Iterable[Node] = ()) -> 'CompactAdjacencyGraph':
+        """
+        Creates a compact graph with the given edges.
+        Node ids are assigned in order of appearance, starting with `nodes`.
+        """
+        graph = CompactAdjacencyGraph()
+        for v in nodes:
+            graph.intern(v)
+        sources = array('i')
+        targets = array('i')
+        weights = array('d')
+        for e in edges:
+            sources.append(graph.intern(e.start))
+            targets.append(graph.intern(e.end))
+            weights.append(e.weight)
+        graph.build(sources, targets, weights)
+        return graph
+
+    def read_snapshot(self, source: str, key: dict[str, Any]) -> bool:
+        """
+        Replaces the contents of this graph with the snapshot of the text file `source`.
+        The arrays are memory-mapped, only the node names are decoded.
+        Returns False if there is no up-to-date snapshot.
+        """
+        snapshot = Snapshot.read(snapshot_file(source, SNAPSHOT_KIND), key)
+        if snapshot is None:
+            return False
+        self.names = decode_strings(snapshot["names"], snapshot.meta["num_nodes"])
+        self.ids = dict(zip(self.names, range(len(self.names))))
+        self.offsets = snapshot["offsets"]
+        self.targets = snapshot["targets"]
+        self.weights = snapshot["weights"]
+        self.reverse = None
+        self.components = None
+        self.weighted = snapshot.meta["weighted"]
+        return True
+
+    def write_snapshot(self, source: str, key: dict[str, Any]) -> bool:
+        """Writes a snapshot of this graph, to be used instead of the text file `source`."""
+        return Snapshot.write(
+            snapshot_file(source, SNAPSHOT_KIND), key,
+            {
+                "names": encode_strings(self.names),
+                "offsets": array('q', self.offsets),
+                "targets": array('i', self.targets),
+                "weights": array('d', self.weights),
+            },
+            {"num_nodes": len(self.names), "weighted": self.weighted},
+        )
+
+    def intern(self, v: Node) -> int:
+        """Returns the id of a node name, assigning a new id if the name is new."""
+        i = self.ids.get(v)
+        if i is None:
+            i = self.ids[v] = len(self.names)
+            self.names.append(v)
+        return i
+
+    def build(self, sources: Sequence[int], targets: Sequence[int], weights: Sequence[float]):
+        """
+        Builds the CSR arrays from an unsorted list of edges, given as three parallel arrays.
+        This is a stable counting sort on the source node, so it runs in linear time.
+        """
+        self.offsets, self.targets, self.weights = to_csr(len(self.names), sources, targets, weights)
+        self.reverse = None
+        self.components = None
+        self.weighted = any(w != 1 for w in self.weights)
+
+    def nodes(self) -> frozenset[Node]:
+        return frozenset(self.names)
+
+    def num_nodes(self) -> int:
+        return len(self.names)
+
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def outgoing_edges(self, v: Node) -> list[Edge[Node]]:
+        return [Edge(v, w, weight) for w, weight in self.outgoing_neighbours(v)]
+
+    def incoming_edges(self, v: Node) -> list[Edge[Node]]:
+        return [Edge(u, v, weight) for u, weight in self.incoming_neighbours(v)]
+
+    def outgoing_neighbours(self, v: Node) -> list[tuple[Node, float]]:
+        i = self.ids.get(v)
+        if i is None:
+            return []
+        names = self.names
+        lo, hi = self.offsets[i], self.offsets[i+1]
+        return [(names[t], w) for t, w in zip(self.targets[lo:hi], self.weights[lo:hi])]
+
+    def incoming_neighbours(self, v: Node) -> list[tuple[Node, float]]:
+        i = self.ids.get(v)
+        if i is None:
+            return []
+        if self.reverse is None:
+            sources = array('i')
+            for u in range(len(self.names)):
+                sources.extend([u] * (self.offsets[u+1] - self.offsets[u]))
+            offsets, sources, indices = to_csr(
+                len(self.names), self.targets, sources, range(len(self.targets)), 'q')
+            self.reverse = (offsets, sources, indices)
+        offsets, sources, indices = self.reverse
+        names, weights = self.names, self.weights
+        lo, hi = offsets[i], offsets[i+1]
+        return [(names[u], weights[k]) for u, k in zip(sources[lo:hi], indices[lo:hi])]
+
+    def use_contraction_hierarchy(self, hierarchy: ContractionHierarchy):
+        """Makes this graph searchable by `ContractionHierarchySearch`."""
+        self.hierarchy = hierarchy
+
+    def use_landmarks(self, landmarks: Landmarks[Node]):
+        """Makes `guess_cost` use the ALT heuristic with the given landmarks."""
+        self.landmarks = landmarks
+
+    def guess_cost(self, v: Node, w: Node) -> float:
+        """
+        Without landmarks, we don't know anything about the nodes, so we guess 0.
+        With landmarks, we use the lower bound given by the triangle inequality.
+        """
+        if self.landmarks is None:
+            return 0.0
+        return self.landmarks.lower_bound(v, w)
+
+    def unreachable_reason(self, v: Node, w: Node) -> str | None:
+        """The components of the graph are computed the first time this is called."""
+        if self.components is None:
+            self.prepare_queries()
+        assert self.components is not None
+        return self.components.unreachable_reason(v, w)
+
+    def prepare_queries(self):
+        if self.components is None:
+            self.components = Components(self)
+
+    def is_weighted(self) -> bool:
+        return self.weighted
+
+    def parse_node(self, s: str):
+        if s not in self.ids:
+            raise ValueError(f"Unknown node: {s}")
+        return s
+
+    def __str__(self) -> str:
+        return (
+            ("Weighted" if self.weighted else "Unweighted") +
+            f" compact adjacency graph with {self.num_nodes()} nodes and {self.num_edges()} edges.\n" +
+            "\nRandom nodes with outgoing edges:\n" +
+            self.example_outgoing_edges(8)
+        )
+
+
+def to_csr(
+        num_nodes: int, sources: Sequence[int], targets: Sequence[int],
+        values: Sequence[float], value_type: str = 'd',
+) -> tuple[array, array, array]:
+    """
+    Sorts a list of edges (given as parallel arrays) by source node,
+    and returns the arrays (offsets, targets, values) in CSR format.
+    Edges with the same source keep their relative order.
+    """
+    offsets = array('q', [0]) * (num_nodes + 1)
+    for u in sources:
+        offsets[u + 1] += 1
+    for u in range(num_nodes):
+        offsets[u + 1] += offsets[u]
+    position = offsets[:-1]
+    sorted_targets = array('i', [0]) * len(targets)
+    sorted_values = array(value_type, [0]) * len(targets)
+    for u, t, x in zip(sources, targets, values):
+        k = position[u]
+        sorted_targets[k] = t
+        sorted_values[k] = x
+        position[u] = k + 1
+    return offsets, sorted_targets, sorted_values
+
+
+if __name__ == '__main__':
+    _, file = sys.argv
+    graph = CompactAdjacencyGraph(file)
+    print(graph)
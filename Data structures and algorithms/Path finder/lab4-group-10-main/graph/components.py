@@ -0,0 +1,144 @@
+from collections.abc import Callable, Iterable, Iterator
+from typing import Generic
+
+from .edge import V
+from .graph import Graph
+
+
+class Components(Generic[V]):
+    """
+    Reachability information for an explicit graph, computed once by
+    labelling the components of the graph.
+
+    For an undirected graph, w is reachable from v exactly when they are in
+    the same connected component.
+    For a directed graph, we compute the weakly connected components (ignoring
+    the direction of the edges) and the strongly connected components,
+    numbered in topological order. Then w is certainly not reachable from v if
+    they are in different weak components, or if the strong component of w comes
+    before the strong component of v (because all edges go forward in that order).
+    """
+    strong: dict[V, int]    # the strongly connected component of each node, in topological order
+    weak: dict[V, int]      # the weakly connected component of each node
+    directed: bool
+
+    def __init__(self, graph: Graph[V], directed: bool = True):
+        self.directed = directed
+        nodes = graph.nodes()
+        def successors(v: V) -> Iterator[V]:
+            return (w for w, _ in graph.outgoing_neighbours(v))
+        if directed:
+            self.strong = strong_components(nodes, successors)
+            self.weak = weak_components(nodes, successors)
+        else:
+            self.strong = self.weak = connected_components(nodes, successors)
+
+    def unreachable_reason(self, v: V, w: V) -> str | None:
+        """
+        Returns the reason why w is not reachable from v,
+        or None if w might be reachable.
+        """
+        if v == w:
+            return None
+        for node in (v, w):
+            if node not in self.weak:
+                return f"{node} is not a node of the graph"
+        if self.weak[v] != self.weak[w]:
+            return f"{v} and {w} are in different connected components"
+        if self.directed and self.strong[v] > self.strong[w]:
+            return f"no edges lead back from the strongly connected component of {v} to that of {w}"
+        return None
+
+
+def connected_components(nodes: Iterable[V], successors: Callable[[V], Iterator[V]]) -> dict[V, int]:
+    """Labels the connected components of an undirected graph, by depth-first search."""
+    component: dict[V, int] = {}
+    count = 0
+    for root in nodes:
+        if root in component:
+            continue
+        component[root] = count
+        stack = [root]
+        while stack:
+            for w in successors(stack.pop()):
+                if w not in component:
+                    component[w] = count
+                    stack.append(w)
+        count += 1
+    return component
+
+
+def weak_components(nodes: Iterable[V], successors: Callable[[V], Iterator[V]]) -> dict[V, int]:
+    """
+    Labels the weakly connected components of a directed graph,
+    using a union-find structure over the edges.
+    """
+    parent: dict[V, V] = {}
+    def find(v: V) -> V:
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for v in nodes:
+        parent.setdefault(v, v)
+        for w in successors(v):
+            parent.setdefault(w, w)
+            root_v, root_w = find(v), find(w)
+            if root_v != root_w:
+                parent[root_w] = root_v
+
+    labels: dict[V, int] = {}
+    return {v: labels.setdefault(find(v), len(labels)) for v in parent}
+
+
+def strong_components(nodes: Iterable[V], successors: Callable[[V], Iterator[V]]) -> dict[V, int]:
+    """
+    Labels the strongly connected components of a directed graph,
+    using Tarjan's algorithm (with an explicit stack instead of recursion).
+    Tarjan's algorithm finds the components in reverse topological order,
+    so we number them backwards: every edge goes to the same or a later component.
+    """
+    index: dict[V, int] = {}    # the order in which the nodes are visited
+    lowlink: dict[V, int] = {}  # the smallest index reachable from the node's subtree
+    stack: list[V] = []
+    on_stack: set[V] = set()
+    found: dict[V, int] = {}    # the components, in the order they are found
+    count = 0
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, successors(root))]
+        while work:
+            v, remaining = work[-1]
+            for w in remaining:
+                if w not in index:
+                    index[w] = lowlink[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, successors(w)))
+                    break
+                if w in on_stack and index[w] < lowlink[v]:
+                    lowlink[v] = index[w]
+            else:
+                # All successors of v are done.
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if lowlink[v] < lowlink[u]:
+                        lowlink[u] = lowlink[v]
+                if lowlink[v] == index[v]:
+                    # v is the root of a component, which consists of v and everything above it on the stack.
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        found[w] = count
+                        if w == v:
+                            break
+                    count += 1
+
+    return {v: count - 1 - c for v, c in found.items()}
@@ -0,0 +1,233 @@
+import sys
+import heapq
+from array import array
+from collections.abc import Sequence
+from typing import NamedTuple
+
+from .edge import Edge
+from .graph import Graph
+
+from utilities.snapshot import Snapshot, snapshot_file, source_key, encode_strings, decode_strings
+from utilities.stopwatch import Stopwatch
+
+
+SNAPSHOT_KIND = "hierarchy"
+
+# A witness search gives up after settling this many nodes.
+# Giving up early only means that we add a shortcut that wasn't necessary.
+WITNESS_SETTLE_LIMIT = 60
+
+# An arc is an edge or a shortcut: target -> (weight, middle node).
+# The middle node of an edge is -1, and for a shortcut it is the contracted node it replaces.
+Arcs = dict[int, tuple[float, int]]
+
+
+class ArcList(NamedTuple):
+    """
+    The arcs of a hierarchy in compressed sparse row (CSR) format:
+    the arcs of node i are at the indices offsets[i] ... offsets[i+1]-1 of the other arrays.
+    """
+    offsets: Sequence[int]
+    targets: Sequence[int]
+    weights: Sequence[float]
+    middles: Sequence[int]
+
+
+class ContractionHierarchy:
+    """
+    A contraction hierarchy (Geisberger et al., 2008) of a static graph with string nodes.
+
+    The nodes are contracted one by one, from the least important to the most important.
+    Contracting a node v removes it from the graph, and to keep all distances the same,
+    a shortcut u -> w is added for every path u -> v -> w that is the only shortest path.
+    (If a local "witness search" finds another path that is no longer, no shortcut is needed.)
+    The order is chosen greedily by the edge difference: the number of shortcuts added minus
+    the number of edges removed, plus the number of neighbours that are already contracted
+    (which spreads the contraction evenly over the graph). The priorities are updated lazily.
+
+    In the resulting graph of edges and shortcuts, every shortest path goes first upwards
+    and then downwards in the order. So a query only has to search upwards, both from the start
+    (in `up`) and backwards from the goal (in `down`); see `search.contraction_hierarchy_search`.
+    Every shortcut remembers its middle node, so that it can be unpacked into the original edges.
+
+    Nodes are numbered in sorted order, and the hierarchy is cached in a snapshot file
+    next to the graph file (see `for_file`).
+    """
+    names: list[str]        # id -> node
+    ids: dict[str, int]     # node -> id
+    rank: Sequence[int]     # the position of each node in the contraction order
+    up: ArcList             # the arcs v -> w with rank[w] > rank[v], stored at v
+    down: ArcList           # the arcs u -> v with rank[u] > rank[v], stored at v (with target u)
+
+    def __init__(self, names: list[str], rank: Sequence[int], up: ArcList, down: ArcList):
+        self.names = names
+        self.ids = dict(zip(names, range(len(names))))
+        self.rank = rank
+        self.up = up
+        self.down = down
+
+    @staticmethod
+    def build(graph: Graph[str], verbose: bool = False) -> 'ContractionHierarchy':
+        """Contracts all nodes of the graph, and returns the resulting hierarchy."""
+        stopwatch = Stopwatch()
+        names = sorted(graph.nodes())
+        ids = dict(zip(names, range(len(names))))
+        num_nodes = len(names)
+        infinity = float("inf")
+
+        # The current arcs of each node, in both directions. Parallel edges are merged.
+        outgoing: list[Arcs] = [{} for _ in range(num_nodes)]
+        incoming: list[Arcs] = [{} for _ in range(num_nodes)]
+        for v in names:
+            i = ids[v]
+            for w, weight in graph.outgoing_neighbours(v):
+                j = ids[w]
+                if i != j and weight < outgoing[i].get(j, (infinity,))[0]:
+                    outgoing[i][j] = incoming[j][i] = (weight, -1)
+
+        contracted = bytearray(num_nodes)
+        contracted_neighbours = [0] * num_nodes
+
+        def witness_distances(source: int, avoid: int, limit: float, targets: Arcs) -> dict[int, float]:
+            """Distances from `source` in the remaining graph without `avoid`, up to `limit`."""
+            distances: dict[int, float] = {}
+            heap = [(0.0, source)]
+            remaining = len(targets)
+            while heap and len(distances) < WITNESS_SETTLE_LIMIT:
+                d, u = heapq.heappop(heap)
+                if u in distances:
+                    continue
+                if d > limit:
+                    break
+                distances[u] = d
+                if u in targets:
+                    remaining -= 1
+                    if remaining == 0:
+                        break
+                for w, (weight, _) in outgoing[u].items():
+                    if w != avoid and not contracted[w] and w not in distances:
+                        heapq.heappush(heap, (d + weight, w))
+            return distances
+
+        def shortcuts(v: int) -> list[tuple[int, int, float]]:
+            """The shortcuts (u, w, weight) needed when contracting v."""
+            targets = {w: arc for w, arc in outgoing[v].items() if not contracted[w]}
+            if not targets:
+                return []
+            max_out = max(weight for weight, _ in targets.values())
+            result: list[tuple[int, int, float]] = []
+            for u, (weight_in, _) in incoming[v].items():
+                if contracted[u]:
+                    continue
+                distances = witness_distances(u, v, weight_in + max_out, targets)
+                for w, (weight_out, _) in targets.items():
+                    via = weight_in + weight_out
+                    if w != u and distances.get(w, infinity) > via:
+                        result.append((u, w, via))
+            return result
+
+        def priority(v: int) -> tuple[int, list[tuple[int, int, float]]]:
+            needed = shortcuts(v)
+            degree = (sum(1 for w in outgoing[v] if not contracted[w]) +
+                      sum(1 for u in incoming[v] if not contracted[u]))
+            return len(needed) - degree + contracted_neighbours[v], needed
+
+        heap = [(priority(v)[0], v) for v in range(num_nodes)]
+        heapq.heapify(heap)
+        rank = array('i', [0]) * num_nodes
+        num_shortcuts = 0
+        for order in range(num_nodes):
+            while True:
+                _, v = heapq.heappop(heap)
+                # Lazy update: if the priority has become worse, try the next node instead.
+                p, needed = priority(v)
+                if not heap or p <= heap[0][0]:
+                    break
+                heapq.heappush(heap, (p, v))
+            for u, w, weight in needed:
+                if weight < outgoing[u].get(w, (infinity,))[0]:
+                    outgoing[u][w] = incoming[w][u] = (weight, v)
+                    num_shortcuts += 1
+            contracted[v] = 1
+            rank[v] = order
+            for u in set(outgoing[v]) | set(incoming[v]):
+                contracted_neighbours[u] += 1
+
+        hierarchy = ContractionHierarchy(
+            names, rank, upward_arcs(outgoing, rank), upward_arcs(incoming, rank))
+        if verbose:
+            stopwatch.finished(f"Contracting {num_nodes} nodes (adding {num_shortcuts} shortcuts)")
+        return hierarchy
+
+    def find_arc(self, arcs: ArcList, v: int, target: int) -> tuple[float, int]:
+        """Returns the weight and middle node of the arc from v to `target` in `arcs`."""
+        for k in range(arcs.offsets[v], arcs.offsets[v+1]):
+            if arcs.targets[k] == target:
+                return arcs.weights[k], arcs.middles[k]
+        raise ValueError(f"The hierarchy has no arc between {self.names[v]} and {self.names[target]}")
+
+    def unpack(self, u: int, w: int, weight: float, middle: int) -> list[Edge[str]]:
+        """
+        Unpacks an arc u -> w into a path of original edges.
+        The shortcut u -> w via the middle node m consists of the arcs u -> m and m -> w.
+        Since m was contracted before both u and w, the arc u -> m is a `down` arc of m,
+        and m -> w is an `up` arc of m.
+        """
+        path: list[Edge[str]] = []
+        stack = [(u, w, weight, middle)]
+        while stack:
+            u, w, weight, middle = stack.pop()
+            if middle < 0:
+                path.append(Edge(self.names[u], self.names[w], weight))
+            else:
+                # Push the second half first, so that the first half is unpacked first.
+                stack.append((middle, w, *self.find_arc(self.up, middle, w)))
+                stack.append((u, middle, *self.find_arc(self.down, middle, u)))
+        return path
+
+    @staticmethod
+    def for_file(graph: Graph[str], file: str, verbose: bool = False) -> 'ContractionHierarchy':
+        """
+        Returns the hierarchy for a graph read from `file`. The hierarchy is cached
+        in a snapshot file next to it, which is used as long as the text file doesn't change.
+        """
+        key = source_key(file, SNAPSHOT_KIND)
+        path = snapshot_file(file, SNAPSHOT_KIND)
+        snapshot = key and Snapshot.read(path, key)
+        if snapshot:
+            return ContractionHierarchy(
+                decode_strings(snapshot["names"], snapshot.meta["num_nodes"]),
+                snapshot["rank"],
+                ArcList(*(snapshot[f"up_{name}"] for name in ArcList._fields)),
+                ArcList(*(snapshot[f"down_{name}"] for name in ArcList._fields)),
+            )
+        hierarchy = ContractionHierarchy.build(graph, verbose)
+        if key:
+            arrays = {"names": encode_strings(hierarchy.names), "rank": array('i', hierarchy.rank)}
+            for direction, arcs in (("up", hierarchy.up), ("down", hierarchy.down)):
+                for name, values in zip(ArcList._fields, arcs):
+                    assert isinstance(values, array)
+                    arrays[f"{direction}_{name}"] = values
+            Snapshot.write(path, key, arrays, {"num_nodes": len(hierarchy.names)})
+        return hierarchy
+
+
+def upward_arcs(arcs: list[Arcs], rank: Sequence[int]) -> ArcList:
+    """Collects the arcs that lead to a node with a higher rank, in CSR format."""
+    result = ArcList(array('q', [0]), array('i'), array('d'), array('i'))
+    for v, arcs_v in enumerate(arcs):
+        for w, (weight, middle) in arcs_v.items():
+            if rank[w] > rank[v]:
+                result.targets.append(w)        # type: ignore
+                result.weights.append(weight)   # type: ignore
+                result.middles.append(middle)   # type: ignore
+        result.offsets.append(len(result.targets))  # type: ignore
+    return result
+
+
+if __name__ == '__main__':
+    # Usage: python -m graph.contraction_hierarchy GRAPHFILE
+    # Builds the hierarchy for an adjacency graph, and saves it next to the graph file.
+    from .adjacency_graph import AdjacencyGraph
+    _, file = sys.argv
+    ContractionHierarchy.for_file(AdjacencyGraph(file), file, verbose=True)
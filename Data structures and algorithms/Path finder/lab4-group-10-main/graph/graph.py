@@ -32,6 +32,35 @@ class Graph(ABC, Generic[V]):
     def outgoing_edges(self, v: V) -> list[Edge[V]]:
         """Returns a collection of the graph edges that originate from the given node."""
 
+    def incoming_edges(self, v: V) -> list[Edge[V]]:
+        """
+        Returns a collection of the graph edges that end in the given node.
+        The default implementation assumes that the graph is undirected,
+        i.e., that every edge has a reverse edge with the same weight.
+        Directed graphs have to override this.
+        """
+        return [e.reverse() for e in self.outgoing_edges(v)]
+
+    def outgoing_neighbours(self, v: V) -> list[tuple[V, float]]:
+        """
+        Returns the end nodes and weights of the edges that originate from the given node,
+        as (node, weight) pairs, in the same order as `outgoing_edges`.
+
+        The searchers use this instead of `outgoing_edges`, and only create `Edge` objects
+        for the path they find. So graphs that compute their edges on the fly can override this,
+        to avoid creating an edge for every neighbour of every expanded node.
+        The default implementation takes the pairs from `outgoing_edges`.
+        """
+        return [(e.end, e.weight) for e in self.outgoing_edges(v)]
+
+    def incoming_neighbours(self, v: V) -> list[tuple[V, float]]:
+        """
+        Returns the start nodes and weights of the edges that end in the given node,
+        as (node, weight) pairs, in the same order as `incoming_edges`.
+        The default implementation takes the pairs from `incoming_edges`.
+        """
+        return [(e.start, e.weight) for e in self.incoming_edges(v)]
+
     @abstractmethod
     def is_weighted(self) -> bool:
         """Returns if the graph edges are weighted."""
@@ -43,6 +72,23 @@ class Graph(ABC, Generic[V]):
         """
         return 0.0
 
+    def unreachable_reason(self, v: V, w: V) -> str | None:
+        """
+        Returns the reason why w is certainly not reachable from v,
+        or None if w might be reachable. This is used to reject impossible
+        queries quickly, instead of searching through everything reachable from v.
+        The default implementation doesn't know anything, so it returns None.
+        """
+        return None
+
+    def prepare_queries(self):
+        """
+        Computes the information that is cached on demand for answering queries
+        (such as the reachability information for `unreachable_reason`).
+        This is useful before forking worker processes, which then share it,
+        instead of computing it once each. The default implementation does nothing.
+        """
+
     # Below are some auxiliary methods.
     # You don't have to look at them.
     # They are used for parsing and printing.
@@ -0,0 +1,281 @@
+import sys
+import heapq
+from array import array
+from collections.abc import Callable, Collection, Sequence
+from math import sqrt
+from typing import NamedTuple, TYPE_CHECKING
+
+from utilities.snapshot import Snapshot, snapshot_file, source_key
+from utilities.stopwatch import Stopwatch
+
+if TYPE_CHECKING:
+    # Only for the type annotations: the grid graph module imports this one.
+    from .grid_graph import GridGraph
+
+
+SNAPSHOT_KIND = "hpa"
+
+# The default width and height of a cluster, in cells.
+CLUSTER_SIZE = 16
+
+# An entrance of at least this many crossings gets a transition at both ends instead of one in the middle.
+LONG_ENTRANCE = 6
+
+SQRT2 = sqrt(2)
+
+
+class AbstractEdges(NamedTuple):
+    """
+    The edges of the abstract graph in compressed sparse row (CSR) format:
+    the edges of node i are at the indices offsets[i] ... offsets[i+1]-1 of the other arrays.
+    """
+    offsets: Sequence[int]
+    targets: Sequence[int]
+    weights: Sequence[float]
+
+
+class LocalSearch(NamedTuple):
+    """The result of Dijkstra's algorithm inside one cluster (see `GridAbstraction.local_search`)."""
+    cost_to: dict[int, float]
+    parent: dict[int, int]      # the previous cell of the best known path to each reached cell
+    iterations: int
+
+
+class GridAbstraction:
+    """
+    The abstract graph of hierarchical pathfinding (HPA*, Botea et al., 2004) for a grid graph.
+
+    The grid is divided into square clusters of `cluster_size` x `cluster_size` cells.
+    Wherever a path can cross from one cluster into a neighbouring one, we place
+    transition cells on both sides: these are the nodes of the abstract graph.
+    Two transitions are connected by an edge if they are the two sides of a crossing
+    (with the weight of the grid edge), or if they are in the same cluster
+    (with the cost of the shortest path between them inside the cluster).
+    So a long query only has to search the small abstract graph (see `search.hpa_star`),
+    and the abstract path is then refined into grid edges, one cluster at a time.
+
+    The crossings between two clusters are grouped by the connected components
+    (inside each cluster) of their two sides. Every group gets at least one transition,
+    so every grid path can be followed in the abstract graph: the abstract graph
+    has a path if and only if the grid has one. Long entrances get a transition at each end,
+    which makes the abstract paths closer to the shortest paths.
+
+    Cells are numbered as in `GridGraph`: the point (x, y) is cell y * width + x.
+    The abstraction is cached in a snapshot file next to the map file (see `for_file`).
+    """
+    cluster_size: int
+    width: int
+    height: int
+    clusters_x: int                 # the number of clusters in each row of clusters
+    cells: Sequence[int]            # abstract node -> cell
+    cluster_offsets: Sequence[int]  # the transitions of cluster c are the nodes cluster_offsets[c] ... cluster_offsets[c+1]-1
+    edges: AbstractEdges
+
+    def __init__(
+            self, cluster_size: int, width: int, height: int,
+            cells: Sequence[int], cluster_offsets: Sequence[int], edges: AbstractEdges,
+    ):
+        self.cluster_size = cluster_size
+        self.width = width
+        self.height = height
+        self.clusters_x = -(-width // cluster_size)
+        self.cells = cells
+        self.cluster_offsets = cluster_offsets
+        self.edges = edges
+
+    def num_clusters(self) -> int:
+        return len(self.cluster_offsets) - 1
+
+    def cluster(self, cell: int) -> int:
+        """The cluster of a cell."""
+        y, x = divmod(cell, self.width)
+        size = self.cluster_size
+        return (y // size) * self.clusters_x + x // size
+
+    def transitions(self, cluster: int) -> range:
+        """The abstract nodes in a cluster."""
+        return range(self.cluster_offsets[cluster], self.cluster_offsets[cluster + 1])
+
+    def local_search(
+            self, graph: 'GridGraph', source: int, targets: Collection[int] | None = None,
+    ) -> LocalSearch:
+        """
+        Dijkstra's algorithm from the cell `source`, only following edges inside its cluster.
+        Stops as soon as all `targets` are settled (if they are given).
+        """
+        return local_search(graph, source, self.cluster_size, targets)
+
+    @staticmethod
+    def build(graph: 'GridGraph', cluster_size: int = CLUSTER_SIZE, verbose: bool = False) -> 'GridAbstraction':
+        """Finds the transitions of all clusters, and the distances between them."""
+        stopwatch = Stopwatch()
+        width, height = graph.width(), graph.height()
+        cells, masks, mask_neighbours = graph.cells, graph.masks, graph.mask_neighbours
+        clusters_x = -(-width // cluster_size)
+        num_clusters = clusters_x * -(-height // cluster_size)
+
+        # The connected component (inside its cluster) of each passable cell, or -1.
+        component = array('i', [-1]) * len(cells)
+        num_components = 0
+        for i, passable in enumerate(cells):
+            if passable and component[i] < 0:
+                for j in local_search(graph, i, cluster_size).cost_to:
+                    component[j] = num_components
+                num_components += 1
+
+        # The crossings between clusters: pairs of neighbouring passable cells i and j,
+        # where the cluster of i comes before the cluster of j. They are grouped by the components
+        # of their two sides. Only cells on a cluster border can cross.
+        groups: dict[tuple[int, int], list[tuple[int, int, float]]] = {}
+        last = cluster_size - 1
+        for i, passable in enumerate(cells):
+            if not passable:
+                continue
+            y, x = divmod(i, width)
+            if 0 < x % cluster_size < last and 0 < y % cluster_size < last:
+                continue
+            cluster = (y // cluster_size) * clusters_x + x // cluster_size
+            for dx, dy, weight in mask_neighbours[masks[i]]:
+                if ((y + dy) // cluster_size) * clusters_x + (x + dx) // cluster_size > cluster:
+                    j = i + dy * width + dx
+                    groups.setdefault((component[i], component[j]), []).append((i, j, weight))
+
+        # Every entrance (a run of neighbouring crossings in a group) gets its transitions.
+        transition_edges: dict[int, dict[int, float]] = {}
+        def add_edge(i: int, j: int, weight: float):
+            for u, v in ((i, j), (j, i)):
+                edges = transition_edges.setdefault(u, {})
+                if weight < edges.get(v, float("inf")):
+                    edges[v] = weight
+        for crossings in groups.values():
+            crossings.sort()
+            entrance = [crossings[0]]
+            for crossing in crossings[1:]:
+                i, previous = crossing[0], entrance[-1][0]
+                if i - previous in (0, 1, width):
+                    entrance.append(crossing)
+                    continue
+                add_entrance(entrance, add_edge)
+                entrance = [crossing]
+            add_entrance(entrance, add_edge)
+
+        # Number the transitions by cluster, and connect the transitions inside each cluster.
+        by_cluster: list[list[int]] = [[] for _ in range(num_clusters)]
+        for i in sorted(transition_edges):
+            y, x = divmod(i, width)
+            by_cluster[(y // cluster_size) * clusters_x + x // cluster_size].append(i)
+        for cluster_cells in by_cluster:
+            for k, i in enumerate(cluster_cells):
+                targets = [j for j in cluster_cells[k+1:] if component[j] == component[i]]
+                if targets:
+                    cost_to = local_search(graph, i, cluster_size, targets).cost_to
+                    for j in targets:
+                        add_edge(i, j, cost_to[j])
+
+        transition_cells = array('i', (i for cluster_cells in by_cluster for i in cluster_cells))
+        ids = dict(zip(transition_cells, range(len(transition_cells))))
+        cluster_offsets = array('q', [0])
+        for cluster_cells in by_cluster:
+            cluster_offsets.append(cluster_offsets[-1] + len(cluster_cells))
+        edges = AbstractEdges(array('q', [0]), array('i'), array('d'))
+        for i in transition_cells:
+            for j, weight in sorted(transition_edges[i].items()):
+                edges.targets.append(ids[j])        # type: ignore
+                edges.weights.append(weight)        # type: ignore
+            edges.offsets.append(len(edges.targets))  # type: ignore
+
+        if verbose:
+            stopwatch.finished(
+                f"Building the HPA* abstraction with {num_clusters} clusters, "
+                f"{len(transition_cells)} transitions and {len(edges.targets)} abstract edges"
+            )
+        return GridAbstraction(cluster_size, width, height, transition_cells, cluster_offsets, edges)
+
+    @staticmethod
+    def for_file(
+            graph: 'GridGraph', file: str, cluster_size: int = CLUSTER_SIZE, verbose: bool = False,
+    ) -> 'GridAbstraction':
+        """
+        Returns the abstraction for a grid graph read from `file`. The abstraction is cached
+        in a snapshot file next to it, which is used as long as the map file doesn't change.
+        """
+        key = source_key(file, SNAPSHOT_KIND, cluster_size=cluster_size)
+        path = snapshot_file(file, SNAPSHOT_KIND)
+        snapshot = key and Snapshot.read(path, key)
+        if snapshot:
+            return GridAbstraction(
+                cluster_size, snapshot.meta["width"], snapshot.meta["height"],
+                snapshot["cells"], snapshot["cluster_offsets"],
+                AbstractEdges(*(snapshot[f"edge_{name}"] for name in AbstractEdges._fields)),
+            )
+        abstraction = GridAbstraction.build(graph, cluster_size, verbose)
+        if key:
+            arrays: dict[str, array] = {}
+            for name, values in (
+                    ("cells", abstraction.cells), ("cluster_offsets", abstraction.cluster_offsets),
+                    *((f"edge_{name}", values) for name, values in zip(AbstractEdges._fields, abstraction.edges)),
+            ):
+                assert isinstance(values, array)
+                arrays[name] = values
+            Snapshot.write(path, key, arrays, {"width": abstraction.width, "height": abstraction.height})
+        return abstraction
+
+
+def add_entrance(entrance: list[tuple[int, int, float]], add_edge: Callable[[int, int, float], None]):
+    """Adds the transitions of an entrance: the middle crossing, or both ends of a long entrance."""
+    if len(entrance) >= LONG_ENTRANCE:
+        representatives = [entrance[0], entrance[-1]]
+    else:
+        representatives = [entrance[len(entrance) // 2]]
+    for i, j, weight in representatives:
+        add_edge(i, j, weight)
+
+
+def local_search(
+        graph: 'GridGraph', source: int, cluster_size: int, targets: Collection[int] | None = None,
+) -> LocalSearch:
+    """
+    Dijkstra's algorithm from the cell `source`, only following edges inside its cluster.
+    Stops as soon as all `targets` are settled (if they are given).
+    Works directly on cell numbers and neighbour masks, since it runs a lot while building.
+    """
+    width, masks, mask_neighbours = graph.width(), graph.masks, graph.mask_neighbours
+    y0, x0 = divmod(source, width)
+    x0 -= x0 % cluster_size
+    y0 -= y0 % cluster_size
+    x1, y1 = x0 + cluster_size, y0 + cluster_size
+    remaining = set(targets) if targets is not None else None
+
+    cost_to: dict[int, float] = {source: 0.0}
+    parent: dict[int, int] = {}
+    settled: set[int] = set()
+    heap: list[tuple[float, int]] = [(0.0, source)]
+    iterations = 0
+    while heap:
+        cost, i = heapq.heappop(heap)
+        iterations += 1
+        if i in settled:
+            continue
+        settled.add(i)
+        if remaining is not None:
+            remaining.discard(i)
+            if not remaining:
+                break
+        y, x = divmod(i, width)
+        for dx, dy, weight in mask_neighbours[masks[i]]:
+            if x0 <= x + dx < x1 and y0 <= y + dy < y1:
+                j = i + dy * width + dx
+                cost_to_here = cost + weight
+                if cost_to_here < cost_to.get(j, float("inf")):
+                    cost_to[j] = cost_to_here
+                    parent[j] = i
+                    heapq.heappush(heap, (cost_to_here, j))
+    return LocalSearch(cost_to, parent, iterations)
+
+
+if __name__ == '__main__':
+    # Usage: python -m graph.grid_abstraction MAPFILE [CLUSTERSIZE]
+    # Builds the HPA* abstraction for a grid graph, and saves it next to the map file.
+    from .grid_graph import GridGraph
+    _, file, *size = sys.argv
+    GridAbstraction.for_file(GridGraph(file), file, int(size[0]) if size else CLUSTER_SIZE, verbose=True)
@@ -1,10 +1,14 @@
 import sys
 import re
+from bisect import bisect_right
 from math import sqrt
 
 from .edge import Edge
 from .graph import Graph
 from .point import Point
+from .grid_abstraction import GridAbstraction
+
+from utilities.snapshot import Snapshot, snapshot_file, source_key, encode_strings, decode_strings
 
 
 class GridGraph(Graph[Point]):
@@ -41,11 +45,30 @@ class GridGraph(Graph[Point]):
         if not (x == y == 0)
     ]
 
+    # Bit k of a neighbour mask is set if the neighbour in direction k is passable.
+    # This table lists, for each mask, the (dx, dy, weight) of the passable neighbours.
+    mask_neighbours: list[tuple[tuple[int, int, float], ...]]
+
+    # Internally, the point (x, y) is stored at index y * width + x of these arrays.
+    cells: bytearray       # 1 for passable cells, 0 for obstacles
+    masks: bytearray       # the neighbour mask of each cell
+    node_set: frozenset[Point] | None  # computed on demand
+    abstraction: GridAbstraction | None  # see `use_abstraction`
+
+    # The connected components, computed on demand (see `label_components`).
+    # The passable cells of each row y form maximal horizontal runs: run k starts at
+    # x = run_starts[y][k], ends before x = run_ends[y][k], and is in component run_components[y][k].
+    run_starts: list[list[int]] | None
+    run_ends: list[list[int]]
+    run_components: list[list[int]]
+    _width: int
+    _height: int
+
     def width(self) -> int:
-        return len(self.grid[0])
+        return self._width
 
     def height(self) -> int:
-        return len(self.grid)
+        return self._height
 
     def __init__(self, graph: str|list[str]|None = None):
         if graph:
@@ -57,45 +80,202 @@ class GridGraph(Graph[Point]):
         or from a grid of characters.
         The file describes the graph as ASCII art,
         in the format of the graph files from the Moving AI Lab.
+        The grid read from a file is cached in a binary snapshot file,
+        which is used as long as the text file doesn't change.
         """
         if isinstance(graph, str):
-            with open(graph, encoding="utf-8") as IN:
-                graph = [
-                    line for line in IN.read().splitlines()
-                    if re.match("^[" + GridGraph.allowed_chars + "]+$", line)
-                ]
+            file = graph
+            key = source_key(file, "grid")
+            snapshot = key and Snapshot.read(snapshot_file(file, "grid"), key)
+            if snapshot:
+                graph = decode_strings(snapshot["grid"], snapshot.meta["height"])
+            else:
+                with open(file, encoding="utf-8") as IN:
+                    graph = [
+                        line for line in IN.read().splitlines()
+                        if re.match("^[" + GridGraph.allowed_chars + "]+$", line)
+                    ]
+                # Don't cache the result if the file was modified while we were reading it.
+                if key and key == source_key(file, "grid"):
+                    Snapshot.write(snapshot_file(file, "grid"), key,
+                                   {"grid": encode_strings(graph)}, {"height": len(graph)})
         self.grid = graph
+        self._height = len(self.grid)
+        self._width = len(self.grid[0]) if self.grid else 0
         for row in self.grid:
             if len(row) != self.width():
                 raise ValueError("Malformed grid, row widths doesn't match.")
+        self.build_bitmap()
+
+    def build_bitmap(self):
+        """
+        Computes the passability bitmap and the neighbour masks of all cells.
+        To make this fast on large maps, all the work is done on whole byte strings:
+        the masks are computed on a copy of the bitmap with a border of obstacles,
+        where the neighbours in one direction are just the bitmap shifted by a constant offset.
+        """
+        width, height = self.width(), self.height()
+        passable_table = bytes(c in self.passable_chars.encode() for c in range(256))
+        self.cells = bytearray(b"".join(
+            row.encode("ascii", "replace").translate(passable_table) for row in self.grid
+        ))
+
+        padded_width = width + 2
+        padded = bytearray(padded_width * (height + 2))
+        for y in range(height):
+            start = (y + 1) * padded_width + 1
+            padded[start : start + width] = self.cells[y * width : (y + 1) * width]
+
+        masks = 0
+        for k, dir in enumerate(self.directions):
+            offset = dir.y * padded_width + dir.x
+            if offset >= 0:
+                shifted = padded[offset:] + bytes(offset)
+            else:
+                shifted = bytes(-offset) + padded[:offset]
+            # Replace the passable cells by the bit for this direction.
+            bit_table = bytes([0, 1 << k]) + bytes(254)
+            masks |= int.from_bytes(shifted.translate(bit_table), "little")
+        padded_masks = masks.to_bytes(len(padded), "little")
+        self.masks = bytearray(b"".join(
+            padded_masks[(y + 1) * padded_width + 1 : (y + 1) * padded_width + 1 + width]
+            for y in range(height)
+        ))
+        self.node_set = None
+        self.run_starts = None
+        self.abstraction = None
 
     def passable(self, p: Point) -> bool:
         """Returns true if you're allowed to pass through the given point."""
-        return (
-            0 <= p.x < self.width() and
-            0 <= p.y < self.height() and
-            self.grid[p.y][p.x] in self.passable_chars
-        )
+        return self.passable_at(p.x, p.y)
+
+    def passable_at(self, x: int, y: int) -> bool:
+        """Returns true if you're allowed to pass through the point (x, y)."""
+        return 0 <= x < self._width and 0 <= y < self._height and self.cells[y * self._width + x] == 1
 
     def nodes(self) -> frozenset[Point]:
-        # Note: this is inefficient because it calculates the set each time.
-        return frozenset(
-            p for y in range(self.height())
-            for x in range(self.width())
-            if self.passable(p := Point(x, y))
+        # The set is computed the first time it is needed.
+        if self.node_set is None:
+            width = self.width()
+            self.node_set = frozenset(
+                Point(i % width, i // width)
+                for i, passable in enumerate(self.cells) if passable
+            )
+        return self.node_set
+
+    def num_edges(self) -> int:
+        return sum(
+            len(self.mask_neighbours[mask])
+            for mask, passable in zip(self.masks, self.cells) if passable
         )
 
     def outgoing_edges(self, v: Point) -> list[Edge[Point]]:
+        return [Edge(v, w, weight) for w, weight in self.outgoing_neighbours(v)]
+
+    def incoming_edges(self, v: Point) -> list[Edge[Point]]:
+        return [Edge(u, v, weight) for u, weight in self.incoming_neighbours(v)]
+
+    def outgoing_neighbours(self, v: Point) -> list[tuple[Point, float]]:
+        x, y = v
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            # Points outside of the grid don't have a precomputed mask.
+            return [
+                (end, sqrt(dir.x*dir.x + dir.y*dir.y))
+                for dir in self.directions
+                if self.passable(end := v.add(dir))
+            ]
+        # The passable neighbours are given by the neighbour mask of v.
         return [
-            edge
-            # We consider all directions...
-            for dir in self.directions
-            # ...compute the edge in that direction...
-            for edge in [Edge(v, v.add(dir), sqrt(dir.x*dir.x + dir.y*dir.y))]
-            # ...and keep the ones with passable target.
-            if self.passable(edge.end)
+            (Point(x + dx, y + dy), weight)
+            for dx, dy, weight in self.mask_neighbours[self.masks[y * self._width + x]]
         ]
 
+    def incoming_neighbours(self, v: Point) -> list[tuple[Point, float]]:
+        # Edges only require a passable target, so impassable points have no incoming edges.
+        if not self.passable(v):
+            return []
+        return self.outgoing_neighbours(v)
+
+    def unreachable_reason(self, v: Point, w: Point) -> str | None:
+        """
+        Two points are connected if they are in the same connected component.
+        Note that edges only require a passable end point,
+        so an impassable start point can still reach its passable neighbours.
+        """
+        if v == w:
+            return None
+        if not self.passable(w):
+            return f"{w} is not passable"
+        if self.run_starts is None:
+            self.label_components()
+        if self.passable(v):
+            components = {self.component(v)}
+        else:
+            components = {self.component(w) for w, _ in self.outgoing_neighbours(v)}
+        if self.component(w) not in components:
+            return f"{v} and {w} are in different connected components"
+        return None
+
+    def prepare_queries(self):
+        if self.run_starts is None:
+            self.label_components()
+
+    def label_components(self):
+        """
+        Labels the connected components of the grid.
+        Instead of visiting every cell, we split each row into runs of passable cells,
+        and join the runs in neighbouring rows that touch each other, using union-find.
+        """
+        width, height = self._width, self._height
+        starts: list[list[int]] = []
+        ends: list[list[int]] = []
+        first: list[int] = []   # the number of the first run of each row
+        num_runs = 0
+        for y in range(height):
+            runs = [m.span() for m in re.finditer(b"\x01+", self.cells[y * width : (y + 1) * width])]
+            starts.append([start for start, _ in runs])
+            ends.append([end for _, end in runs])
+            first.append(num_runs)
+            num_runs += len(runs)
+
+        parent = list(range(num_runs))
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for y in range(height - 1):
+            above_starts, above_ends = starts[y], ends[y]
+            below_starts, below_ends = starts[y + 1], ends[y + 1]
+            i = j = 0
+            while i < len(above_starts) and j < len(below_starts):
+                # Diagonal moves are allowed, so runs that only meet at a corner also touch.
+                if above_starts[i] <= below_ends[j] and below_starts[j] <= above_ends[i]:
+                    parent[find(first[y] + i)] = find(first[y + 1] + j)
+                if above_ends[i] < below_ends[j]:
+                    i += 1
+                else:
+                    j += 1
+
+        self.run_starts, self.run_ends = starts, ends
+        self.run_components = [
+            [find(first[y] + k) for k in range(len(starts[y]))]
+            for y in range(height)
+        ]
+
+    def component(self, p: Point) -> int:
+        """The connected component of a passable point (see `label_components`)."""
+        assert self.run_starts is not None
+        k = bisect_right(self.run_starts[p.y], p.x) - 1
+        return self.run_components[p.y][k]
+
+    def use_abstraction(self, abstraction: GridAbstraction):
+        """Makes this graph searchable by `HPAStar`."""
+        if (abstraction.width, abstraction.height) != (self._width, self._height):
+            raise ValueError("The abstraction was built for a grid of a different size.")
+        self.abstraction = abstraction
+
     def is_weighted(self) -> bool:
         return True
 
@@ -164,6 +344,16 @@ class GridGraph(Graph[Point]):
         )
 
 
+GridGraph.mask_neighbours = [
+    tuple(
+        (dir.x, dir.y, sqrt(dir.x*dir.x + dir.y*dir.y))
+        for k, dir in enumerate(GridGraph.directions)
+        if mask & (1 << k)
+    )
+    for mask in range(1 << len(GridGraph.directions))
+]
+
+
 if __name__ == '__main__':
     (_, file) = sys.argv
     graph = GridGraph(file)
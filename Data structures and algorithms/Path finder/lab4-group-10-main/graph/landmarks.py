@@ -0,0 +1,166 @@
+import sys
+import heapq
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from typing import Generic
+
+from .edge import V
+from .graph import Graph
+from .components import weak_components
+
+from utilities.snapshot import Snapshot, snapshot_file, source_key, encode_strings, decode_strings
+from utilities.stopwatch import Stopwatch
+
+
+SNAPSHOT_KIND = "landmarks"
+
+class Landmarks(Generic[V]):
+    """
+    Landmark distances for the ALT heuristic (A*, Landmarks, Triangle inequality),
+    by Goldberg & Harrelson (2005).
+
+    For a few nodes L (the landmarks), we precompute the distances d(L, v) and d(v, L)
+    to and from every node v. By the triangle inequality, for any nodes v and w,
+
+        d(v, w) >= d(L, w) - d(L, v)    and    d(v, w) >= d(v, L) - d(w, L)
+
+    so the largest of these differences is an admissible (and consistent) guess.
+    It works best if the landmarks lie "behind" the goal, so we choose them far apart:
+    each new landmark is the node farthest away from the ones chosen so far.
+
+    The nodes are numbered, and the distances are stored in flat arrays of floats:
+    the distance for landmark k and node i is at index k * (number of nodes) + i.
+    Unreachable nodes have distance infinity.
+    """
+    names: list[V]                  # id -> node
+    ids: dict[V, int]               # node -> id
+    landmarks: list[int]            # the ids of the landmarks
+    from_landmark: Sequence[float]  # d(landmark, node)
+    to_landmark: Sequence[float]    # d(node, landmark)
+
+    def __init__(self, names: list[V], landmarks: list[int], from_landmark: Sequence[float], to_landmark: Sequence[float]):
+        self.names = names
+        self.ids = dict(zip(names, range(len(names))))
+        self.landmarks = landmarks
+        self.from_landmark = from_landmark
+        self.to_landmark = to_landmark
+
+    @staticmethod
+    def compute(graph: Graph[V], count: int, verbose: bool = False) -> 'Landmarks[V]':
+        """Chooses `count` landmarks by farthest-point selection, and computes their distances."""
+        stopwatch = Stopwatch()
+        names = sorted(graph.nodes())  # type: ignore
+        ids = dict(zip(names, range(len(names))))
+        num_nodes = len(names)
+        infinity = float("inf")
+        landmarks: list[int] = []
+        from_landmark = array('d')
+        to_landmark = array('d')
+        if not names:
+            return Landmarks(names, landmarks, from_landmark, to_landmark)
+        # We only choose landmarks in the largest weakly connected component:
+        # a landmark in a tiny component doesn't help for any other query.
+        # The first landmark is the node farthest away from an arbitrary node in that component.
+        weak = weak_components(names, lambda v: (w for w, _ in graph.outgoing_neighbours(v)))
+        largest = Counter(weak.values()).most_common(1)[0][0]
+        start = next(v for v in names if weak[v] == largest)
+        # The smallest distance from the landmarks so far to each node.
+        nearest = [infinity] * num_nodes
+        for v, d in shortest_distances(graph, start).items():
+            nearest[ids[v]] = d
+        while len(landmarks) < count:
+            # The next landmark is the node farthest from all landmarks so far,
+            # among the nodes that are reachable from them.
+            landmark = max(range(num_nodes), key=lambda i: nearest[i] if nearest[i] < infinity else -1.0)
+            if not 0 < nearest[landmark] < infinity:
+                break
+            landmarks.append(landmark)
+            forward = shortest_distances(graph, names[landmark], True)
+            backward = shortest_distances(graph, names[landmark], False)
+            from_landmark.extend(forward.get(v, infinity) for v in names)
+            to_landmark.extend(backward.get(v, infinity) for v in names)
+            if len(landmarks) == 1:
+                # Forget the distances from the arbitrary node.
+                nearest = [infinity] * num_nodes
+            for v, d in forward.items():
+                i = ids[v]
+                if d < nearest[i]:
+                    nearest[i] = d
+        if verbose:
+            stopwatch.finished(f"Computing {len(landmarks)} landmarks")
+        return Landmarks(names, landmarks, from_landmark, to_landmark)
+
+    def lower_bound(self, v: V, w: V) -> float:
+        """
+        The best lower bound on the distance from v to w given by the landmarks.
+        Differences between two infinite distances are NaN, and are ignored by the comparisons.
+        """
+        i = self.ids.get(v)
+        j = self.ids.get(w)
+        if i is None or j is None:
+            return 0.0
+        from_landmark, to_landmark = self.from_landmark, self.to_landmark
+        best = 0.0
+        for base in range(0, len(from_landmark), len(self.names)):
+            d = from_landmark[base + j] - from_landmark[base + i]
+            if d > best:
+                best = d
+            d = to_landmark[base + i] - to_landmark[base + j]
+            if d > best:
+                best = d
+        return best
+
+    @staticmethod
+    def for_file(graph: Graph[str], file: str, count: int, verbose: bool = False) -> 'Landmarks[str]':
+        """
+        Returns the landmarks for a graph read from `file`. The landmarks are cached
+        in a snapshot file next to it, which is used as long as the text file doesn't change.
+        """
+        key = source_key(file, SNAPSHOT_KIND, count=count)
+        path = snapshot_file(file, SNAPSHOT_KIND)
+        snapshot = key and Snapshot.read(path, key)
+        if snapshot:
+            return Landmarks(
+                decode_strings(snapshot["names"], snapshot.meta["num_nodes"]),
+                list(snapshot["landmarks"]), snapshot["from_landmark"], snapshot["to_landmark"],
+            )
+        landmarks = Landmarks.compute(graph, count, verbose)
+        if key:
+            Snapshot.write(path, key, {
+                "names": encode_strings(landmarks.names),
+                "landmarks": array('i', landmarks.landmarks),
+                "from_landmark": array('d', landmarks.from_landmark),
+                "to_landmark": array('d', landmarks.to_landmark),
+            }, {"num_nodes": len(landmarks.names)})
+        return landmarks
+
+
+def shortest_distances(graph: Graph[V], source: V, forward: bool = True) -> dict[V, float]:
+    """
+    Dijkstra's algorithm without a goal: returns the distances from `source` to all
+    reachable nodes, or from all nodes that can reach `source` if `forward` is False.
+    """
+    neighbours_of = graph.outgoing_neighbours if forward else graph.incoming_neighbours
+    distances: dict[V, float] = {}
+    heap: list[tuple[float, int, V]] = [(0.0, 0, source)]
+    counter = 1
+    while heap:
+        d, _, node = heapq.heappop(heap)
+        if node in distances:
+            continue
+        distances[node] = d
+        for neighbour, weight in neighbours_of(node):
+            if neighbour not in distances:
+                heapq.heappush(heap, (d + weight, counter, neighbour))
+                counter += 1
+    return distances
+
+
+if __name__ == '__main__':
+    # Usage: python -m graph.landmarks GRAPHFILE COUNT
+    # Computes the landmarks for an adjacency graph, and saves them next to the graph file.
+    from .adjacency_graph import AdjacencyGraph
+    _, file, count = sys.argv
+    landmarks = Landmarks.for_file(AdjacencyGraph(file), file, int(count), verbose=True)
+    print("Landmarks:", ", ".join(str(landmarks.names[i]) for i in landmarks.landmarks))
@@ -0,0 +1,196 @@
+import sys
+from array import array
+from collections.abc import Sequence
+
+from utilities.snapshot import Snapshot
+from utilities.stopwatch import Stopwatch
+
+
+UNKNOWN = 255
+
+class PatternDatabase:
+    """
+    Disjoint additive pattern databases for the N x M sliding puzzle.
+
+    The tiles are partitioned into groups (patterns), for example
+    6-6-3 for the 15-puzzle: tiles 1-6, tiles 7-12, and tiles 13-15.
+    For each pattern, the database stores the minimal number of moves of the
+    pattern tiles needed to bring them to their goal positions,
+    for every possible placement of the pattern tiles.
+    Moves of the other tiles are not counted, so the values for
+    different patterns can be added, and the sum is still admissible.
+
+    The tables are computed by a backward breadth-first search from the goal
+    state, where the other tiles are indistinguishable (see `build_table`).
+    A table is a byte array, indexed by the rank of the placement:
+    the positions (p_0, ..., p_k-1) of the pattern tiles are ranked as a
+    partial permutation, so a lookup takes O(k) time.
+
+    The databases are always built for the traditional goal state
+    (see `SlidingPuzzle.goal_state`).
+    """
+    N: int
+    M: int
+    patterns: list[tuple[int, ...]]
+    tables: list[Sequence[int]]
+    radices: list[list[int]]   # the place value of each position in the rank
+
+    def __init__(self, N: int, M: int, patterns: list[tuple[int, ...]], tables: list[Sequence[int]]):
+        self.N, self.M = N, M  # type: ignore
+        self.patterns = patterns
+        self.tables = tables
+        size = N * M
+        self.radices = [
+            [falling_factorial(size - 1 - i, len(pattern) - 1 - i) for i in range(len(pattern))]
+            for pattern in patterns
+        ]
+
+    @staticmethod
+    def parse_patterns(N: int, M: int, spec: str) -> list[tuple[int, ...]]:
+        """
+        Parses a partition of the tiles, given by the sizes of the patterns.
+        For example, "6-6-3" for the 15-puzzle means the tiles 1-6, 7-12 and 13-15.
+        """
+        try:
+            sizes = [int(k) for k in spec.split('-')]
+        except ValueError:
+            raise ValueError(f"Invalid pattern sizes (e.g., 6-6-3): {spec}")
+        if sum(sizes) != N * M - 1 or min(sizes) < 1:
+            raise ValueError(f"The pattern sizes must be positive and add up to {N * M - 1}.")
+        patterns: list[tuple[int, ...]] = []
+        tile = 1
+        for k in sizes:
+            patterns.append(tuple(range(tile, tile + k)))
+            tile += k
+        return patterns
+
+    @staticmethod
+    def build(N: int, M: int, patterns: list[tuple[int, ...]], verbose: bool = False) -> 'PatternDatabase':
+        """Builds the tables for all patterns."""
+        pdb = PatternDatabase(N, M, patterns, [])
+        for k, pattern in enumerate(patterns):
+            stopwatch = Stopwatch()
+            pdb.tables.append(pdb.build_table(k))
+            if verbose:
+                stopwatch.finished(f"Building the table for tiles {pattern}")
+        return pdb
+
+    def build_table(self, k: int) -> bytes:
+        """
+        Computes the table for pattern k, by a breadth-first search from the goal
+        in the abstract state space: the positions of the pattern tiles plus the blank.
+        Moving the blank to a position without a pattern tile costs nothing,
+        so we first explore everything reachable for free from the current layer,
+        and only then continue with the next layer.
+        """
+        size = self.N * self.M
+        pattern = self.patterns[k]
+        neighbours = neighbour_positions(self.N, self.M)
+        goal_blank = size - 1
+        goal_positions = tuple(tile - 1 for tile in pattern)
+
+        num_ranks = falling_factorial(size, len(pattern))
+        distances = bytearray([UNKNOWN]) * (num_ranks * size)
+        layer: list[tuple[tuple[int, ...], int]] = [(goal_positions, goal_blank)]
+        distance = 0
+        while layer:
+            next_layer: list[tuple[tuple[int, ...], int]] = []
+            while layer:
+                positions, blank = layer.pop()
+                index = self.rank(k, positions) * size + blank
+                if distances[index] != UNKNOWN:
+                    continue
+                distances[index] = distance
+                occupied = {p: j for j, p in enumerate(positions)}
+                for cell in neighbours[blank]:
+                    j = occupied.get(cell)
+                    if j is None:
+                        # The blank swaps with a tile outside the pattern, for free.
+                        layer.append((positions, cell))
+                    else:
+                        moved = positions[:j] + (blank,) + positions[j+1:]
+                        next_layer.append((moved, cell))
+            layer = next_layer
+            distance += 1
+
+        # The value of a placement is the best over all positions of the blank.
+        columns = [distances[blank::size] for blank in range(size)]
+        return bytes(map(min, *columns))
+
+    def rank(self, k: int, positions: Sequence[int]) -> int:
+        """
+        The rank of the positions of the tiles in pattern k, as a partial permutation.
+        A position counts as the number of unused positions before it.
+        """
+        rank = 0
+        used = 0
+        for p, radix in zip(positions, self.radices[k]):
+            rank += (p - (used & ((1 << p) - 1)).bit_count()) * radix
+            used |= 1 << p
+        return rank
+
+    def estimate(self, board: bytes) -> int:
+        """
+        The number of moves needed to bring the board to the traditional goal state,
+        according to the pattern databases. This is the sum of a lookup in each table.
+        """
+        positions = [0] * len(board)
+        for i, tile in enumerate(board):
+            positions[tile] = i
+        cost = 0
+        for k, pattern in enumerate(self.patterns):
+            cost += self.tables[k][self.rank(k, [positions[tile] for tile in pattern])]
+        return cost
+
+    def save(self, file: str):
+        """Saves the tables to a snapshot file."""
+        ok = Snapshot.write(
+            file, self.snapshot_key(self.N, self.M),
+            {f"table{k}": array('B', table) for k, table in enumerate(self.tables)},
+            {"patterns": [list(pattern) for pattern in self.patterns]},
+        )
+        if not ok:
+            raise OSError(f"Could not write the pattern database to {file}")
+
+    @staticmethod
+    def load(file: str, N: int, M: int) -> 'PatternDatabase':
+        """Loads (memory-maps) the tables for an N x M puzzle from a snapshot file."""
+        snapshot = Snapshot.read(file, PatternDatabase.snapshot_key(N, M))
+        if snapshot is None:
+            raise ValueError(f"Not a pattern database for {N}x{M} puzzles: {file}")
+        patterns = [tuple(pattern) for pattern in snapshot.meta["patterns"]]
+        tables = [snapshot[f"table{k}"] for k in range(len(patterns))]
+        return PatternDatabase(N, M, patterns, tables)
+
+    @staticmethod
+    def snapshot_key(N: int, M: int) -> dict[str, object]:
+        return {"kind": "pattern-database", "N": N, "M": M}
+
+
+def neighbour_positions(N: int, M: int) -> list[list[int]]:
+    """Returns the neighbouring positions of each position i = y * M + x in an N x M puzzle."""
+    size = N * M
+    return [
+        [j for j in (i - M, i + M) if 0 <= j < size] +
+        [j for j in (i - 1, i + 1) if 0 <= j < size and j // M == i // M]
+        for i in range(size)
+    ]
+
+
+def falling_factorial(n: int, k: int) -> int:
+    """Returns n * (n-1) * ... * (n-k+1), the number of ways to place k tiles on n positions."""
+    result = 1
+    for i in range(k):
+        result *= n - i
+    return result
+
+
+if __name__ == '__main__':
+    # Usage: python -m graph.pattern_database NxM SIZES [FILE]
+    # For example: python -m graph.pattern_database 4x4 5-5-5 puzzle-4x4.pdb
+    _, size, spec, *maybe_file = sys.argv
+    n, m = map(int, size.split('x'))
+    file = maybe_file[0] if maybe_file else f"puzzle-{size}-{spec}.pdb"
+    pdb = PatternDatabase.build(n, m, PatternDatabase.parse_patterns(n, m, spec), verbose=True)
+    pdb.save(file)
+    print(f"Saved the pattern database to {file}")
@@ -0,0 +1,51 @@
+import sys
+from typing import NamedTuple
+
+from .point import Point
+
+
+class ScenarioQuery(NamedTuple):
+    """
+    One line of a Moving AI scenario file: a start and goal point on a map,
+    together with the length of the optimal path between them.
+    The queries are grouped into buckets of similar difficulty.
+    """
+    bucket: int
+    map: str
+    width: int
+    height: int
+    start: Point
+    goal: Point
+    optimal_length: float
+
+
+def read_scenario(file: str) -> list[ScenarioQuery]:
+    """
+    Reads a scenario (.scen) file from the Moving AI benchmark set.
+    The file starts with a version line, followed by one tab-separated query per line:
+    "bucket  map  width  height  start-x  start-y  goal-x  goal-y  optimal-length".
+    """
+    queries: list[ScenarioQuery] = []
+    with open(file, encoding="utf-8") as IN:
+        for n, line in enumerate(IN, 1):
+            line = line.strip()
+            if not line or line.startswith("version"):
+                continue
+            fields = line.split()
+            try:
+                bucket, map, width, height, sx, sy, gx, gy = fields[:8]
+                optimal_length = float(fields[8])
+                queries.append(ScenarioQuery(
+                    int(bucket), map, int(width), int(height),
+                    Point(int(sx), int(sy)), Point(int(gx), int(gy)),
+                    optimal_length,
+                ))
+            except (ValueError, IndexError):
+                raise ValueError(f"{file}, line {n}: malformed scenario line: {line}")
+    return queries
+
+
+if __name__ == '__main__':
+    _, file = sys.argv
+    for query in read_scenario(file):
+        print(query)
@@ -1,11 +1,14 @@
 import sys
 import random
+from collections import OrderedDict
 from collections.abc import Iterator
 from dataclasses import dataclass
 
 from .edge import Edge
 from .graph import Graph
 from .point import Point, ORIGIN
+from .pattern_database import PatternDatabase
+from .solution_table import SolutionTable
 
 
 SEPARATOR = '/'
@@ -26,8 +29,11 @@ MOVES = [
     Point(0, 1)
 ]
 
+# The maximum number of goal boards that a puzzle keeps distance tables for (see `distance_table`).
+MAX_DISTANCE_TABLES = 4
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, eq=False, slots=True)
 class SlidingPuzzleState:
     """
     A possible state of the N-puzzle.
@@ -35,16 +41,20 @@ class SlidingPuzzleState:
     We represent the tiles as numbers from 0 to N * M.
     The empty tile is represented by 0.
 
-    The array `positions` stores the position of each tile.
+    The byte string `board` stores the tile at each position,
+    where the point p is coded as the index p.y * M + p.x.
+    Bytes are compact, and Python caches their hash values,
+    so states are cheap to store in sets and dictionaries.
 
-    Optional task: try out different representations of states:
-     - coding the positions as indices (sending a point p to p.y * M + p.x)
-     - using an array `tiles` that stores the tile at each point
-     - combinations (more space usage, but better runtime?)
+    A state can also remember its Manhattan distance to a goal state
+    (see `SlidingPuzzle.guess_cost`). This is not part of the state itself,
+    so it is ignored when comparing states.
     """
     N: int
     M: int
-    positions: tuple[Point, ...]
+    board: bytes
+    goal: bytes | None = None   # the board that `manhattan` refers to
+    manhattan: int = 0
 
     @staticmethod
     def parse(s: str) -> 'SlidingPuzzleState':
@@ -55,44 +65,53 @@ class SlidingPuzzleState:
         rows = s.strip(SEPARATOR).split(SEPARATOR)
         N = len(rows)
         M = len(rows[0])
-        positions = [ORIGIN] * (N * M)
-        for y, row in enumerate(rows):
+        board = bytearray()
+        for row in rows:
             if len(row) != M:
                 raise ValueError(f"Row {row} does not have {M} columns.")
-            for x, tile_name in enumerate(row):
-                i = ALL_TILE_NAMES.index(tile_name)
-                if positions[i] != ORIGIN:
+            for tile_name in row:
+                i = ALL_TILE_NAMES.find(tile_name)
+                if not 0 <= i < N * M:
+                    raise ValueError(f"Invalid tile: {tile_name}")
+                if i in board:
                     raise ValueError(f"Duplicate tiles: {tile_name}")
-                positions[i] = Point(x, y)
-        return SlidingPuzzleState(N, M, tuple(positions))
-
-    def swap(self, i: int, j: int) -> 'SlidingPuzzleState':
-        """Returns the state given by swapping the tiles `i` and `j`."""
-        if i > j:
-            i, j = j, i
-        assert 0 <= i < j < len(self.positions)
-        return SlidingPuzzleState(
-            self.N, self.M,
-            self.positions[:i] +
-            (self.positions[j],) +
-            self.positions[i+1:j] +
-            (self.positions[i],) +
-            self.positions[j+1:]
-        )
+                board.append(i)
+        return SlidingPuzzleState(N, M, bytes(board))
+
+    def swap_cells(self, i: int, j: int) -> 'SlidingPuzzleState':
+        """Returns the state given by swapping the tiles at the positions `i` and `j`."""
+        board = bytearray(self.board)
+        board[i], board[j] = board[j], board[i]
+        return SlidingPuzzleState(self.N, self.M, bytes(board))
 
     def shuffled(self) -> 'SlidingPuzzleState':
         """Returns a randomly shuffled state."""
         return SlidingPuzzleState(
             self.N, self.M,
-            tuple(random.sample(self.positions, len(self.positions)))
+            bytes(random.sample(self.board, len(self.board)))
         )
 
+    @property
+    def positions(self) -> tuple[Point, ...]:
+        """The position of each tile."""
+        positions = [ORIGIN] * len(self.board)
+        for i, tile in enumerate(self.board):
+            positions[tile] = Point(i % self.M, i // self.M)
+        return tuple(positions)
+
     def tiles(self) -> tuple[tuple[int, ...], ...]:
         """Returns the NxM-matrix of tiles of this state."""
-        tiles = [[0] * self.M for _ in range(self.N)]
-        for i, p in enumerate(self.positions):
-            tiles[p.y][p.x] = i
-        return tuple(tuple(t) for t in tiles)
+        M = self.M
+        return tuple(
+            tuple(self.board[y * M : (y + 1) * M])
+            for y in range(self.N)
+        )
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SlidingPuzzleState) and self.board == other.board and self.M == other.M
+
+    def __hash__(self) -> int:
+        return hash(self.board)
 
     def __str__(self):
         return SEPARATOR + SEPARATOR.join(
@@ -113,8 +132,17 @@ class SlidingPuzzle(Graph[SlidingPuzzleState]):
     """
     N: int
     M: int
+    moves: list[list[int]]                  # the neighbouring positions of each position
+    distance_tables: OrderedDict[bytes, list[int]]  # see `distance_table`
+    pattern_database: PatternDatabase | None
+    solution_table: SolutionTable | None
+    relabellings: dict[bytes, bytes]        # see `relabelling`
 
     def __init__(self, graph: str|tuple[int,int]|None = None):
+        self.distance_tables = OrderedDict()
+        self.pattern_database = None
+        self.solution_table = None
+        self.relabellings = {}
         if graph:
             self.init(graph)
 
@@ -131,6 +159,30 @@ class SlidingPuzzle(Graph[SlidingPuzzleState]):
         if m * n > 40: raise ValueError("We only support up to 40 tiles.")
         self.N, self.M = n, m  # type: ignore
         # (Reason for type:ignore: pylance complains that N and M are upper-case)
+        self.moves = [
+            [
+                p.y * m + p.x
+                for move in MOVES
+                if self.is_valid_point(p := Point(i % m, i // m).subtract(move))
+            ]
+            for i in range(n * m)
+        ]
+        self.distance_tables = OrderedDict()
+        self.pattern_database = None
+        self.solution_table = None
+        self.relabellings = {}
+
+    def use_pattern_database(self, pdb: PatternDatabase):
+        """Makes `guess_cost` use the given pattern databases, which must be for this puzzle size."""
+        if (pdb.N, pdb.M) != (self.N, self.M):
+            raise ValueError(f"The pattern database is for {pdb.N}x{pdb.M} puzzles, not {self.N}x{self.M}.")
+        self.pattern_database = pdb
+
+    def use_solution_table(self, table: SolutionTable):
+        """Makes `guess_cost` exact, by looking up the distances in the given solution table."""
+        if (table.N, table.M) != (self.N, self.M):
+            raise ValueError(f"The solution table is for {table.N}x{table.M} puzzles, not {self.N}x{self.M}.")
+        self.solution_table = table
 
     def nodes(self) -> frozenset[SlidingPuzzleState]:
         """
@@ -141,15 +193,35 @@ class SlidingPuzzle(Graph[SlidingPuzzleState]):
         raise NotImplementedError("too expensive!")
 
     def outgoing_edges(self, v: SlidingPuzzleState) -> list[Edge[SlidingPuzzleState]]:
-        empty_pos = v.positions[0]
-        edges: list[Edge[SlidingPuzzleState]] = []
-        for move in MOVES:
-            p = empty_pos.subtract(move)
-            if self.is_valid_point(p):
-                i = v.positions.index(p)
-                new_state = v.swap(0, i)
-                edges.append(Edge(v, new_state))
-        return edges
+        return [Edge(v, new_state) for new_state, _ in self.outgoing_neighbours(v)]
+
+    def outgoing_neighbours(self, v: SlidingPuzzleState) -> list[tuple[SlidingPuzzleState, float]]:
+        """
+        The empty tile can swap places with each of its neighbours.
+        If `v` knows its Manhattan distance to a goal,
+        the distance of each new state is updated by just looking at the moved tile.
+        """
+        board = v.board
+        empty = board.index(0)
+        distances = self.distance_tables.get(v.goal) if v.goal is not None else None
+        neighbours: list[tuple[SlidingPuzzleState, float]] = []
+        for i in self.moves[empty]:
+            new_board = bytearray(board)
+            tile = new_board[empty] = board[i]
+            new_board[i] = 0
+            if distances is None:
+                new_state = SlidingPuzzleState(v.N, v.M, bytes(new_board))
+            else:
+                # The tile moves from position i to the previously empty position.
+                k = tile * len(board)
+                manhattan = v.manhattan + distances[k + empty] - distances[k + i]
+                new_state = SlidingPuzzleState(v.N, v.M, bytes(new_board), v.goal, manhattan)
+            neighbours.append((new_state, 1))
+        return neighbours
+
+    def incoming_neighbours(self, v: SlidingPuzzleState) -> list[tuple[SlidingPuzzleState, float]]:
+        # Every move can be undone.
+        return self.outgoing_neighbours(v)
 
     def is_weighted(self) -> bool:
         return False
@@ -164,24 +236,105 @@ class SlidingPuzzle(Graph[SlidingPuzzleState]):
         as the sum of the Manhattan displacement for each tile.
         The Manhattan displacement is the Manhattan distance from where
         the tile is currently to its desired location.
+
+        The first time this is called for a state, the distance is remembered
+        in the state, and `outgoing_neighbours` updates it incrementally from then on.
+        This needs a distance table for the goal board (see `distance_table`).
+        Only states without a goal get one: bidirectional search also guesses the cost
+        from its start to every node of the backward search, and those guesses
+        are computed directly instead of building a table for every node.
+
+        If we have pattern databases (see `use_pattern_database`), we use them instead,
+        because they give much better guesses. They are built for the traditional goal
+        state, but they can be used for any goal with the empty tile in the same position,
+        by renaming the tiles (see `relabelling`).
+        And if we have a solution table (see `use_solution_table`), the guess is exact.
         """
+        if self.solution_table is not None:
+            distance = self.solution_table.distance(v.board, w.board)
+            return float("inf") if distance is None else distance
+        pdb = self.pattern_database
+        if pdb is not None and w.board[-1] == 0:
+            return pdb.estimate(v.board.translate(self.relabelling(w.board)))
+        if v.goal is not None and v.goal == w.board:
+            return v.manhattan
+        if v.goal is not None:
+            return manhattan_distance(v.board, w.board, self.M)
+        distances = self.distance_table(w.board)
+        size = len(v.board)
         cost = 0
-        for i in range(1, self.N * self.M):
-            displacement = v.positions[i].subtract(w.positions[i])
-            cost += abs(displacement.x) + abs(displacement.y)
+        for i, tile in enumerate(v.board):
+            if tile:
+                cost += distances[tile * size + i]
+        if v.goal is None:
+            # This is only a cache, so it is safe to modify the frozen state.
+            object.__setattr__(v, "goal", w.board)
+            object.__setattr__(v, "manhattan", cost)
         return cost
 
+    def distance_table(self, goal: bytes) -> list[int]:
+        """
+        Returns a table of the Manhattan distance from each position to the goal position
+        of each tile: the distance for tile t at position i is at index t * N * M + i.
+        The tables of the most recently used goal boards are kept in `distance_tables`,
+        and the least recently used one is forgotten when there are more than `MAX_DISTANCE_TABLES`.
+        """
+        tables = self.distance_tables
+        # (pop and reinsert instead of move_to_end, which fails if another server thread has just evicted it)
+        table = tables.pop(goal, None)
+        if table is None:
+            M, size = self.M, len(goal)
+            table = [0] * (size * size)
+            for j, tile in enumerate(goal):
+                for i in range(size):
+                    table[tile * size + i] = abs(i % M - j % M) + abs(i // M - j // M)
+        tables[goal] = table
+        if len(tables) > MAX_DISTANCE_TABLES:
+            tables.popitem(last=False)
+        return table
+
+    def unreachable_reason(self, v: SlidingPuzzleState, w: SlidingPuzzleState) -> str | None:
+        """
+        Every move swaps the empty tile with a neighbour. This changes the parity of the
+        permutation of the tiles, and the parity of the Manhattan distance of the empty tile
+        to its goal position. So these parities must be the same for the goal to be reachable.
+        For puzzles with at least two rows and two columns, this is also sufficient.
+        With just one row (or column), the tiles can't pass each other.
+        """
+        if (v.N, v.M) != (w.N, w.M):
+            return f"{v} and {w} have different sizes"
+        if v.N == 1 or v.M == 1:
+            if v.board.replace(b"\0", b"") != w.board.replace(b"\0", b""):
+                return "the tiles are in a different order, and they can't pass each other in a single line"
+            return None
+        i, j = v.board.index(0), w.board.index(0)
+        empty_distance = abs(i % v.M - j % v.M) + abs(i // v.M - j // v.M)
+        if (permutation_parity(v.board) ^ permutation_parity(w.board)) != empty_distance % 2:
+            return "the permutation parities don't match (half of all states are not reachable)"
+        return None
+
+    def relabelling(self, goal: bytes) -> bytes:
+        """
+        Returns a translation table (for `bytes.translate`) that renames each tile
+        to the tile at the same position in the traditional goal state.
+        Renaming the tiles doesn't change the distance between two states,
+        so the distance to `goal` is the distance of the renamed state to the traditional goal.
+        """
+        table = self.relabellings.get(goal)
+        if table is None:
+            traditional = self.goal_state().board
+            renamed = bytearray(range(256))
+            for i, tile in enumerate(goal):
+                renamed[tile] = traditional[i]
+            table = self.relabellings[goal] = bytes(renamed)
+        return table
+
     def goal_state(self) -> SlidingPuzzleState:
         """
         Return the traditional goal state.
         The empty tile is in the bottom right corner.
         """
-        return SlidingPuzzleState(self.N, self.M, tuple([
-            Point(self.N-1, self.M-1)
-        ] + [
-            Point(i % self.M, i // self.M)
-            for i in range(self.N * self.M - 1)
-        ]))
+        return SlidingPuzzleState(self.N, self.M, bytes(range(1, self.N * self.M)) + bytes(1))
 
     def parse_node(self, s: str):
         return SlidingPuzzleState.parse(s)
@@ -205,6 +358,35 @@ class SlidingPuzzle(Graph[SlidingPuzzleState]):
         )
 
 
+def manhattan_distance(board: bytes, goal: bytes, M: int) -> int:
+    """The sum of the Manhattan distances of the tiles to their positions in `goal` (for boards with M columns)."""
+    goal_positions = [0] * len(goal)
+    for j, tile in enumerate(goal):
+        goal_positions[tile] = j
+    cost = 0
+    for i, tile in enumerate(board):
+        if tile:
+            j = goal_positions[tile]
+            cost += abs(i % M - j % M) + abs(i // M - j // M)
+    return cost
+
+
+def permutation_parity(board: bytes) -> int:
+    """
+    Returns 0 for even permutations and 1 for odd ones.
+    A permutation with c cycles is a product of len(board) - c transpositions.
+    """
+    seen = bytearray(len(board))
+    cycles = 0
+    for i in range(len(board)):
+        if not seen[i]:
+            cycles += 1
+            while not seen[i]:
+                seen[i] = 1
+                i = board[i]
+    return (len(board) - cycles) % 2
+
+
 if __name__ == '__main__':
     (_, size) = sys.argv
     puzzle = SlidingPuzzle(size)
@@ -0,0 +1,153 @@
+import sys
+from array import array
+from collections.abc import Sequence
+from math import factorial
+
+from utilities.snapshot import Snapshot
+from utilities.stopwatch import Stopwatch
+from .pattern_database import neighbour_positions
+
+
+UNREACHABLE = 255
+
+# Larger puzzles have too many states: 4 x 3 already has 12! = 479 million.
+MAX_TILES = 9
+
+class SolutionTable:
+    """
+    The exact distance from every state to the goal, for small sliding puzzles
+    (up to 3 x 3). With this table, the optimal solution of a puzzle can be found
+    by just walking down the distances (see `search.table_walk.TableWalk`).
+
+    There is one table for each position of the empty tile in the goal.
+    The goal for empty position c has the tiles 1, 2, ... in order on all other positions,
+    so the goal for the last position is the traditional goal state.
+    Any other goal is handled by renaming the tiles (see `relabelling`).
+
+    A table stores one byte for every permutation of the tiles, indexed by its
+    rank (the Lehmer code). Half of the permutations are not reachable
+    from the goal; they have the value UNREACHABLE.
+    The tables are computed by breadth-first search backwards from each goal.
+    """
+    N: int
+    M: int
+    goals: list[bytes]                 # the goal for each position of the empty tile
+    tables: list[Sequence[int]]        # the distance table for each goal
+    radices: list[int]                 # the place value of each position in the rank
+    relabellings: dict[bytes, bytes]   # see `relabelling`
+
+    def __init__(self, N: int, M: int, tables: list[Sequence[int]]):
+        size = N * M
+        if size > MAX_TILES:
+            raise ValueError(f"Solution tables are only supported up to {MAX_TILES} tiles.")
+        self.N, self.M = N, M  # type: ignore
+        self.tables = tables
+        self.radices = [factorial(size - 1 - i) for i in range(size)]
+        self.relabellings = {}
+        self.goals = []
+        for c in range(size):
+            tiles = list(range(1, size))
+            tiles.insert(c, 0)
+            self.goals.append(bytes(tiles))
+
+    @staticmethod
+    def build(N: int, M: int, verbose: bool = False) -> 'SolutionTable':
+        """Builds the tables for all positions of the empty tile."""
+        table = SolutionTable(N, M, [])
+        for goal in table.goals:
+            stopwatch = Stopwatch()
+            table.tables.append(table.build_table(goal))
+            if verbose:
+                stopwatch.finished(f"Building the table for empty position {goal.index(0)}")
+        return table
+
+    def build_table(self, goal: bytes) -> bytes:
+        """Computes the distance from every state to `goal`, by breadth-first search."""
+        neighbours = neighbour_positions(self.N, self.M)
+        rank = self.rank
+        distances = bytearray([UNREACHABLE]) * factorial(len(goal))
+        distances[rank(goal)] = 0
+        layer = [goal]
+        distance = 0
+        while layer:
+            distance += 1
+            next_layer: list[bytes] = []
+            for board in layer:
+                empty = board.index(0)
+                for i in neighbours[empty]:
+                    new_board = bytearray(board)
+                    new_board[empty] = board[i]
+                    new_board[i] = 0
+                    r = rank(new_board)
+                    if distances[r] == UNREACHABLE:
+                        distances[r] = distance
+                        next_layer.append(bytes(new_board))
+            layer = next_layer
+        return bytes(distances)
+
+    def rank(self, board: Sequence[int]) -> int:
+        """
+        The rank of a board as a permutation (its Lehmer code): each tile counts
+        as the number of smaller tiles that haven't been used yet.
+        """
+        rank = 0
+        used = 0
+        for tile, radix in zip(board, self.radices):
+            rank += (tile - (used & ((1 << tile) - 1)).bit_count()) * radix
+            used |= 1 << tile
+        return rank
+
+    def relabelling(self, goal: bytes) -> bytes:
+        """
+        Returns a translation table (for `bytes.translate`) that renames each tile in `goal`
+        to the tile at the same position in the table's goal with the same empty position.
+        Renaming the tiles doesn't change the distance between two states.
+        """
+        table = self.relabellings.get(goal)
+        if table is None:
+            renamed = bytearray(range(256))
+            for i, tile in enumerate(self.goals[goal.index(0)]):
+                renamed[goal[i]] = tile
+            table = self.relabellings[goal] = bytes(renamed)
+        return table
+
+    def distance(self, board: bytes, goal: bytes) -> int | None:
+        """
+        The minimal number of moves to get from `board` to `goal`,
+        or None if `goal` is not reachable from `board`.
+        """
+        distance = self.tables[goal.index(0)][self.rank(board.translate(self.relabelling(goal)))]
+        return None if distance == UNREACHABLE else distance
+
+    def save(self, file: str):
+        """Saves the tables to a snapshot file."""
+        ok = Snapshot.write(
+            file, self.snapshot_key(self.N, self.M),
+            {f"table{c}": array('B', table) for c, table in enumerate(self.tables)},
+            {},
+        )
+        if not ok:
+            raise OSError(f"Could not write the solution table to {file}")
+
+    @staticmethod
+    def load(file: str, N: int, M: int) -> 'SolutionTable':
+        """Loads (memory-maps) the tables for an N x M puzzle from a snapshot file."""
+        snapshot = Snapshot.read(file, SolutionTable.snapshot_key(N, M))
+        if snapshot is None:
+            raise ValueError(f"Not a solution table for {N}x{M} puzzles: {file}")
+        return SolutionTable(N, M, [snapshot[f"table{c}"] for c in range(N * M)])
+
+    @staticmethod
+    def snapshot_key(N: int, M: int) -> dict[str, object]:
+        return {"kind": "solution-table", "N": N, "M": M}
+
+
+if __name__ == '__main__':
+    # Usage: python -m graph.solution_table NxM [FILE]
+    # For example: python -m graph.solution_table 3x3 puzzle-3x3.table
+    _, size, *maybe_file = sys.argv
+    n, m = map(int, size.split('x'))
+    file = maybe_file[0] if maybe_file else f"puzzle-{size}.table"
+    table = SolutionTable.build(n, m, verbose=True)
+    table.save(file)
+    print(f"Saved the solution table to {file}")
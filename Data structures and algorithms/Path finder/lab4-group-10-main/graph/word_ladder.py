@@ -4,6 +4,7 @@ import math
 
 from .edge import Edge
 from .graph import Graph
+from .components import Components
 
 
 # Python does not have a separate type of characters.
@@ -17,13 +18,23 @@ class WordLadder(Graph[Word]):
 
     The class does not store the full graph in memory, just a dictionary of words.
     The edges are then computed on demand.
+
+    To find the neighbours of a word quickly, every word is indexed under
+    its wildcard patterns: "glada" is in the buckets "*lada", "g*ada", ..., "glad*".
+    The neighbours of a word are then the other words in its buckets.
+    The buckets list the words in the order they were added,
+    so the edges are always returned in the same order.
     """
     dictionary: set[Word]
     alphabet: set[Char]
+    buckets: dict[str, list[Word]]   # wildcard pattern -> the words matching it
+    components: Components[Word] | None  # computed on demand
 
     def __init__(self, graph: str|None = None):
         self.dictionary = set()
         self.alphabet = set()
+        self.buckets = {}
+        self.components = None
         if graph:
             self.init(graph)
 
@@ -45,8 +56,18 @@ class WordLadder(Graph[Word]):
         """
         if word.isalpha():
             word = word.lower()
+            if word in self.dictionary:
+                return
             self.dictionary.add(word)
             self.alphabet.update(word)
+            buckets = self.buckets
+            for pattern in wildcard_patterns(word):
+                bucket = buckets.get(pattern)
+                if bucket is None:
+                    buckets[pattern] = [word]
+                else:
+                    bucket.append(word)
+            self.components = None
 
     def nodes(self) -> frozenset[Word]:
         return frozenset(self.dictionary)
@@ -55,32 +76,30 @@ class WordLadder(Graph[Word]):
         """
         Returns a list of the graph edges that originate from `word`.
         """
+        return [Edge(v, new_word) for new_word, _ in self.outgoing_neighbours(v)]
+
+    def outgoing_neighbours(self, v: Word) -> list[tuple[Word, float]]:
         #---------- TASK 2: Outgoing edges, Wordladder -----------------------#
-        edges = []
-        word_length = len(v)
-
-        for i in range(word_length):
-            for char in self.alphabet:
-                # No substitution => skip
-                if char == v[i]:
-                    continue
-                
-                # Create a new word by substituting the character
-                new_word = v[:i] + char + v[i + 1:]
-
-                # If new word is in the dictionary, add it as an edge 
-                if new_word in self.dictionary:
-                    edges.append(Edge(v, new_word))
-        
-        return edges
+        # The words that differ from v in exactly position i are in the bucket
+        # for the pattern with a wildcard at position i (together with v itself).
+        # Two different buckets of v never have any other word in common.
+        neighbours: list[tuple[Word, float]] = []
+        for pattern in wildcard_patterns(v):
+            for new_word in self.buckets.get(pattern, ()):
+                if new_word != v:
+                    neighbours.append((new_word, 1))
+        return neighbours
 
         # Important note:
-        # `self.alphabet` and `self.dictionary` use Python's built-in `set` type.
-        # This is very efficient but iterating over the sets is unpredictable,
-        # which might lead to some variations in the results.
-        # See the lab description for more information.
+        # Iterating over `self.alphabet` or `self.dictionary` would be unpredictable,
+        # because they use Python's built-in `set` type.
+        # The buckets are lists, so the order of the edges is always the same.
         #---------- END TASK 2 -----------------------------------------------#
 
+    def incoming_neighbours(self, v: Word) -> list[tuple[Word, float]]:
+        # The graph is undirected.
+        return self.outgoing_neighbours(v)
+
     def is_weighted(self) -> bool:
         return False
 
@@ -104,6 +123,22 @@ class WordLadder(Graph[Word]):
         return differences
         #---------- END TASK 4 -----------------------------------------------#
 
+    def unreachable_reason(self, v: Word, w: Word) -> str | None:
+        """
+        Words of different lengths are never connected. Otherwise, the connected
+        components of the graph are computed the first time this is called.
+        """
+        if len(v) != len(w):
+            return f"{v} and {w} have different lengths"
+        if self.components is None:
+            self.prepare_queries()
+        assert self.components is not None
+        return self.components.unreachable_reason(v, w)
+
+    def prepare_queries(self):
+        if self.components is None:
+            self.components = Components(self, directed=False)
+
     def parse_node(self, s: str) -> Word:
         word = s.lower()
         if word not in self.dictionary:
@@ -120,8 +155,12 @@ class WordLadder(Graph[Word]):
         )
 
 
+def wildcard_patterns(word: Word) -> list[str]:
+    """Returns the patterns of a word with one character replaced by the wildcard '*'."""
+    return [word[:i] + '*' + word[i+1:] for i in range(len(word))]
+
+
 if __name__ == '__main__':
     _, dictionary = sys.argv
     ladder = WordLadder(dictionary)
     print(ladder)
-
@@ -7,21 +7,46 @@ it creates different graphs and runs different search algorithms.
 """
 
 import sys
-from typing import Any
+import json
+from contextlib import nullcontext
+from typing import Any, TextIO
 
 from graph.graph import Graph, V
 from graph.adjacency_graph import AdjacencyGraph
+from graph.compact_adjacency_graph import CompactAdjacencyGraph
 from graph.sliding_puzzle import SlidingPuzzle
 from graph.grid_graph import GridGraph
+from graph.point import Point
 from graph.word_ladder import WordLadder
+from graph.scenario import read_scenario
+from graph.pattern_database import PatternDatabase
+from graph.solution_table import SolutionTable
+from graph.landmarks import Landmarks
+from graph.contraction_hierarchy import ContractionHierarchy
+from graph.grid_abstraction import GridAbstraction
 
 from search.searcher import Searcher
 from search.random_walk import RandomWalk
 from search.dijkstra import Dijkstra
 from search.a_star import AStar
+from search.bidirectional import BidirectionalDijkstra, BidirectionalAStar
+from search.indexed_dijkstra import IndexedDijkstra, IndexedAStar, PairingHeapDijkstra, PairingHeapAStar
+from search.fast_dijkstra import FastDijkstra, FastAStar
+from search.jump_point_search import JumpPointSearch
+from search.ida_star import IDAStar
+from search.table_walk import TableWalk
+from search.breadth_first import BreadthFirst, BidirectionalBreadthFirst
+from search.contraction_hierarchy_search import ContractionHierarchySearch
+from search.hpa_star import HPAStar
+from search.anytime_a_star import AnytimeAStar
+from search.shortest_path_tree import distance_matrix
+from search.batch import answer_queries_parallel
+from search.query_cache import QueryCache
+from search.instrumentation import Instrumentation
 
 from utilities.command_parser import CommandParser
 from utilities.stopwatch import Stopwatch
+from utilities.query_file import read_queries, read_node_list
 
 
 # Settings for showing the solution - you can change these if you want.
@@ -36,10 +61,44 @@ searchers: dict[str, type[Searcher[Any]]] = {
     "Random": RandomWalk,
     "Dijkstra": Dijkstra,
     "AStar": AStar,
+    "BidirectionalDijkstra": BidirectionalDijkstra,
+    "BidirectionalAStar": BidirectionalAStar,
+    "IndexedDijkstra": IndexedDijkstra,
+    "IndexedAStar": IndexedAStar,
+    "PairingHeapDijkstra": PairingHeapDijkstra,
+    "PairingHeapAStar": PairingHeapAStar,
+    "FastDijkstra": FastDijkstra,
+    "FastAStar": FastAStar,
+    "JumpPointSearch": JumpPointSearch,
+    "IDAStar": IDAStar,
+    "TableWalk": TableWalk,
+    "BreadthFirst": BreadthFirst,
+    "BidirectionalBreadthFirst": BidirectionalBreadthFirst,
+    "ContractionHierarchy": ContractionHierarchySearch,
+    "HPAStar": HPAStar,
+    "AnytimeAStar": AnytimeAStar,
+}
+
+# On unweighted graphs, breadth-first search finds the same paths as Dijkstra's algorithm,
+# but much faster. So these algorithms are replaced automatically.
+unweighted_searchers: dict[type[Searcher[Any]], type[Searcher[Any]]] = {
+    Dijkstra: BreadthFirst,
+    IndexedDijkstra: BreadthFirst,
+    PairingHeapDijkstra: BreadthFirst,
+    FastDijkstra: BreadthFirst,
+    BidirectionalDijkstra: BidirectionalBreadthFirst,
+}
+
+# In batch mode, queries with the same start share one shortest path tree
+# instead of running these algorithms once per query.
+tree_searchers: set[type[Searcher[Any]]] = {
+    Dijkstra, IndexedDijkstra, PairingHeapDijkstra, FastDijkstra, BidirectionalDijkstra,
+    BreadthFirst, BidirectionalBreadthFirst,
 }
 
 graph_types: dict[str, type[Graph[Any]]] = {
     "AdjacencyGraph": AdjacencyGraph,
+    "CompactAdjacencyGraph": CompactAdjacencyGraph,
     "GridGraph": GridGraph,
     "SlidingPuzzle": SlidingPuzzle,
     "WordLadder": WordLadder,
@@ -54,6 +113,39 @@ parser.add_argument("--graph", "-g", required=True,
                     help="the graph itself")
 parser.add_argument("--queries", "-q", nargs="*",
                     help="list of alternating start and goal nodes")
+parser.add_argument("--scenario", "-s",
+                    help="run all queries of a Moving AI scenario file (only for GridGraph)")
+parser.add_argument("--batch", "-b",
+                    help="run all queries from this file (or - for standard input), one start and goal per line")
+parser.add_argument("--workers", "-w", type=int, default=1,
+                    help="run the --batch queries in this many parallel processes")
+parser.add_argument("--cache", "-c", type=int,
+                    help="remember the results of this many queries, and reuse recent shortest path trees")
+parser.add_argument("--stats", action="store_true",
+                    help="count queue operations, expansions and heuristic calls, and print the counters")
+parser.add_argument("--stats-json",
+                    help="count like --stats, but write the counters as JSON lines (one per query) to this file")
+parser.add_argument("--trace",
+                    help="write a line for every expanded node to this file")
+parser.add_argument("--sources",
+                    help="print the distance matrix from the nodes in this file (one per line) to the --targets")
+parser.add_argument("--targets",
+                    help="the targets of the distance matrix (default: the same as the --sources)")
+parser.add_argument("--pattern-database", "-p",
+                    help="use pattern databases from this file as heuristic (only for SlidingPuzzle)")
+parser.add_argument("--solution-table",
+                    help="use the exact distances from this file (only for SlidingPuzzle up to 3x3)")
+parser.add_argument("--landmarks", "-l", type=int,
+                    help="use this many landmarks as heuristic (only for AdjacencyGraph and CompactAdjacencyGraph)")
+parser.add_argument("--epsilon", type=float,
+                    help=f"the initial inflation factor of the heuristic (only for AnytimeAStar, default {AnytimeAStar.epsilon})")
+parser.add_argument("--bound", type=float,
+                    help="stop when the path is proven to cost at most this many times the optimum "
+                         f"(only for AnytimeAStar, default {AnytimeAStar.target_bound})")
+parser.add_argument("--time-budget", type=float,
+                    help="stop after this many seconds per query, with the best path so far (only for AnytimeAStar)")
+parser.add_argument("--iteration-budget", type=int,
+                    help="stop after this many iterations per query, with the best path so far (only for AnytimeAStar)")
 
 
 def main():
@@ -65,19 +157,83 @@ def main():
 
     algorithm: type[Searcher[Any]]
     algorithm = searchers[options.algorithm]
+    if not graph.is_weighted() and algorithm in unweighted_searchers:
+        algorithm = unweighted_searchers[algorithm]
+        print(f"The graph is unweighted, so we use {algorithm.__name__} instead of {options.algorithm}.")
 
-    if not options.queries:
-        search_interactive(algorithm, graph)
+    if options.pattern_database:
+        if not isinstance(graph, SlidingPuzzle):
+            raise ValueError("Pattern databases can only be used with SlidingPuzzle")
+        graph.use_pattern_database(PatternDatabase.load(options.pattern_database, graph.N, graph.M))
+    if options.solution_table:
+        if not isinstance(graph, SlidingPuzzle):
+            raise ValueError("Solution tables can only be used with SlidingPuzzle")
+        graph.use_solution_table(SolutionTable.load(options.solution_table, graph.N, graph.M))
+    if options.landmarks:
+        if not isinstance(graph, (AdjacencyGraph, CompactAdjacencyGraph)):
+            raise ValueError("Landmarks can only be used with AdjacencyGraph and CompactAdjacencyGraph")
+        graph.use_landmarks(Landmarks.for_file(graph, options.graph, options.landmarks, verbose=True))
+    if algorithm is ContractionHierarchySearch:
+        # The hierarchy is built the first time, and then read from a snapshot file.
+        if not isinstance(graph, (AdjacencyGraph, CompactAdjacencyGraph)):
+            raise ValueError("Contraction hierarchies can only be used with AdjacencyGraph and CompactAdjacencyGraph")
+        graph.use_contraction_hierarchy(ContractionHierarchy.for_file(graph, options.graph, verbose=True))
+    anytime_options = (options.epsilon, options.bound, options.time_budget, options.iteration_budget)
+    if any(option is not None for option in anytime_options):
+        if algorithm is not AnytimeAStar:
+            raise ValueError("--epsilon, --bound and the budgets can only be used with AnytimeAStar")
+        if options.epsilon is not None and options.epsilon < 1:
+            raise ValueError("The inflation factor --epsilon must be at least 1")
+        if options.bound is not None and options.bound < 1:
+            raise ValueError("The suboptimality --bound must be at least 1")
+        algorithm = AnytimeAStar.with_settings(
+            epsilon=options.epsilon, target_bound=options.bound,
+            time_budget=options.time_budget, iteration_budget=options.iteration_budget,
+        )
+    if algorithm is HPAStar:
+        # The abstraction is built the first time, and then read from a snapshot file.
+        if not isinstance(graph, GridGraph):
+            raise ValueError("HPA* can only be used with GridGraph")
+        graph.use_abstraction(GridAbstraction.for_file(graph, options.graph, verbose=True))
+
+    if (options.stats or options.stats_json or options.trace) and (options.scenario or options.batch or options.sources):
+        raise ValueError("--stats, --stats-json and --trace can only be used for single queries, "
+                         "not with --scenario, --batch or --sources")
+    if options.scenario:
+        if not isinstance(graph, GridGraph):
+            raise ValueError("Scenario files can only be used with GridGraph")
+        run_scenario(algorithm, graph, options.scenario)
+    elif options.batch:
+        run_batch(algorithm, graph, options.batch, options.workers)
+    elif options.sources:
+        print_distance_matrix(graph, options.sources, options.targets or options.sources)
     else:
-        if len(options.queries) % 2 != 0:
-            raise ValueError("There must be an even number of query nodes")
-        for i in range(0, len(options.queries), 2):
-            start = options.queries[i]
-            goal = options.queries[i+1]
-            search_once(algorithm, graph, start, goal)
+        cache = QueryCache(graph, tree_searchers, options.cache) if options.cache else None
+        instrumentation = statistics_file = None
+        if options.stats or options.stats_json or options.trace:
+            instrumentation = Instrumentation(open(options.trace, "w", encoding="utf-8") if options.trace else None)
+        if options.stats_json:
+            statistics_file = open(options.stats_json, "w", encoding="utf-8")
+        if not options.queries:
+            search_interactive(algorithm, graph, cache, instrumentation, statistics_file)
+        else:
+            if len(options.queries) % 2 != 0:
+                raise ValueError("There must be an even number of query nodes")
+            for i in range(0, len(options.queries), 2):
+                start = options.queries[i]
+                goal = options.queries[i+1]
+                search_once(algorithm, graph, start, goal, cache, instrumentation, statistics_file)
+        if cache:
+            print(cache.statistics())
+        for file in (instrumentation and instrumentation.trace, statistics_file):
+            if file:
+                file.close()
 
 
-def search_interactive(algorithm: type[Searcher[V]], graph: Graph[V]):
+def search_interactive(
+        algorithm: type[Searcher[V]], graph: Graph[V], cache: QueryCache[V] | None = None,
+        instrumentation: Instrumentation | None = None, statistics_file: TextIO | None = None,
+):
     print(graph)
     print()
     while True:
@@ -90,11 +246,19 @@ def search_interactive(algorithm: type[Searcher[V]], graph: Graph[V]):
             break
         goal = input("Goal: ")
         print()
-        search_once(algorithm, graph, start, goal)
+        search_once(algorithm, graph, start, goal, cache, instrumentation, statistics_file)
     print("Bye bye, hope to see you again soon!")
 
 
-def search_once(algorithm: type[Searcher[V]], graph: Graph[V], start: str, goal: str):
+def search_once(
+        algorithm: type[Searcher[V]], graph: Graph[V], start: str, goal: str, cache: QueryCache[V] | None = None,
+        instrumentation: Instrumentation | None = None, statistics_file: TextIO | None = None,
+):
+    """
+    Searches for a path from `start` to `goal`, and prints the result.
+    With an instrumentation, the counters are printed too,
+    or written as a JSON line to `statistics_file` if it is given.
+    """
     try:
         start_node = graph.parse_node(start.strip())
         goal_node = graph.parse_node(goal.strip())
@@ -105,11 +269,144 @@ def search_once(algorithm: type[Searcher[V]], graph: Graph[V], start: str, goal:
         return
 
     print(f"Searching for a path from {start_node} to {goal_node}...")
+    if instrumentation:
+        # Compute the cached reachability information first, so that it isn't counted.
+        graph.prepare_queries()
+        instrumentation.reset()
+        if instrumentation.trace:
+            instrumentation.trace.write(f"# {start_node} -> {goal_node}\n")
     stopwatch = Stopwatch()
-    result = algorithm(graph, start_node, goal_node).search()
+    with instrumentation.attached(graph) if instrumentation else nullcontext():
+        if cache is not None:
+            result = cache.search(algorithm, start_node, goal_node)
+        else:
+            searcher = algorithm(graph, start_node, goal_node)
+            # Don't bother searching if we already know that there is no path.
+            reason = graph.unreachable_reason(start_node, goal_node)
+            result = searcher.failure(0, reason) if reason else searcher.search()
     stopwatch.finished("Searching the graph")
     print(result.to_string(show_full_path, show_path_weights, show_grid_graph, max_grid_graph_width, max_grid_graph_height))
+    if instrumentation and statistics_file:
+        statistics_file.write(json.dumps({
+            "algorithm": type(result.query).__name__, "start": str(start_node), "goal": str(goal_node),
+            "success": result.success, "cost": result.cost, "iterations": result.iterations,
+            **instrumentation.counters(),
+        }, ensure_ascii=False) + "\n")
+    elif instrumentation:
+        print(instrumentation.to_string())
+    print()
+
+
+def run_batch(algorithm: type[Searcher[V]], graph: Graph[V], file: str, workers: int = 1):
+    """
+    Runs all queries from a file, and prints one line per query.
+    If the algorithm is a variant of Dijkstra's algorithm (or breadth-first search),
+    the queries are grouped by their start node, and each group is answered
+    by a single search that stops when all goals of the group are found.
+    With several workers, the queries are divided between forked processes
+    (see `search.batch.answer_queries_parallel`).
+    """
+    queries: list[tuple[V, V]] = []
+    for start, goal in read_queries(file):
+        try:
+            queries.append((graph.parse_node(start), graph.parse_node(goal)))
+        except ValueError as e:
+            print(f"Parse error, skipping the query {start} -> {goal}: {e}", file=sys.stderr)
+    print(f"Running {len(queries)} queries from {file}" + (f" with {workers} workers..." if workers > 1 else "..."))
+
+    stopwatch = Stopwatch()
+    batch = answer_queries_parallel(algorithm, graph, queries, algorithm in tree_searchers, workers)
+    elapsed = stopwatch.elapsed_time()
+
+    failed = 0
+    for (start, goal), result in zip(queries, batch.results):
+        if result.success:
+            print(f"{start} -> {goal}: cost {format_cost(result.cost)}, "
+                  f"{result.edges} edges, {result.iterations} iterations")
+        else:
+            failed += 1
+            print(f"{start} -> {goal}: no path" + (f" ({result.reason})" if result.reason else ""))
+
+    print()
+    print(f"Queries:               {len(queries)}")
+    print(f"Searches:              {batch.searches}")
+    print(f"No path found:         {failed}")
+    print(f"Total time:            {elapsed:.2f} seconds")
+    print(f"Throughput:            {len(queries) / elapsed if elapsed > 0 else float('inf'):.1f} queries/s")
+    print(f"Iterations in total:   {batch.iterations}")
+
+
+def print_distance_matrix(graph: Graph[V], sources_file: str, targets_file: str):
+    """
+    Prints the costs of the shortest paths from all nodes in `sources_file`
+    to all nodes in `targets_file`, as tab-separated rows (one per source).
+    A "-" means that there is no path.
+    """
+    sources = [graph.parse_node(s) for s in read_node_list(sources_file)]
+    targets = sources if targets_file == sources_file else [graph.parse_node(s) for s in read_node_list(targets_file)]
+    stopwatch = Stopwatch()
+    matrix = distance_matrix(graph, sources, targets)
+    print("\t" + "\t".join(str(target) for target in targets))
+    for source, row in zip(sources, matrix):
+        print(str(source) + "\t" + "\t".join("-" if d is None else format_cost(d) for d in row))
+    print(file=sys.stderr)
+    print(f"Computing the {len(sources)} x {len(targets)} distance matrix took "
+          f"{stopwatch.elapsed_time():.2f} seconds.", file=sys.stderr)
+
+
+def format_cost(cost: float) -> str:
+    """Formats a cost with as few decimals as needed (at most two)."""
+    decimals = 0 if cost == round(cost, 0) else 1 if cost == round(cost, 1) else 2
+    return f"{cost:.{decimals}f}"
+
+
+def run_scenario(algorithm: type[Searcher[Point]], graph: GridGraph, scenario: str):
+    """
+    Runs all queries of a Moving AI scenario file, and compares the costs
+    with the optimal lengths in the file.
+
+    Note that the Moving AI benchmarks don't allow diagonal moves that cut corners,
+    but GridGraph does. So on maps with obstacles we can find shorter paths
+    than the "optimal" ones. These are reported separately.
+    """
+    queries = read_scenario(scenario)
+    print(f"Running {len(queries)} queries from {scenario}...")
+    if queries and (queries[0].width, queries[0].height) != (graph.width(), graph.height()):
+        print(f"WARNING: the scenario is for a {queries[0].width} x {queries[0].height} map, "
+              f"but the graph is {graph.width()} x {graph.height()}.")
+
+    tolerance = 1e-4
+    optimal = shorter = longer = failed = 0
+    total_iterations = 0
+    stopwatch = Stopwatch()
+    for query in queries:
+        result = algorithm(graph, query.start, query.goal).search()
+        result.validate()
+        total_iterations += result.iterations
+        if not result.success:
+            failed += 1
+            print(f"No path found for bucket {query.bucket}: {query.start} -> {query.goal}")
+        elif abs(result.cost - query.optimal_length) <= tolerance:
+            optimal += 1
+        elif result.cost < query.optimal_length:
+            shorter += 1
+        else:
+            longer += 1
+            print(f"Suboptimal path for bucket {query.bucket}: {query.start} -> {query.goal}, "
+                  f"cost {result.cost:.4f} instead of {query.optimal_length:.4f}")
+    elapsed = stopwatch.elapsed_time()
+
+    n = max(len(queries), 1)
+    buckets = len({query.bucket for query in queries})
     print()
+    print(f"Queries:               {len(queries)} in {buckets} buckets")
+    print(f"Optimal cost:          {optimal}")
+    print(f"Shorter (cut corners): {shorter}")
+    print(f"Longer than optimal:   {longer}")
+    print(f"No path found:         {failed}")
+    print(f"Total time:            {elapsed:.2f} seconds")
+    print(f"Throughput:            {len(queries) / elapsed if elapsed > 0 else float('inf'):.1f} queries/s")
+    print(f"Iterations per query:  {total_iterations / n:.1f}")
 
 
 if __name__ == '__main__':
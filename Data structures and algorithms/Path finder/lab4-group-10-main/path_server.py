@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+A search server that loads graphs once, and then answers queries until it is stopped.
+It listens on a Unix socket or a local TCP port, and every client connection
+sends queries as JSON objects, one per line, and gets one JSON line back per query.
+
+A query looks like this (only "start" and "goal" are required):
+
+    {"graph": "graphs/AdjacencyGraph/citygraph-SE.txt", "algorithm": "AStar",
+     "start": "Lund", "goal": "Kiruna", "path": true, "id": 17}
+
+- "graph" is the file name of one of the loaded graphs (not needed if there is only one),
+- "algorithm" is one of the algorithms of path_finder.py (default: the --algorithm option),
+- "path" says whether to include the path (default: true),
+- "id" is sent back unchanged in the answer.
+
+The answer has the fields "success", "cost", "edges" (the number of edges), "iterations",
+"time" (the search time in seconds), "path" (the list of nodes), "bound" (the proven suboptimality bound,
+if the algorithm gives one) and "reason" if there is no path.
+If the query is wrong, the answer is {"error": "..."}.
+For example, with `--socket /tmp/paths.sock`:
+
+    echo '{"start": "Lund", "goal": "Kiruna"}' | nc -U /tmp/paths.sock
+"""
+
+import os
+import sys
+import json
+import signal
+import socketserver
+import multiprocessing
+from argparse import ArgumentParser
+from typing import Any
+
+from graph.graph import Graph
+from graph.adjacency_graph import AdjacencyGraph
+from graph.compact_adjacency_graph import CompactAdjacencyGraph
+from graph.landmarks import Landmarks
+from graph.contraction_hierarchy import ContractionHierarchy
+from graph.grid_graph import GridGraph
+from graph.grid_abstraction import GridAbstraction
+from graph.sliding_puzzle import SlidingPuzzle
+from graph.pattern_database import PatternDatabase
+from graph.solution_table import SolutionTable
+
+from search.searcher import Searcher
+
+from path_finder import searchers, unweighted_searchers, graph_types
+
+from utilities.stopwatch import Stopwatch
+
+
+# A plain ArgumentParser: the server is not run interactively,
+# and CommandParser can't ask for repeated options with several values (like --graph).
+parser = ArgumentParser(description=(__doc__ or "").strip().split("\n")[0])
+parser.add_argument("--graph", "-g", nargs=2, action="append", required=True, metavar=("GRAPHTYPE", "GRAPH"),
+                    help="the type and file of a graph to load (can be given several times)")
+parser.add_argument("--algorithm", "-a", default="FastAStar", choices=searchers.keys(),
+                    help="the default search algorithm")
+parser.add_argument("--socket", "-u",
+                    help="listen on this Unix socket")
+parser.add_argument("--port", "-p", type=int,
+                    help="listen on this TCP port (on localhost)")
+parser.add_argument("--workers", "-w", type=int, default=1,
+                    help="run the searches in this many forked processes")
+parser.add_argument("--landmarks", "-l", type=int,
+                    help="use this many landmarks as heuristic for adjacency graphs")
+parser.add_argument("--hierarchy", action="store_true",
+                    help="build (or read) contraction hierarchies for adjacency graphs, "
+                         "and HPA* abstractions for grid graphs")
+parser.add_argument("--pattern-database",
+                    help="use pattern databases from this file as heuristic for sliding puzzles")
+parser.add_argument("--solution-table",
+                    help="use the exact distances from this file for sliding puzzles (up to 3x3)")
+
+
+# The loaded graphs, by file name. They are loaded before the worker processes are forked,
+# so that the workers share them.
+graphs: dict[str, Graph[Any]] = {}
+default_algorithm = "FastAStar"
+
+
+def answer(query: dict[str, Any]) -> dict[str, Any]:
+    """Answers one query, given as a dictionary parsed from JSON."""
+    response: dict[str, Any] = {}
+    if "id" in query:
+        response["id"] = query["id"]
+    try:
+        graph_name = query.get("graph")
+        if graph_name is None:
+            if len(graphs) != 1:
+                raise ValueError(f"Please choose a graph: {', '.join(graphs)}")
+            [graph] = graphs.values()
+        elif graph_name in graphs:
+            graph = graphs[graph_name]
+        else:
+            raise ValueError(f"Unknown graph: {graph_name}")
+
+        algorithm_name = query.get("algorithm", default_algorithm)
+        if algorithm_name not in searchers:
+            raise ValueError(f"Unknown algorithm: {algorithm_name}")
+        algorithm: type[Searcher[Any]] = searchers[algorithm_name]
+        if not graph.is_weighted() and algorithm in unweighted_searchers:
+            algorithm = unweighted_searchers[algorithm]
+
+        if "start" not in query or "goal" not in query:
+            raise ValueError("A query needs a start and a goal")
+        start = graph.parse_node(str(query["start"]).strip())
+        goal = graph.parse_node(str(query["goal"]).strip())
+
+        stopwatch = Stopwatch()
+        searcher = algorithm(graph, start, goal)
+        reason = graph.unreachable_reason(start, goal)
+        result = searcher.failure(0, reason) if reason else searcher.search()
+        response["time"] = stopwatch.elapsed_time()
+    except Exception as e:
+        # Every error is answered (e.g., a puzzle state of the wrong size raises IndexError),
+        # so that the connection is not dropped.
+        response["error"] = f"{type(e).__name__}: {e}"
+        return response
+
+    response["success"] = result.success
+    response["iterations"] = result.iterations
+    if result.success and result.path is not None:
+        response["cost"] = result.cost
+        response["edges"] = len(result.path)
+        if result.bound is not None:
+            response["bound"] = result.bound
+        if query.get("path", True):
+            response["path"] = [str(start)] + [str(edge.end) for edge in result.path]
+    elif result.reason:
+        response["reason"] = result.reason
+    return response
+
+
+def answer_line(line: str) -> str:
+    """Answers a query given as a JSON line, with a JSON line (without newline)."""
+    try:
+        query = json.loads(line)
+        if not isinstance(query, dict):
+            raise ValueError("A query must be a JSON object")
+    except ValueError as e:
+        return json.dumps({"error": f"Malformed query: {e}"})
+    return json.dumps(answer(query), ensure_ascii=False)
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one client connection: reads JSON lines and writes the answers.
+    Every connection gets its own thread, and the searches are done
+    by the process pool (if there is one) or directly in the thread.
+    """
+    pool: Any = None    # the multiprocessing pool, shared by all connections
+
+    def handle(self):
+        try:
+            for data in self.rfile:
+                line = data.decode("utf-8").strip()
+                if not line:
+                    continue
+                if self.pool is not None:
+                    result = self.pool.apply(answer_line, (line,))
+                else:
+                    result = answer_line(line)
+                self.wfile.write(result.encode("utf-8") + b"\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client has gone away without waiting for its answers.
+            pass
+
+
+class ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def load_graphs(
+        specs: list[list[str]], landmarks: int | None, hierarchy: bool,
+        pattern_database: str | None = None, solution_table: str | None = None,
+):
+    """Loads all graphs, together with their landmarks, hierarchies and puzzle tables."""
+    for graphtype, file in specs:
+        if graphtype not in graph_types:
+            raise ValueError(f"Unknown graph type: {graphtype} (one of: {', '.join(graph_types)})")
+        stopwatch = Stopwatch()
+        graph = graph_types[graphtype](file)
+        stopwatch.finished(f"Loading {graphtype} {file}")
+        if isinstance(graph, (AdjacencyGraph, CompactAdjacencyGraph)):
+            if landmarks:
+                graph.use_landmarks(Landmarks.for_file(graph, file, landmarks, verbose=True))
+            if hierarchy:
+                graph.use_contraction_hierarchy(ContractionHierarchy.for_file(graph, file, verbose=True))
+        if hierarchy and isinstance(graph, GridGraph):
+            graph.use_abstraction(GridAbstraction.for_file(graph, file, verbose=True))
+        if isinstance(graph, SlidingPuzzle):
+            if pattern_database:
+                graph.use_pattern_database(PatternDatabase.load(pattern_database, graph.N, graph.M))
+            if solution_table:
+                graph.use_solution_table(SolutionTable.load(solution_table, graph.N, graph.M))
+        graph.prepare_queries()
+        graphs[file] = graph
+
+
+def main():
+    global default_algorithm
+    options = parser.parse_args()
+    if (options.socket is None) == (options.port is None):
+        raise ValueError("Please give either a --socket or a --port")
+    default_algorithm = options.algorithm
+    load_graphs(options.graph, options.landmarks, options.hierarchy, options.pattern_database, options.solution_table)
+
+    if options.workers > 1:
+        # The workers are forked after the graphs are loaded, so they share them copy-on-write.
+        # They ignore Ctrl-C, which is handled by the main process.
+        QueryHandler.pool = multiprocessing.get_context("fork").Pool(
+            options.workers, signal.signal, (signal.SIGINT, signal.SIG_IGN))
+
+    server: socketserver.BaseServer
+    if options.socket:
+        if os.path.exists(options.socket):
+            os.unlink(options.socket)
+        server = ThreadingUnixServer(options.socket, QueryHandler)
+        address = options.socket
+    else:
+        server = ThreadingTCPServer(("localhost", options.port), QueryHandler)
+        address = f"localhost:{options.port}"
+    print(f"Serving {len(graphs)} graph(s) on {address}, with {max(options.workers, 1)} worker(s).")
+    sys.stdout.flush()
+
+    # Stop in the same way on a termination signal (e.g. from a service manager) as on Ctrl-C.
+    # (This is done after forking the workers, which are stopped by a termination signal.)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        server.server_close()
+        if QueryHandler.pool is not None:
+            QueryHandler.pool.terminate()
+        if options.socket and os.path.exists(options.socket):
+            os.unlink(options.socket)
+    print("Bye bye, hope to see you again soon!")
+
+
+if __name__ == '__main__':
+    main()
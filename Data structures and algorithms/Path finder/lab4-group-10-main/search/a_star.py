@@ -14,11 +14,11 @@ class AStarEntry(DijkstraEntry[V]):
     Entries of the priority queue.
     This inherits all instance variables from `DijkstraEntry`, plus the ones you add.
 
-    To create an instance: `AStarEntry(node, last_edge, back_pointer, cost_to_here, ...)`
+    To create an instance: `AStarEntry(node, last_weight, back_pointer, cost_to_here, ...)`
     """
     # These are inherited from DijkstraEntry:
     # node: V
-    # last_edge: Optional[Edge[V]]             # None for the starting entry
+    # last_weight: float                       # the weight of the edge from back_pointer to node
     # back_pointer: Optional['AStarEntry[V]']  # None for the starting entry
     # cost_to_here: float
 
@@ -55,7 +55,7 @@ class AStar(Dijkstra[V]):
         visited = set()
 
         # Add the start node to the priority queue
-        pqueue.add(AStarEntry(self.start, None, None, 0, self.graph.guess_cost(self.start, self.goal)))
+        pqueue.add(AStarEntry(self.start, 0, None, 0, self.graph.guess_cost(self.start, self.goal)))
         
         # While the priority queue is not empty
         while not pqueue.is_empty():
@@ -75,12 +75,11 @@ class AStar(Dijkstra[V]):
                 return self.success(entry.cost_to_here, self.extract_path(entry), iterations)
             
             # Add the outgoing edges to the priority queue
-            for edge in self.graph.outgoing_edges(entry.node):
-                neighbor = edge.end
-                cost_to_here = entry.cost_to_here + edge.weight
+            for neighbor, weight in self.graph.outgoing_neighbours(entry.node):
+                cost_to_here = entry.cost_to_here + weight
 
                 estimated_total_cost = cost_to_here + self.graph.guess_cost(neighbor, self.goal)
-                pqueue.add(AStarEntry(neighbor, edge, entry, cost_to_here, estimated_total_cost))
+                pqueue.add(AStarEntry(neighbor, weight, entry, cost_to_here, estimated_total_cost))
             
         return self.failure(iterations)
 
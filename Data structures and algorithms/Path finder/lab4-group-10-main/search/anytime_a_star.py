@@ -0,0 +1,187 @@
+import heapq
+import time
+from itertools import chain
+from typing import Any
+
+from graph.edge import Edge, V
+from graph.graph import Graph
+from .searcher import Searcher, Result
+
+
+class AnytimeAStar(Searcher[V]):
+    """
+    Anytime repairing A* (ARA*, Likhachev, Gordon and Thrun, 2003).
+
+    Weighted A* expands nodes in order of cost_to_here + epsilon * guess_cost, for an
+    inflation factor epsilon >= 1. This finds a path much faster than A*, because the search
+    heads straight for the goal, and the path costs at most epsilon times the optimal cost.
+    ARA* runs weighted A* repeatedly with decreasing values of epsilon, and every round
+    reuses the costs found in the previous rounds: only the nodes whose cost has improved
+    since they were expanded (the inconsistent nodes) are expanded again.
+
+    The search stops when the path is proven to cost at most `target_bound` times the optimum,
+    or when the time or iteration budget runs out. Then it returns the best path found so far,
+    together with its proven suboptimality bound (in `Result.bound`). The bound is the cost
+    divided by a lower bound of the optimal cost: the smallest cost_to_here + guess_cost
+    of the nodes that may still lead to a better path. (This requires that `guess_cost`
+    is consistent, just as A* does.)
+
+    The settings can be given to the constructor, and the class attributes are their defaults.
+    Code that creates the searchers from a class (such as the batch mode, the query cache
+    and the server) can get a class with other defaults from `with_settings`.
+    """
+    epsilon: float = 3.0                    # the inflation factor of the first round
+    epsilon_step: float = 0.5               # how much epsilon is decreased after each round
+    target_bound: float = 1.0               # stop when the path is proven to be this good
+    time_budget: float | None = None        # in seconds
+    iteration_budget: int | None = None
+
+    def __init__(
+            self, graph: Graph[V], start: V, goal: V, epsilon: float | None = None,
+            target_bound: float | None = None, time_budget: float | None = None, iteration_budget: int | None = None,
+    ):
+        """The settings that are not given (or None) keep their defaults."""
+        super().__init__(graph, start, goal)
+        for name, value in settings(epsilon, target_bound, time_budget, iteration_budget).items():
+            setattr(self, name, value)
+
+    @classmethod
+    def with_settings(
+            cls, epsilon: float | None = None, target_bound: float | None = None,
+            time_budget: float | None = None, iteration_budget: int | None = None,
+    ) -> 'type[AnytimeAStar[Any]]':
+        """
+        Returns a subclass with other default settings (the ones that are not None).
+        The class itself is not modified, since it is shared by all queries and threads.
+        """
+        return type(cls.__name__, (cls,), settings(epsilon, target_bound, time_budget, iteration_budget))
+
+    def search(self) -> Result[V]:
+        """
+        Runs rounds of weighted A*, until the target bound is reached or the budget runs out.
+        `iterations` counts the nodes removed from the queue, summed over all rounds.
+        """
+        start, goal = self.start, self.goal
+        if start == goal:
+            return self.success(0, [], 1, 1.0)
+
+        heappush, heappop = heapq.heappush, heapq.heappop
+        outgoing_neighbours = self.graph.outgoing_neighbours
+        guess_cost = self.graph.guess_cost
+        infinity = float("inf")
+        clock = time.perf_counter
+        deadline = clock() + self.time_budget if self.time_budget is not None else infinity
+        max_iterations = self.iteration_budget if self.iteration_budget is not None else infinity
+
+        guesses: dict[V, float] = {}
+        def guess(v: V) -> float:
+            h = guesses.get(v)
+            if h is None:
+                h = guesses[v] = guess_cost(v, goal)
+            return h
+
+        epsilon = max(1.0, self.epsilon)
+        iterations = 0
+        cost_to: dict[V, float] = {start: 0.0}
+        parent: dict[V, tuple[V, float] | None] = {start: None}
+        open_nodes: set[V] = {start}    # the nodes in the queue (which may also have outdated entries)
+        closed: set[V] = set()          # the nodes expanded in this round
+        inconsistent: set[V] = set()    # the nodes whose cost improved after they were expanded in this round
+        # The heap entries are (priority, tiebreak, cost to the node when it was added, node).
+        heap: list[tuple[float, int, float, V]] = [(epsilon * guess(start), 0, 0.0, start)]
+        counter = -1
+        # The best path so far, and a proven lower bound of the optimal cost.
+        best_cost, best_path = infinity, None
+        lower_bound = 0.0
+
+        while True:
+            # Expand the nodes with a smaller priority than the cost to the goal,
+            # because only they can lead to a path within epsilon of the optimum.
+            out_of_budget = False
+            while heap:
+                priority, _, cost, node = heap[0]
+                if node not in open_nodes or cost != cost_to[node]:
+                    heappop(heap)       # an outdated entry
+                    iterations += 1
+                    continue
+                if priority >= cost_to.get(goal, infinity):
+                    break
+                if iterations >= max_iterations or clock() >= deadline:
+                    out_of_budget = True
+                    break
+                heappop(heap)
+                iterations += 1
+                open_nodes.remove(node)
+                closed.add(node)
+                for neighbour, weight in outgoing_neighbours(node):
+                    cost_to_here = cost + weight
+                    if cost_to_here < cost_to.get(neighbour, infinity):
+                        cost_to[neighbour] = cost_to_here
+                        parent[neighbour] = (node, weight)
+                        if neighbour in closed:
+                            inconsistent.add(neighbour)
+                        else:
+                            open_nodes.add(neighbour)
+                            heappush(heap, (cost_to_here + epsilon * guess(neighbour), counter, cost_to_here, neighbour))
+                            counter -= 1
+
+            if goal not in cost_to:
+                if out_of_budget:
+                    return self.failure(iterations, "the budget ran out before a path was found")
+                return self.failure(iterations)
+
+            path = self.extract_path(parent, goal)
+            cost = 0.0
+            for edge in path:
+                cost += edge.weight
+            if cost < best_cost:
+                best_cost, best_path = cost, path
+            # Every better path goes through a node that may still be improved.
+            lower_bound = max(lower_bound, min(
+                (cost_to[v] + guess(v) for v in chain(open_nodes, inconsistent)), default=infinity))
+            if not out_of_budget:
+                # A finished round of weighted A* guarantees that the path is within epsilon of the optimum.
+                lower_bound = max(lower_bound, cost / epsilon)
+            lower_bound = min(lower_bound, best_cost)
+            bound = best_cost / lower_bound if lower_bound > 0 else 1.0 if best_cost == 0 else infinity
+
+            if out_of_budget or bound <= self.target_bound:
+                return self.success(best_cost, best_path, iterations, bound)
+
+            # The next round continues from the costs found so far,
+            # with all nodes that can still be improved in the queue.
+            epsilon = max(1.0, min(epsilon - self.epsilon_step, bound))
+            open_nodes |= inconsistent
+            inconsistent = set()
+            closed = set()
+            heap = []
+            for v in open_nodes:
+                heap.append((cost_to[v] + epsilon * guess(v), counter, cost_to[v], v))
+                counter -= 1
+            heapq.heapify(heap)
+
+    def extract_path(self, parent: dict[V, tuple[V, float] | None], node: V) -> list[Edge[V]]:
+        """
+        Extracts the path from the start to the given node,
+        by following the parents backwards.
+        """
+        path: list[Edge[V]] = []
+        step = parent[node]
+        while step is not None:
+            previous, weight = step
+            path.append(Edge(previous, node, weight))
+            node = previous
+            step = parent[node]
+        path.reverse()
+        return path
+
+
+def settings(
+        epsilon: float | None, target_bound: float | None, time_budget: float | None, iteration_budget: int | None,
+) -> dict[str, Any]:
+    """The settings that are not None, by name."""
+    values = {
+        "epsilon": epsilon, "target_bound": target_bound,
+        "time_budget": time_budget, "iteration_budget": iteration_budget,
+    }
+    return {name: value for name, value in values.items() if value is not None}
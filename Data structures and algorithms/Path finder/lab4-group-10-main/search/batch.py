@@ -0,0 +1,130 @@
+import gc
+import multiprocessing
+from typing import Any, NamedTuple
+
+from graph.graph import Graph, V
+from .searcher import Searcher, Result
+from .shortest_path_tree import ShortestPathTree, TreeSearch
+
+
+class QueryResult(NamedTuple):
+    """
+    A summary of a search result, without the path and the searcher.
+    Unlike `Result`, it is small and cheap to send between processes.
+    """
+    success: bool
+    cost: float
+    edges: int              # the number of edges in the path
+    iterations: int
+    reason: str | None
+
+    @staticmethod
+    def of(result: Result[Any]) -> 'QueryResult':
+        result.validate()
+        edges = len(result.path) if result.path is not None else 0
+        return QueryResult(result.success, result.cost, edges, result.iterations, result.reason)
+
+
+class BatchResult(NamedTuple):
+    results: list[QueryResult]  # in the same order as the queries
+    searches: int               # the number of searches (or shortest path trees)
+    iterations: int             # the total number of iterations of all searches
+
+
+def answer_queries(
+        algorithm: type[Searcher[V]], graph: Graph[V],
+        queries: list[tuple[V, V]], use_trees: bool,
+) -> BatchResult:
+    """
+    Answers a list of queries, in order.
+    If `use_trees` is set, the queries are grouped by their start node, and each group
+    is answered from a single `ShortestPathTree` that grows until all goals of the group are settled.
+    Otherwise `algorithm` is run once for every query.
+    """
+    if use_trees:
+        groups: dict[V, list[int]] = {}
+        for i, (start, _) in enumerate(queries):
+            groups.setdefault(start, []).append(i)
+        answers: list[QueryResult | None] = [None] * len(queries)
+        iterations = 0
+        for start, indices in groups.items():
+            # Only one tree is kept at a time: it is dropped as soon as its group is answered.
+            tree = ShortestPathTree(graph, start)
+            tree.grow(queries[i][1] for i in indices)
+            for i in indices:
+                answers[i] = QueryResult.of(TreeSearch(tree, queries[i][1]).search())
+            iterations += tree.iterations
+        return BatchResult(answers, len(groups), iterations)  # type: ignore
+
+    results: list[QueryResult] = []
+    for start, goal in queries:
+        # Don't bother searching if we already know that there is no path.
+        reason = graph.unreachable_reason(start, goal)
+        searcher = algorithm(graph, start, goal)
+        results.append(QueryResult.of(searcher.failure(0, reason) if reason else searcher.search()))
+    return BatchResult(results, len(queries), sum(result.iterations for result in results))
+
+
+# The search problem shared with the worker processes: (algorithm, graph, use_trees).
+# It is set before the workers are forked, so they get the graph without copying or pickling it.
+_shared: tuple[type[Searcher[Any]], Graph[Any], bool] | None = None
+
+
+def _answer_chunk(chunk: list[tuple[int, Any, Any]]) -> tuple[list[int], BatchResult]:
+    """Answers a chunk of numbered queries in a worker process."""
+    assert _shared is not None, "The worker process has no graph"
+    algorithm, graph, use_trees = _shared
+    indices = [i for i, _, _ in chunk]
+    return indices, answer_queries(algorithm, graph, [(start, goal) for _, start, goal in chunk], use_trees)
+
+
+def answer_queries_parallel(
+        algorithm: type[Searcher[V]], graph: Graph[V],
+        queries: list[tuple[V, V]], use_trees: bool, workers: int,
+) -> BatchResult:
+    """
+    Answers a list of queries like `answer_queries`, but in `workers` forked processes.
+
+    The graph is loaded once, by this process. The workers are forked afterwards,
+    so they share its memory copy-on-write. The queries are split into chunks
+    (keeping queries with the same start together, so that they can share a tree),
+    and the workers take chunks from a queue until all are done.
+    Only the queries and the result summaries are sent between the processes.
+    """
+    if workers <= 1 or len(queries) <= 1:
+        return answer_queries(algorithm, graph, queries, use_trees)
+    if "fork" not in multiprocessing.get_all_start_methods():
+        raise ValueError("Parallel workers need the 'fork' start method, which this platform doesn't have")
+
+    # Group the numbered queries by start, and pack the groups into chunks.
+    # There are several chunks per worker, so that a slow chunk doesn't hold up the others.
+    groups: dict[V, list[tuple[int, V, V]]] = {}
+    for i, (start, goal) in enumerate(queries):
+        groups.setdefault(start, []).append((i, start, goal))
+    chunk_size = max(1, len(queries) // (workers * 8))
+    chunks: list[list[tuple[int, V, V]]] = [[]]
+    for group in groups.values():
+        if len(chunks[-1]) >= chunk_size:
+            chunks.append([])
+        chunks[-1].extend(group)
+
+    graph.prepare_queries()
+    global _shared
+    _shared = (algorithm, graph, use_trees)
+    results: list[QueryResult | None] = [None] * len(queries)
+    searches = iterations = 0
+    # Move all existing objects out of reach of the garbage collector, so that the collections
+    # in the workers don't write to (and thereby copy) the memory pages of the shared graph.
+    gc.freeze()
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for indices, batch in pool.imap_unordered(_answer_chunk, chunks):
+                for i, result in zip(indices, batch.results):
+                    results[i] = result
+                searches += batch.searches
+                iterations += batch.iterations
+    finally:
+        gc.unfreeze()
+        _shared = None
+    assert all(result is not None for result in results)
+    return BatchResult(results, searches, iterations)  # type: ignore
@@ -0,0 +1,145 @@
+from graph.edge import Edge, V
+from .searcher import Result
+from .dijkstra import Dijkstra, DijkstraEntry
+from .a_star import AStarEntry
+
+from utilities.priority_queue import PriorityQueue
+
+
+class BidirectionalDijkstra(Dijkstra[V]):
+    """
+    Bidirectional Dijkstra: one search grows forwards from `start`
+    (using `outgoing_neighbours`), and another grows backwards from `goal`
+    (using `incoming_neighbours`).
+
+    Every time an edge connects the two search trees we get a candidate path,
+    and we remember the cheapest one.
+    The search stops as soon as the smallest keys of the two frontiers
+    add up to at least the cost of the best candidate,
+    because then no undiscovered path can be cheaper.
+    """
+
+    def potential(self, v: V, forward: bool) -> float:
+        """
+        The potential added to the cost of an entry to get its priority.
+        Plain bidirectional Dijkstra uses no potential.
+        """
+        return 0.0
+
+    def new_entry(
+            self, v: V, weight: float, back_pointer: DijkstraEntry[V] | None,
+            cost_to_here: float, forward: bool,
+    ) -> DijkstraEntry[V]:
+        return DijkstraEntry(v, weight, back_pointer, cost_to_here)
+
+    def key(self, entry: DijkstraEntry[V]) -> float:
+        """The priority of an entry."""
+        return entry.cost_to_here
+
+    def search(self) -> Result[V]:
+        """
+        Bidirectional search for a path in `graph` from `start` to `goal`.
+        The iterations of both directions are counted together.
+        """
+        iterations = 0
+        if self.start == self.goal:
+            return self.success(0, [], 1)
+
+        queues: dict[bool, PriorityQueue[DijkstraEntry[V]]] = {True: PriorityQueue(), False: PriorityQueue()}
+        # The best entry found so far for each node, in each direction.
+        labels: dict[bool, dict[V, DijkstraEntry[V]]] = {True: {}, False: {}}
+        visited: dict[bool, set[V]] = {True: set(), False: set()}
+
+        for forward, node in ((True, self.start), (False, self.goal)):
+            entry = self.new_entry(node, 0, None, 0, forward)
+            labels[forward][node] = entry
+            queues[forward].add(entry)
+
+        best_cost = float("inf")
+        meeting: tuple[DijkstraEntry[V], DijkstraEntry[V]] | None = None
+
+        while not (queues[True].is_empty() or queues[False].is_empty()):
+            # No path through an unsettled node can be better than the best one found.
+            if self.key(queues[True].get_min()) + self.key(queues[False].get_min()) >= best_cost:
+                break
+
+            # Expand the direction with the smaller frontier.
+            forward = queues[True].size() <= queues[False].size()
+            entry = queues[forward].remove_min()
+            iterations += 1
+
+            if entry.node in visited[forward]:
+                continue
+            visited[forward].add(entry.node)
+
+            if forward:
+                neighbours = self.graph.outgoing_neighbours(entry.node)
+            else:
+                neighbours = self.graph.incoming_neighbours(entry.node)
+            for neighbour, weight in neighbours:
+                if neighbour in visited[forward]:
+                    continue
+                cost_to_here = entry.cost_to_here + weight
+                label = labels[forward].get(neighbour)
+                if label is not None and label.cost_to_here <= cost_to_here:
+                    continue
+                label = self.new_entry(neighbour, weight, entry, cost_to_here, forward)
+                labels[forward][neighbour] = label
+                queues[forward].add(label)
+
+                # Check if this connects to the other search tree.
+                other = labels[not forward].get(neighbour)
+                if other is not None and cost_to_here + other.cost_to_here < best_cost:
+                    best_cost = cost_to_here + other.cost_to_here
+                    meeting = (label, other) if forward else (other, label)
+
+        if meeting is None:
+            if iterations == 0:
+                # The potentials of start and goal are infinite, so we didn't even start.
+                return self.failure(iterations, "the guessed cost from start to goal is infinite")
+            return self.failure(iterations)
+        path = self.extract_path(meeting[0]) + self.extract_backward_path(meeting[1])
+        # Summing the edges in path order gives exactly the cost that `Result` validates against.
+        cost = 0.0
+        for edge in path:
+            cost += edge.weight
+        return self.success(cost, path, iterations)
+
+    def extract_backward_path(self, entry: DijkstraEntry[V]) -> list[Edge[V]]:
+        """
+        Extracts the path from an entry of the backward search to the goal.
+        The back pointers already lead towards the goal, so no reversal is needed.
+        """
+        path: list[Edge[V]] = []
+        while entry.back_pointer is not None:
+            path.append(Edge(entry.node, entry.back_pointer.node, entry.last_weight))
+            entry = entry.back_pointer
+        return path
+
+
+class BidirectionalAStar(BidirectionalDijkstra[V]):
+    """
+    Bidirectional A*, using the average of the forward and backward heuristics
+    as potential (Ikeda et al.):
+
+        p(v) = (guess_cost(v, goal) - guess_cost(start, v)) / 2
+
+    The forward search uses p and the backward search uses -p.
+    This makes both searches run on the same graph of reduced edge costs,
+    so the usual bidirectional stopping criterion stays correct
+    as long as `guess_cost` is consistent.
+    """
+
+    def potential(self, v: V, forward: bool) -> float:
+        p = (self.graph.guess_cost(v, self.goal) - self.graph.guess_cost(self.start, v)) / 2
+        return p if forward else -p
+
+    def new_entry(
+            self, v: V, weight: float, back_pointer: DijkstraEntry[V] | None,
+            cost_to_here: float, forward: bool,
+    ) -> DijkstraEntry[V]:
+        return AStarEntry(v, weight, back_pointer, cost_to_here, cost_to_here + self.potential(v, forward))
+
+    def key(self, entry: DijkstraEntry[V]) -> float:
+        assert isinstance(entry, AStarEntry)
+        return entry.estimated_total_cost
@@ -0,0 +1,137 @@
+from collections import deque
+
+from graph.edge import Edge, V
+from .searcher import Searcher, Result
+
+
+class BreadthFirst(Searcher[V]):
+    """
+    Breadth-first search, for unweighted graphs.
+
+    When all edges have weight 1, the nodes are reached in order of their distance
+    from the start, so a plain FIFO queue does the job of Dijkstra's priority queue.
+    Every node is added to the queue at most once, when it is first reached,
+    and the search stops as soon as the goal is reached.
+
+    Warning: the path is only optimal if the graph is unweighted.
+    """
+
+    def search(self) -> Result[V]:
+        """
+        Breadth-first search for a path in `graph` from `start` to `goal`.
+        Every node removed from the queue counts as one iteration.
+        """
+        outgoing_neighbours = self.graph.outgoing_neighbours
+        start, goal = self.start, self.goal
+        if start == goal:
+            return self.success(0, [], 1)
+
+        iterations = 0
+        # The node that first reached each node, and the weight of the edge from it.
+        parent: dict[V, tuple[V, float] | None] = {start: None}
+        queue: deque[V] = deque([start])
+        while queue:
+            node = queue.popleft()
+            iterations += 1
+            for neighbour, weight in outgoing_neighbours(node):
+                if neighbour in parent:
+                    continue
+                parent[neighbour] = (node, weight)
+                if neighbour == goal:
+                    path = self.extract_path(parent, neighbour)
+                    cost = 0.0
+                    for e in path:
+                        cost += e.weight
+                    return self.success(cost, path, iterations)
+                queue.append(neighbour)
+
+        return self.failure(iterations)
+
+    def extract_path(self, parent: dict[V, tuple[V, float] | None], node: V) -> list[Edge[V]]:
+        """
+        Extracts the path from the start to `node`, by following the parents backwards.
+        """
+        path: list[Edge[V]] = []
+        step = parent[node]
+        while step is not None:
+            previous, weight = step
+            path.append(Edge(previous, node, weight))
+            node = previous
+            step = parent[node]
+        path.reverse()
+        return path
+
+
+class BidirectionalBreadthFirst(BreadthFirst[V]):
+    """
+    Bidirectional breadth-first search, for unweighted graphs:
+    one search grows forwards from `start` (using `outgoing_neighbours`),
+    and another grows backwards from `goal` (using `incoming_neighbours`).
+
+    In each step, we expand a whole layer of the side with the smaller frontier.
+    When that layer reaches a node that the other side has already reached,
+    we have found a path. The shortest path found while expanding
+    that layer is a shortest path, so we stop after the layer.
+    """
+
+    def search(self) -> Result[V]:
+        """
+        Bidirectional breadth-first search for a path in `graph` from `start` to `goal`.
+        The iterations of both directions are counted together.
+        """
+        start, goal = self.start, self.goal
+        if start == goal:
+            return self.success(0, [], 1)
+
+        iterations = 0
+        # For each side: the node (and edge weight) that first reached each node,
+        # and its distance from the side's root.
+        parent: dict[bool, dict[V, tuple[V, float] | None]] = {True: {start: None}, False: {goal: None}}
+        distance: dict[bool, dict[V, int]] = {True: {start: 0}, False: {goal: 0}}
+        frontier: dict[bool, deque[V]] = {True: deque([start]), False: deque([goal])}
+
+        best_length = None
+        meeting: V | None = None
+        while frontier[True] and frontier[False] and meeting is None:
+            forward = len(frontier[True]) <= len(frontier[False])
+            get_neighbours = self.graph.outgoing_neighbours if forward else self.graph.incoming_neighbours
+            parent_of, distance_to = parent[forward], distance[forward]
+            other_distance = distance[not forward]
+            layer = frontier[forward]
+            frontier[forward] = next_layer = deque()
+
+            for node in layer:
+                iterations += 1
+                d = distance_to[node] + 1
+                for neighbour, weight in get_neighbours(node):
+                    if neighbour in parent_of:
+                        continue
+                    parent_of[neighbour] = (node, weight)
+                    distance_to[neighbour] = d
+                    next_layer.append(neighbour)
+                    other = other_distance.get(neighbour)
+                    if other is not None and (best_length is None or d + other < best_length):
+                        best_length = d + other
+                        meeting = neighbour
+
+        if meeting is None:
+            return self.failure(iterations)
+        path = self.extract_path(parent[True], meeting) + self.extract_backward_path(parent[False], meeting)
+        cost = 0.0
+        for edge in path:
+            cost += edge.weight
+        return self.success(cost, path, iterations)
+
+    def extract_backward_path(self, parent: dict[V, tuple[V, float] | None], node: V) -> list[Edge[V]]:
+        """
+        Extracts the path from `node` to the goal, in the tree of the backward search.
+        The parents already lead towards the goal, so no reversal is needed.
+        """
+        path: list[Edge[V]] = []
+        step = parent[node]
+        while step is not None:
+            following, weight = step
+            path.append(Edge(node, following, weight))
+            node = following
+            step = parent[node]
+        return path
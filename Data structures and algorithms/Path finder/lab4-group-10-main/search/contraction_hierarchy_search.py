@@ -0,0 +1,111 @@
+import heapq
+
+from graph.edge import Edge
+from graph.graph import Graph
+from graph.adjacency_graph import AdjacencyGraph
+from graph.compact_adjacency_graph import CompactAdjacencyGraph
+from graph.contraction_hierarchy import ContractionHierarchy
+from .searcher import Searcher, Result
+
+
+class ContractionHierarchySearch(Searcher[str]):
+    """
+    A query in a contraction hierarchy (see `graph.contraction_hierarchy`).
+
+    This is a bidirectional Dijkstra, where the forward search from the start
+    only follows arcs upwards in the hierarchy, and so does the backward search
+    from the goal. Every shortest path has a highest node, where the two searches meet.
+    Since only a few nodes are above any given node, the searches are tiny.
+
+    A side stops when its smallest key is at least the cost of the best path found,
+    and the search stops when both sides have stopped.
+    The shortcuts on the path are then unpacked into the original edges.
+    """
+    hierarchy: ContractionHierarchy
+
+    def __init__(self, graph: Graph[str], start: str, goal: str):
+        if not (isinstance(graph, (AdjacencyGraph, CompactAdjacencyGraph)) and graph.hierarchy is not None):
+            raise ValueError("Contraction hierarchy search only works on adjacency graphs with a hierarchy.")
+        self.hierarchy = graph.hierarchy
+        super().__init__(graph, start, goal)
+
+    def search(self) -> Result[str]:
+        """
+        Searches upwards from both `start` and `goal`.
+        The settled nodes of both directions are counted together.
+        """
+        hierarchy = self.hierarchy
+        source = hierarchy.ids.get(self.start)
+        target = hierarchy.ids.get(self.goal)
+        if source is None or target is None:
+            return self.failure(1)
+        if source == target:
+            return self.success(0, [], 1)
+
+        iterations = 0
+        arcs = (hierarchy.up, hierarchy.down)
+        # For each direction: the best distance to each node,
+        # and the last arc (previous node, weight, middle) on the way there.
+        distances: tuple[dict[int, float], dict[int, float]] = ({source: 0.0}, {target: 0.0})
+        last_arcs: tuple[dict[int, tuple[int, float, int]], dict[int, tuple[int, float, int]]] = ({}, {})
+        heaps: tuple[list[tuple[float, int]], list[tuple[float, int]]] = ([(0.0, source)], [(0.0, target)])
+        best_cost = float("inf")
+        meeting = -1
+
+        while True:
+            # Continue with the side whose smallest key is smaller.
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0] <= heaps[1][0]) else 1
+            heap = heaps[side]
+            if not heap or heap[0][0] >= best_cost:
+                break
+            d, v = heapq.heappop(heap)
+            distance = distances[side]
+            if d > distance[v]:
+                continue
+            iterations += 1
+            other = distances[1 - side].get(v)
+            if other is not None and d + other < best_cost:
+                best_cost = d + other
+                meeting = v
+
+            offsets, targets, weights, middles = arcs[side]
+            last_arc = last_arcs[side]
+            for k in range(offsets[v], offsets[v+1]):
+                w = targets[k]
+                cost_to_here = d + weights[k]
+                if cost_to_here < distance.get(w, best_cost):
+                    distance[w] = cost_to_here
+                    last_arc[w] = (v, weights[k], middles[k])
+                    heapq.heappush(heap, (cost_to_here, w))
+
+        if meeting < 0:
+            return self.failure(iterations)
+        path = self.extract_path(last_arcs[0], last_arcs[1], meeting)
+        cost = 0.0
+        for edge in path:
+            cost += edge.weight
+        return self.success(cost, path, iterations)
+
+    def extract_path(
+            self, forward: dict[int, tuple[int, float, int]],
+            backward: dict[int, tuple[int, float, int]], meeting: int,
+    ) -> list[Edge[str]]:
+        """
+        Extracts the path from the start to the meeting node (in the forward search tree),
+        and from the meeting node to the goal (in the backward search tree),
+        with all shortcuts unpacked.
+        """
+        unpack = self.hierarchy.unpack
+        parts: list[list[Edge[str]]] = []
+        v = meeting
+        while v in forward:
+            u, weight, middle = forward[v]
+            parts.append(unpack(u, v, weight, middle))
+            v = u
+        path = [edge for part in reversed(parts) for edge in part]
+        v = meeting
+        while v in backward:
+            w, weight, middle = backward[v]
+            path.extend(unpack(v, w, weight, middle))
+            v = w
+        return path
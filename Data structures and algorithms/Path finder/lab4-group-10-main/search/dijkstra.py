@@ -12,10 +12,11 @@ from utilities.priority_queue import PriorityQueue
 class DijkstraEntry(Generic[V]):
     """
     Entries of the priority queue.
-    To create an instance: `DijkstraEntry(node, last_edge, back_pointer, cost_to_here)`
+    To create an instance: `DijkstraEntry(node, last_weight, back_pointer, cost_to_here)`
+    The `Edge` objects of the path are only created when it is extracted.
     """
     node: V
-    last_edge: Edge[V] | None                # None for the starting entry
+    last_weight: float                       # the weight of the edge from back_pointer to node
     back_pointer: 'DijkstraEntry[V] | None'  # None for the starting entry
     cost_to_here: float
 
@@ -50,7 +51,7 @@ class Dijkstra(Searcher[V]):
         visited = set()
 
         # Add the start node to the priority queue
-        pqueue.add(DijkstraEntry(self.start, None, None, 0))
+        pqueue.add(DijkstraEntry(self.start, 0, None, 0))
         
         # While the priority queue is not empty
         while not pqueue.is_empty():
@@ -70,11 +71,10 @@ class Dijkstra(Searcher[V]):
                 return self.success(entry.cost_to_here, self.extract_path(entry), iterations)
             
             # Add the outgoing edges to the priority queue
-            for edge in self.graph.outgoing_edges(entry.node):
-                neighbor = edge.end
-                cost_to_here = entry.cost_to_here + edge.weight
+            for neighbor, weight in self.graph.outgoing_neighbours(entry.node):
+                cost_to_here = entry.cost_to_here + weight
 
-                pqueue.add(DijkstraEntry(neighbor, edge, entry, cost_to_here))
+                pqueue.add(DijkstraEntry(neighbor, weight, entry, cost_to_here))
     
         return self.failure(iterations)
 
@@ -86,8 +86,8 @@ class Dijkstra(Searcher[V]):
         """
         #---------- TASK 1b: Extracting the path ---------------------------------#        
         path = []
-        while entry.last_edge is not None:
-            path.append(entry.last_edge)
+        while entry.back_pointer is not None:
+            path.append(Edge(entry.back_pointer.node, entry.node, entry.last_weight))
             entry = entry.back_pointer
         # Reverse the list to get the correct order
         path.reverse()
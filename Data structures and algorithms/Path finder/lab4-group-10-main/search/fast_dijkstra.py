@@ -0,0 +1,77 @@
+import heapq
+
+from graph.edge import V
+from .searcher import Result
+from .indexed_dijkstra import IndexedDijkstra
+
+
+class FastDijkstra(IndexedDijkstra[V]):
+    """
+    Dijkstra's algorithm, optimised for speed.
+
+    `Dijkstra` allocates a `DijkstraEntry` object for every edge it relaxes,
+    and the heap compares entries by calling their Python-level `__lt__`.
+    This version instead puts plain tuples (priority, tiebreak, node) on the heap,
+    which `heapq` compares in C. The tiebreak is a decreasing counter,
+    so that the nodes themselves are never compared, and among nodes with
+    equal priority the most recently added one is expanded first.
+    (For A* this favours nodes that are deeper in the search).
+
+    The best known cost and the parent of the best known path are stored
+    in dictionaries indexed by node (as in `IndexedDijkstra`),
+    and only improving paths are pushed on the heap.
+    Outdated heap entries are skipped when they are removed.
+
+    Note: only the path costs are guaranteed to be the same as for `Dijkstra` and `AStar`.
+    Those push an entry for every relaxed edge, and break ties in a different order,
+    so the iteration counts differ, and among several shortest paths another one may be returned.
+    """
+    use_heuristic = False
+
+    def search(self) -> Result[V]:
+        """
+        Uniform cost search for a path in `graph` from `start` to `goal`.
+        Returns the search result (which includes the path found if successful).
+        """
+        # Local variables are faster than attribute lookups in the inner loop.
+        heappush, heappop = heapq.heappush, heapq.heappop
+        outgoing_neighbours = self.graph.outgoing_neighbours
+        guess_cost = self.graph.guess_cost if self.use_heuristic else None
+        start, goal = self.start, self.goal
+        infinity = float("inf")
+
+        iterations = 0
+        cost_to: dict[V, float] = {start: 0}
+        parent: dict[V, tuple[V, float] | None] = {start: None}
+        visited: set[V] = set()
+        heap: list[tuple[float, int, V]] = [(guess_cost(start, goal) if guess_cost else 0, 0, start)]
+        counter = -1
+
+        while heap:
+            _, _, node = heappop(heap)
+            iterations += 1
+            if node in visited:
+                continue
+            visited.add(node)
+
+            if node == goal:
+                return self.success(cost_to[node], self.extract_path(parent, node), iterations)
+
+            cost_to_node = cost_to[node]
+            for neighbour, weight in outgoing_neighbours(node):
+                cost_to_here = cost_to_node + weight
+                if cost_to_here < cost_to.get(neighbour, infinity):
+                    cost_to[neighbour] = cost_to_here
+                    parent[neighbour] = (node, weight)
+                    priority = cost_to_here + guess_cost(neighbour, goal) if guess_cost else cost_to_here
+                    heappush(heap, (priority, counter, neighbour))
+                    counter -= 1
+
+        return self.failure(iterations)
+
+
+class FastAStar(FastDijkstra[V]):
+    """
+    The A* algorithm, optimised for speed in the same way as `FastDijkstra`.
+    """
+    use_heuristic = True
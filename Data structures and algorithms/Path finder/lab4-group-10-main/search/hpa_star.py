@@ -0,0 +1,165 @@
+import heapq
+
+from graph.edge import Edge
+from graph.graph import Graph
+from graph.point import Point
+from graph.grid_graph import GridGraph
+from graph.grid_abstraction import GridAbstraction, LocalSearch, SQRT2
+from .searcher import Searcher, Result
+
+
+class HPAStar(Searcher[Point]):
+    """
+    Hierarchical pathfinding A* (HPA*, Botea et al., 2004), for grid graphs
+    with an abstraction (see `graph.grid_abstraction`).
+
+    The start and the goal are connected to the transitions of their clusters
+    by local searches inside the clusters. Then A* searches the abstract graph,
+    which has a few nodes per cluster instead of hundreds of cells.
+    (If the start and the goal are in the same cluster, the direct path inside
+    the cluster is a candidate too.) Finally, every abstract edge inside a cluster
+    is refined into grid edges by another local search.
+
+    Warning: the path is not always optimal, because the transitions are only a few
+    of the cells on the cluster borders. It is usually within a few percent of the optimum.
+    """
+    graph: GridGraph
+    abstraction: GridAbstraction
+
+    def __init__(self, graph: Graph[Point], start: Point, goal: Point):
+        if not (isinstance(graph, GridGraph) and graph.abstraction is not None):
+            raise ValueError("HPA* only works on grid graphs with an abstraction.")
+        self.abstraction = graph.abstraction
+        super().__init__(graph, start, goal)
+
+    def search(self) -> Result[Point]:
+        """
+        Searches the abstract graph between the start and goal clusters.
+        `iterations` counts the abstract nodes removed from the queue,
+        plus the cells removed from the queues of the local searches.
+        """
+        graph, abstraction = self.graph, self.abstraction
+        start, goal = self.start, self.goal
+        if start == goal:
+            return self.success(0, [], 1)
+        for p in (start, goal):
+            if not graph.passable(p):
+                return self.failure(1, f"HPA* only searches between passable points, but {p} is not passable")
+
+        width = graph.width()
+        source, target = start.y * width + start.x, goal.y * width + goal.x
+        from_start = abstraction.local_search(graph, source)
+        to_goal = abstraction.local_search(graph, target)
+        iterations = from_start.iterations + to_goal.iterations
+
+        # A* in the abstract graph, from the transitions of the start cluster.
+        # The goal is node -1: it is reached from the transitions of its cluster,
+        # or directly if it is in the same cluster as the start.
+        cells, offsets, targets, weights = abstraction.cells, *abstraction.edges
+        guess_cost = graph.guess_cost
+        guesses: dict[int, float] = {}
+        def priority(v: int, cost: float) -> float:
+            guess = guesses.get(v)
+            if guess is None:
+                c = cells[v]
+                guess = guesses[v] = guess_cost(Point(c % width, c // width), goal)
+            return cost + guess
+
+        cost_to: dict[int, float] = {}
+        parent: dict[int, int] = {}     # -2 for the transitions that are reached from the start
+        heap: list[tuple[float, int, int]] = []
+        counter = 0
+        exits = {v: to_goal.cost_to[cells[v]] for v in abstraction.transitions(abstraction.cluster(target))
+                 if cells[v] in to_goal.cost_to}
+        if target in from_start.cost_to:
+            cost_to[-1], parent[-1] = from_start.cost_to[target], -2
+            heap.append((cost_to[-1], counter, -1))
+        for v in abstraction.transitions(abstraction.cluster(source)):
+            cost = from_start.cost_to.get(cells[v])
+            if cost is not None and cost < cost_to.get(v, float("inf")):
+                cost_to[v], parent[v] = cost, -2
+                counter += 1
+                heapq.heappush(heap, (priority(v, cost), counter, v))
+
+        visited: set[int] = set()
+        while heap:
+            _, _, v = heapq.heappop(heap)
+            iterations += 1
+            if v in visited:
+                continue
+            visited.add(v)
+            if v == -1:
+                path, refinement_iterations = self.refine(from_start, to_goal, parent)
+                cost = 0.0
+                for edge in path:
+                    cost += edge.weight
+                return self.success(cost, path, iterations + refinement_iterations)
+
+            cost_to_v = cost_to[v]
+            neighbours = [(targets[k], weights[k]) for k in range(offsets[v], offsets[v + 1])]
+            if v in exits:
+                neighbours.append((-1, exits[v]))
+            for w, weight in neighbours:
+                cost = cost_to_v + weight
+                if cost < cost_to.get(w, float("inf")):
+                    cost_to[w], parent[w] = cost, v
+                    counter += 1
+                    heapq.heappush(heap, (cost if w == -1 else priority(w, cost), counter, w))
+
+        return self.failure(iterations)
+
+    def refine(
+            self, from_start: LocalSearch, to_goal: LocalSearch, parent: dict[int, int],
+    ) -> tuple[list[Edge[Point]], int]:
+        """
+        Refines the abstract path to the goal (node -1) into grid edges.
+        The parts before the first and after the last transition are taken from the local searches
+        from the start and the goal, and the abstract edges inside clusters are refined by new local searches.
+        Returns the path and the iterations of the new local searches.
+        """
+        graph, abstraction = self.graph, self.abstraction
+        width, cells = graph.width(), abstraction.cells
+        target = self.goal.y * width + self.goal.x
+
+        nodes: list[int] = []
+        v = parent[-1]
+        while v >= 0:
+            nodes.append(v)
+            v = parent[v]
+        nodes.reverse()
+        if not nodes:
+            return self.cell_path(cells_to(from_start, target)), 0
+
+        # From the start to the first transition, between transitions, and from the last transition to the goal.
+        path_cells = cells_to(from_start, cells[nodes[0]])
+        iterations = 0
+        for v, w in zip(nodes, nodes[1:]):
+            u, x = cells[v], cells[w]
+            if abstraction.cluster(u) != abstraction.cluster(x):
+                path_cells.append(x)
+            else:
+                local = abstraction.local_search(graph, u, (x,))
+                iterations += local.iterations
+                path_cells.extend(cells_to(local, x)[1:])
+        # The grid is symmetric, so the path from the goal back to the last transition is the way forward.
+        path_cells.extend(reversed(cells_to(to_goal, cells[nodes[-1]])[:-1]))
+        return self.cell_path(path_cells), iterations
+
+    def cell_path(self, path_cells: list[int]) -> list[Edge[Point]]:
+        """Converts a list of neighbouring cells into grid edges."""
+        width = self.graph.width()
+        points = [Point(c % width, c // width) for c in path_cells]
+        return [
+            Edge(p, q, 1.0 if p.x == q.x or p.y == q.y else SQRT2)
+            for p, q in zip(points, points[1:])
+        ]
+
+
+def cells_to(local: LocalSearch, cell: int) -> list[int]:
+    """The cells on the path from the source of a local search to `cell`."""
+    path = [cell]
+    while cell in local.parent:
+        cell = local.parent[cell]
+        path.append(cell)
+    path.reverse()
+    return path
@@ -0,0 +1,94 @@
+from collections.abc import Iterator
+
+from graph.edge import Edge, V
+from .searcher import Searcher, Result
+
+
+class IDAStar(Searcher[V]):
+    """
+    Iterative deepening A* (Korf, 1985).
+
+    This is a sequence of depth-first searches, each of which only follows
+    paths where the cost so far plus the guessed remaining cost is within
+    a bound. The bound starts at the guessed cost from start to goal,
+    and is raised to the smallest value that exceeded it in the previous round.
+    With an admissible `guess_cost`, the first path found is optimal.
+
+    Only the current path is stored, so the memory usage is proportional to the
+    length of the solution, not to the number of states visited.
+    The price is that states are visited many times, because nothing is
+    remembered between rounds. To avoid the most common duplicates,
+    a move is never immediately followed by its reverse.
+
+    Warning: if there is no path, and the graph has cycles,
+    the search doesn't terminate.
+    """
+
+    def search(self) -> Result[V]:
+        """
+        Runs IDA* to find a path in `graph` from `start` to `goal`.
+        `iterations` counts the expanded nodes, summed over all rounds.
+        """
+        iterations = 0
+        if self.start == self.goal:
+            return self.success(0, [], 1)
+
+        bound = self.graph.guess_cost(self.start, self.goal)
+        while True:
+            iterations, found, next_bound = self.bounded_search(bound, iterations)
+            if found is not None:
+                cost = 0.0
+                for edge in found:
+                    cost += edge.weight
+                return self.success(cost, found, iterations)
+            if next_bound == float("inf"):
+                return self.failure(iterations)
+            bound = next_bound
+
+    def bounded_search(self, bound: float, iterations: int) -> tuple[int, list[Edge[V]] | None, float]:
+        """
+        A depth-first search from the start, pruning the nodes whose
+        cost so far plus guessed cost exceeds `bound`.
+        Returns the updated iteration count, the path to the goal (if found),
+        and the smallest pruned cost (which becomes the next bound).
+        """
+        graph, goal = self.graph, self.goal
+        next_bound = float("inf")
+        # The nodes on the current path, the weights of the edges between them,
+        # and for each node, the cost to get there and an iterator over
+        # the neighbours that have not been tried yet.
+        nodes: list[V] = [self.start]
+        weights: list[float] = []
+        costs: list[float] = [0.0]
+        stack: list[Iterator[tuple[V, float]]] = [iter(graph.outgoing_neighbours(self.start))]
+        iterations += 1
+
+        while stack:
+            step = next(stack[-1], None)
+            if step is None:
+                # All neighbours of the current node are tried, so we backtrack.
+                stack.pop()
+                costs.pop()
+                nodes.pop()
+                if weights:
+                    weights.pop()
+                continue
+            neighbour, weight = step
+            if len(nodes) > 1 and neighbour == nodes[-2]:
+                continue
+            cost_to_here = costs[-1] + weight
+            estimate = cost_to_here + graph.guess_cost(neighbour, goal)
+            if estimate > bound:
+                if estimate < next_bound:
+                    next_bound = estimate
+                continue
+            nodes.append(neighbour)
+            weights.append(weight)
+            if neighbour == goal:
+                path = [Edge(nodes[i], nodes[i+1], weight) for i, weight in enumerate(weights)]
+                return iterations, path, next_bound
+            iterations += 1
+            costs.append(cost_to_here)
+            stack.append(iter(graph.outgoing_neighbours(neighbour)))
+
+        return iterations, None, next_bound
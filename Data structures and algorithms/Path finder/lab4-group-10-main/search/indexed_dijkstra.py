@@ -0,0 +1,112 @@
+from graph.edge import Edge, V
+from .searcher import Searcher, Result
+
+from utilities.priority_queue import IndexedPriorityQueue, PairingHeap
+
+
+class IndexedDijkstra(Searcher[V]):
+    """
+    Dijkstra's algorithm using an addressable priority queue with decrease-key.
+
+    `Dijkstra` adds a new queue entry every time it finds a path to a node,
+    and skips outdated entries when they are removed.
+    This version instead keeps every node at most once in the queue,
+    and lowers its priority when a better path is found.
+    Paths that are not better than the best known one are not added at all.
+    So the queue is never larger than the search frontier,
+    and every loop iteration settles a new node.
+
+    Instead of linked queue entries, the best known cost and the parent
+    of the best known path are stored in dictionaries indexed by node.
+    The parent is the previous node together with the weight of the edge from it,
+    and the `Edge` objects are only created for the final path.
+    """
+
+    def new_queue(self) -> IndexedPriorityQueue[V] | PairingHeap[V]:
+        """Creates the priority queue used by the search."""
+        return IndexedPriorityQueue()
+
+    def priority(self, v: V, cost_to_here: float) -> float:
+        """The priority of a node, given the cost of the best known path to it."""
+        return cost_to_here
+
+    def search(self) -> Result[V]:
+        """
+        Uniform cost search for a path in `graph` from `start` to `goal`.
+        Returns the search result (which includes the path found if successful).
+        """
+        iterations = 0
+        pqueue = self.new_queue()
+        cost_to: dict[V, float] = {self.start: 0}
+        parent: dict[V, tuple[V, float] | None] = {self.start: None}
+        visited: set[V] = set()
+
+        pqueue.add(self.start, self.priority(self.start, 0))
+        while not pqueue.is_empty():
+            node, _ = pqueue.remove_min()
+            iterations += 1
+            visited.add(node)
+
+            if node == self.goal:
+                return self.success(cost_to[node], self.extract_path(parent, node), iterations)
+
+            cost_to_node = cost_to[node]
+            for neighbour, weight in self.graph.outgoing_neighbours(node):
+                if neighbour in visited:
+                    continue
+                cost_to_here = cost_to_node + weight
+                # Only improving paths are added to the queue.
+                if cost_to_here < cost_to.get(neighbour, float("inf")):
+                    cost_to[neighbour] = cost_to_here
+                    parent[neighbour] = (node, weight)
+                    pqueue.add_or_decrease(neighbour, self.priority(neighbour, cost_to_here))
+
+        return self.failure(iterations)
+
+    def extract_path(self, parent: dict[V, tuple[V, float] | None], node: V) -> list[Edge[V]]:
+        """
+        Extracts the path from the start to the given node,
+        by following the parents backwards.
+        """
+        path: list[Edge[V]] = []
+        step = parent[node]
+        while step is not None:
+            previous, weight = step
+            path.append(Edge(previous, node, weight))
+            node = previous
+            step = parent[node]
+        path.reverse()
+        return path
+
+
+class IndexedAStar(IndexedDijkstra[V]):
+    """
+    The A* algorithm using an addressable priority queue with decrease-key.
+    The nodes are prioritised by the cost to get there plus the guessed cost to the goal.
+    The guessed cost is only computed once per node.
+    """
+    guesses: dict[V, float]
+
+    def search(self) -> Result[V]:
+        self.guesses = {}
+        return super().search()
+
+    def priority(self, v: V, cost_to_here: float) -> float:
+        guess = self.guesses.get(v)
+        if guess is None:
+            guess = self.guesses[v] = self.graph.guess_cost(v, self.goal)
+        return cost_to_here + guess
+
+
+class PairingHeapDijkstra(IndexedDijkstra[V]):
+    """`IndexedDijkstra`, using a pairing heap instead of a 4-ary heap."""
+
+    def new_queue(self) -> PairingHeap[V]:
+        return PairingHeap()
+
+
+class PairingHeapAStar(IndexedAStar[V]):
+    """`IndexedAStar`, using a pairing heap instead of a 4-ary heap."""
+
+    def new_queue(self) -> PairingHeap[V]:
+        return PairingHeap()
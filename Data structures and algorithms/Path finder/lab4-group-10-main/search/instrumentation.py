@@ -0,0 +1,194 @@
+import time
+import heapq
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any, TextIO
+
+from graph.graph import Graph
+from utilities.priority_queue import IndexedPriorityQueue, PairingHeap
+
+
+# Held while an instrumentation is attached, because it replaces module-wide functions and methods.
+_attached = threading.Lock()
+
+class Instrumentation:
+    """
+    Counters that show where a search spends its time:
+    is it bound by the priority queue, by expanding nodes, or by the heuristic?
+
+    The searchers themselves are not changed at all. Instead, while `attached` is active,
+    the graph's `outgoing_neighbours`, `incoming_neighbours`, `outgoing_edges`,
+    `incoming_edges` and `guess_cost` methods are replaced by wrappers (on the graph instance only), and so are the operations of the
+    priority queues (`heapq.heappush` and `heapq.heappop`, and `add` and `remove_min`
+    of the indexed queues). So instrumentation costs nothing when it is not used.
+
+    An expansion is a call to one of the neighbour or edge methods.
+    Pops that don't lead to an expansion are counted as stale: these are the outdated
+    entries of nodes that are already expanded (and the final pop of the goal).
+    The visited size is the number of distinct expanded nodes.
+    (Searchers that don't use the graph's methods or a priority queue,
+    such as jump point search, are only partially counted.)
+
+    If a trace file is given, every expansion is written to it as a tab-separated line:
+    the expansion number, the direction ("out" or "in"), the node, the number of edges,
+    and the time since the start of the search in microseconds.
+    """
+    trace: TextIO | None
+
+    pushes: int
+    pops: int
+    peak_heap: int          # the largest size of a priority queue
+    expansions: int
+    expanded: set[Any]      # the distinct expanded nodes
+    edges: int              # the total number of edges returned by the expansions
+    edges_time: float       # the time spent in the neighbour and edge methods
+    guesses: int            # the number of calls to `guess_cost`
+    guess_time: float       # the time spent in `guess_cost`
+    search_time: float      # the total time while attached
+
+    def __init__(self, trace: TextIO | None = None):
+        self.trace = trace
+        self.reset()
+
+    def reset(self):
+        """Sets all counters to 0."""
+        self.pushes = self.pops = self.peak_heap = 0
+        self.expansions = self.edges = self.guesses = 0
+        self.expanded = set()
+        self.edges_time = self.guess_time = self.search_time = 0.0
+
+    @property
+    def stale_pops(self) -> int:
+        return max(0, self.pops - self.expansions)
+
+    @property
+    def peak_visited(self) -> int:
+        return len(self.expanded)
+
+    @contextmanager
+    def attached(self, graph: Graph[Any]) -> Iterator['Instrumentation']:
+        """
+        Counts everything that happens in `graph` and the priority queues within the `with` block:
+
+            with instrumentation.attached(graph):
+                result = searcher.search()
+
+        This replaces the functions of `heapq` and the methods of the queue classes for the whole
+        process, so it is only meant for the single-threaded command line (see path_finder.py).
+        Only one instrumentation can be attached at a time: otherwise this raises a RuntimeError.
+        """
+        if not _attached.acquire(blocking=False):
+            raise RuntimeError("Another instrumentation is already attached")
+        clock = time.perf_counter
+        started = clock()
+        originals = {
+            "heappush": heapq.heappush, "heappop": heapq.heappop,
+            "indexed_add": IndexedPriorityQueue.add, "indexed_remove_min": IndexedPriorityQueue.remove_min,
+            "pairing_add": PairingHeap.add, "pairing_remove_min": PairingHeap.remove_min,
+        }
+
+        # The graph methods call each other (for example, the default `outgoing_neighbours`
+        # calls `outgoing_edges`), which should not count as another expansion.
+        expanding = False
+
+        def expansions(get_edges: Callable[[Any], Any], direction: str) -> Callable[[Any], Any]:
+            def instrumented(v: Any) -> Any:
+                nonlocal expanding
+                if expanding:
+                    return get_edges(v)
+                expanding = True
+                before = clock()
+                try:
+                    result = get_edges(v)
+                finally:
+                    expanding = False
+                after = clock()
+                self.edges_time += after - before
+                self.expansions += 1
+                self.expanded.add(v)
+                self.edges += len(result)
+                if self.trace:
+                    self.trace.write(f"{self.expansions}\t{direction}\t{v}\t{len(result)}\t"
+                                     f"{(after - started) * 1e6:.0f}\n")
+                return result
+            return instrumented
+
+        def guesses(guess_cost: Callable[[Any, Any], float]) -> Callable[[Any, Any], float]:
+            def instrumented(v: Any, w: Any) -> float:
+                before = clock()
+                result = guess_cost(v, w)
+                self.guess_time += clock() - before
+                self.guesses += 1
+                return result
+            return instrumented
+
+        def pushes(push: Callable[..., Any], size: Callable[[Any], int]) -> Callable[..., Any]:
+            def instrumented(queue: Any, *args: Any) -> Any:
+                push(queue, *args)
+                self.pushes += 1
+                n = size(queue)
+                if n > self.peak_heap:
+                    self.peak_heap = n
+            return instrumented
+
+        def pops(pop: Callable[[Any], Any]) -> Callable[[Any], Any]:
+            def instrumented(queue: Any) -> Any:
+                self.pops += 1
+                return pop(queue)
+            return instrumented
+
+        # Instance attributes hide the methods of the class.
+        graph.outgoing_neighbours = expansions(graph.outgoing_neighbours, "out")  # type: ignore
+        graph.incoming_neighbours = expansions(graph.incoming_neighbours, "in")  # type: ignore
+        graph.outgoing_edges = expansions(graph.outgoing_edges, "out")  # type: ignore
+        graph.incoming_edges = expansions(graph.incoming_edges, "in")  # type: ignore
+        graph.guess_cost = guesses(graph.guess_cost)  # type: ignore
+        heapq.heappush = pushes(originals["heappush"], len)
+        heapq.heappop = pops(originals["heappop"])
+        IndexedPriorityQueue.add = pushes(originals["indexed_add"], len)  # type: ignore
+        IndexedPriorityQueue.remove_min = pops(originals["indexed_remove_min"])  # type: ignore
+        PairingHeap.add = pushes(originals["pairing_add"], len)  # type: ignore
+        PairingHeap.remove_min = pops(originals["pairing_remove_min"])  # type: ignore
+        try:
+            yield self
+        finally:
+            del graph.outgoing_neighbours, graph.incoming_neighbours
+            del graph.outgoing_edges, graph.incoming_edges, graph.guess_cost
+            heapq.heappush = originals["heappush"]
+            heapq.heappop = originals["heappop"]
+            IndexedPriorityQueue.add = originals["indexed_add"]  # type: ignore
+            IndexedPriorityQueue.remove_min = originals["indexed_remove_min"]  # type: ignore
+            PairingHeap.add = originals["pairing_add"]  # type: ignore
+            PairingHeap.remove_min = originals["pairing_remove_min"]  # type: ignore
+            self.search_time += clock() - started
+            _attached.release()
+
+    def counters(self) -> dict[str, int | float]:
+        """All counters, for example for dumping as JSON."""
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "peak_heap": self.peak_heap,
+            "expansions": self.expansions,
+            "peak_visited": self.peak_visited,
+            "edges": self.edges,
+            "edges_time": self.edges_time,
+            "guesses": self.guesses,
+            "guess_time": self.guess_time,
+            "search_time": self.search_time,
+        }
+
+    def to_string(self) -> str:
+        def percent(t: float) -> str:
+            return f"{100 * t / self.search_time:.0f}%" if self.search_time > 0 else "-"
+        return "\n".join([
+            f"Queue:       {self.pushes} pushes, {self.pops} pops ({self.stale_pops} stale), "
+            f"peak size {self.peak_heap}",
+            f"Expansions:  {self.expansions} of {self.peak_visited} distinct nodes, {self.edges} edges, "
+            f"{self.edges_time:.3f} s ({percent(self.edges_time)} of the search time)",
+            f"Heuristic:   {self.guesses} calls, "
+            f"{self.guess_time:.3f} s ({percent(self.guess_time)} of the search time)",
+            f"Search time: {self.search_time:.3f} s",
+        ])
@@ -0,0 +1,173 @@
+import heapq
+from math import sqrt
+
+from graph.edge import Edge
+from graph.graph import Graph
+from graph.point import Point
+from graph.grid_graph import GridGraph
+from .searcher import Searcher, Result
+
+
+SQRT2 = sqrt(2)
+
+
+class JumpPointSearch(Searcher[Point]):
+    """
+    Jump point search (Harabor & Grastien, 2011), for grid graphs.
+
+    This is A* on a uniform-cost 8-connected grid, but instead of adding all
+    neighbours of a node to the queue, it "jumps" in straight lines over all
+    cells that have an equally good path that doesn't pass through the
+    current node. Only the cells where the path might have to turn
+    (the jump points) are added to the queue.
+    In open areas, this means that very few cells are ever expanded.
+
+    The pruning rules are the ones for grids where diagonal moves may cut
+    corners, because that's how `GridGraph` is defined.
+    The resulting path is optimal, and it is expanded back into single-cell
+    edges, so it can be validated and drawn like any other path.
+    """
+    graph: GridGraph
+
+    def __init__(self, graph: Graph[Point], start: Point, goal: Point):
+        if not isinstance(graph, GridGraph):
+            raise ValueError("Jump point search only works on grid graphs.")
+        super().__init__(graph, start, goal)
+
+    def search(self) -> Result[Point]:
+        """
+        Jump point search for a path in `graph` from `start` to `goal`.
+        Every jump point removed from the priority queue counts as one iteration.
+        """
+        start, goal = self.start, self.goal
+        iterations = 0
+        cost_to: dict[Point, float] = {start: 0.0}
+        parent: dict[Point, Point | None] = {start: None}
+        visited: set[Point] = set()
+        heap: list[tuple[float, int, Point]] = [(octile_distance(start, goal), 0, start)]
+        counter = -1
+
+        while heap:
+            _, _, node = heapq.heappop(heap)
+            iterations += 1
+            if node in visited:
+                continue
+            visited.add(node)
+
+            if node == goal:
+                path = self.extract_path(parent, node)
+                cost = 0.0
+                for edge in path:
+                    cost += edge.weight
+                return self.success(cost, path, iterations)
+
+            for dx, dy in self.successor_directions(node, parent[node]):
+                jump_point = self.jump(node.x, node.y, dx, dy)
+                if jump_point is None:
+                    continue
+                cost_to_here = cost_to[node] + octile_distance(node, jump_point)
+                if cost_to_here < cost_to.get(jump_point, float("inf")):
+                    cost_to[jump_point] = cost_to_here
+                    parent[jump_point] = node
+                    priority = cost_to_here + octile_distance(jump_point, goal)
+                    heapq.heappush(heap, (priority, counter, jump_point))
+                    counter -= 1
+
+        return self.failure(iterations)
+
+    def successor_directions(self, node: Point, parent: Point | None) -> list[tuple[int, int]]:
+        """
+        Returns the directions that have to be searched from `node`,
+        when it was reached from `parent`: the natural neighbours
+        (continuing in the same direction) plus the forced neighbours
+        (which are only reachable optimally through `node` because of an obstacle).
+        """
+        if parent is None:
+            return [(d.x, d.y) for d in GridGraph.directions]
+        x, y = node
+        dx = (x > parent.x) - (x < parent.x)
+        dy = (y > parent.y) - (y < parent.y)
+        passable = self.graph.passable_at
+        if dx and dy:
+            directions = [(dx, 0), (0, dy), (dx, dy)]
+            if not passable(x - dx, y):
+                directions.append((-dx, dy))
+            if not passable(x, y - dy):
+                directions.append((dx, -dy))
+        elif dx:
+            directions = [(dx, 0)]
+            if not passable(x, y + 1):
+                directions.append((dx, 1))
+            if not passable(x, y - 1):
+                directions.append((dx, -1))
+        else:
+            directions = [(0, dy)]
+            if not passable(x + 1, y):
+                directions.append((1, dy))
+            if not passable(x - 1, y):
+                directions.append((-1, dy))
+        return directions
+
+    def jump(self, x: int, y: int, dx: int, dy: int) -> Point | None:
+        """
+        Moves from (x, y) in the direction (dx, dy) until reaching a jump point:
+        the goal, a cell with a forced neighbour, or (for diagonal moves)
+        a cell from which a straight jump finds a jump point.
+        Returns None if we hit an obstacle or the border first.
+        """
+        passable = self.graph.passable_at
+        goal = self.goal
+        while True:
+            x += dx
+            y += dy
+            if not passable(x, y):
+                return None
+            if x == goal.x and y == goal.y:
+                return Point(x, y)
+            if dx and dy:
+                if ((not passable(x - dx, y) and passable(x - dx, y + dy)) or
+                        (not passable(x, y - dy) and passable(x + dx, y - dy))):
+                    return Point(x, y)
+                if self.jump(x, y, dx, 0) or self.jump(x, y, 0, dy):
+                    return Point(x, y)
+            elif dx:
+                if ((not passable(x, y + 1) and passable(x + dx, y + 1)) or
+                        (not passable(x, y - 1) and passable(x + dx, y - 1))):
+                    return Point(x, y)
+            else:
+                if ((not passable(x + 1, y) and passable(x + 1, y + dy)) or
+                        (not passable(x - 1, y) and passable(x - 1, y + dy))):
+                    return Point(x, y)
+
+    def extract_path(self, parent: dict[Point, Point | None], node: Point) -> list[Edge[Point]]:
+        """
+        Extracts the path from the start to the given jump point,
+        with every jump expanded into single steps between neighbouring cells.
+        """
+        jump_points: list[Point] = []
+        current: Point | None = node
+        while current is not None:
+            jump_points.append(current)
+            current = parent[current]
+        jump_points.reverse()
+
+        path: list[Edge[Point]] = []
+        for p, q in zip(jump_points, jump_points[1:]):
+            dx = (q.x > p.x) - (q.x < p.x)
+            dy = (q.y > p.y) - (q.y < p.y)
+            weight = sqrt(dx*dx + dy*dy)
+            while p != q:
+                next = Point(p.x + dx, p.y + dy)
+                path.append(Edge(p, next, weight))
+                p = next
+        return path
+
+
+def octile_distance(p: Point, q: Point) -> float:
+    """
+    The cost of the shortest path between two points on an empty 8-connected grid.
+    This is a consistent heuristic for grid graphs, and better than the Euclidean distance.
+    """
+    dx = abs(p.x - q.x)
+    dy = abs(p.y - q.y)
+    return abs(dx - dy) + SQRT2 * min(dx, dy)
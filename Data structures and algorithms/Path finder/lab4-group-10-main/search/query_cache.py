@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from collections.abc import Collection
+from dataclasses import replace
+from typing import Any, Generic
+
+from graph.graph import Graph, V
+from .searcher import Searcher, Result
+from .shortest_path_tree import ShortestPathTree, TreeSearch
+
+
+class QueryCache(Generic[V]):
+    """
+    A cache for repeated and overlapping queries in one graph.
+
+    It remembers the results of the most recent queries, in a bounded LRU cache
+    (least recently used results are forgotten first), so a repeated query is not searched again.
+
+    For the algorithms in `tree_searchers` (variants of Dijkstra's algorithm),
+    queries are answered from a `ShortestPathTree` from the start node, and the trees
+    of the most recently used start nodes are kept too. So a later query from the same start
+    is answered without searching if its goal is already settled in the tree,
+    and otherwise the tree just continues growing from where it stopped.
+    """
+    graph: Graph[V]
+    tree_searchers: Collection[type[Searcher[Any]]]
+    max_results: int
+    max_trees: int
+    results: OrderedDict[tuple[type[Searcher[Any]], V, V], Result[V]]
+    trees: OrderedDict[V, ShortestPathTree[V]]
+
+    # Statistics:
+    hits: int           # queries whose result was cached
+    tree_hits: int      # queries whose goal was already settled in a cached tree
+    tree_resumes: int   # queries that continued growing a cached tree
+    misses: int         # queries that needed a new search (or a new tree)
+
+    def __init__(
+            self, graph: Graph[V], tree_searchers: Collection[type[Searcher[Any]]] = (),
+            max_results: int = 1000, max_trees: int = 16,
+    ):
+        self.graph = graph
+        self.tree_searchers = tree_searchers
+        self.max_results = max_results
+        self.max_trees = max_trees
+        self.results = OrderedDict()
+        self.trees = OrderedDict()
+        self.hits = self.tree_hits = self.tree_resumes = self.misses = 0
+
+    def search(self, algorithm: type[Searcher[V]], start: V, goal: V) -> Result[V]:
+        """Returns the result of searching for a path from `start` to `goal` with `algorithm`."""
+        key = (algorithm, start, goal)
+        result = self.results.get(key)
+        if result is not None:
+            self.results.move_to_end(key)
+            self.hits += 1
+            return result
+
+        searcher = algorithm(self.graph, start, goal)
+        # Don't bother searching (or growing a tree) if we already know that there is no path.
+        reason = self.graph.unreachable_reason(start, goal)
+        if reason:
+            self.misses += 1
+            result = searcher.failure(0, reason)
+        elif algorithm in self.tree_searchers:
+            # The cached result refers to `searcher` instead of the TreeSearch,
+            # which would keep the whole tree alive after it is evicted.
+            result = replace(TreeSearch(self.tree_from(start, goal), goal).search(), query=searcher)
+        else:
+            self.misses += 1
+            result = searcher.search()
+
+        self.results[key] = result
+        if len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+        return result
+
+    def tree_from(self, start: V, goal: V) -> ShortestPathTree[V]:
+        """Returns the cached tree from `start` (or a new one), and updates the statistics."""
+        tree = self.trees.get(start)
+        if tree is None:
+            self.misses += 1
+            tree = self.trees[start] = ShortestPathTree(self.graph, start)
+            if len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        else:
+            self.trees.move_to_end(start)
+            if goal in tree.settled:
+                self.tree_hits += 1
+            else:
+                self.tree_resumes += 1
+        return tree
+
+    def statistics(self) -> str:
+        """A summary of the hits and misses so far."""
+        queries = self.hits + self.tree_hits + self.tree_resumes + self.misses
+        return (
+            f"Query cache: {queries} queries, {self.hits} cached results, "
+            f"{self.tree_hits} answered from shortest path trees, "
+            f"{self.tree_resumes} resumed a tree, {self.misses} new searches."
+        )
@@ -23,14 +23,14 @@ class RandomWalk(Searcher[V]):
             if current == self.goal:
                 return self.success(cost, path, iterations)
 
-            neighbours = self.graph.outgoing_edges(current)
+            neighbours = self.graph.outgoing_neighbours(current)
             if len(neighbours) == 0:
                 break
 
-            edge = random.choice(neighbours)
-            path.append(edge)
-            cost += edge.weight
-            current = edge.end
+            neighbour, weight = random.choice(neighbours)
+            path.append(Edge(current, neighbour, weight))
+            cost += weight
+            current = neighbour
 
         return self.failure(iterations)
 
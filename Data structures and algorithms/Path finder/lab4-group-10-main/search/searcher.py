@@ -28,13 +28,22 @@ class Searcher(ABC, Generic[V]):
         Returns the search result (which includes the path found if successful).
         """
 
-    def success(self, cost: float, path: list[Edge[V]]|None, iterations: int) -> "Result[V]":
-        """Construct a success result (path found)."""
-        return Result(self, True, cost, path, iterations)
+    def success(
+            self, cost: float, path: list[Edge[V]]|None, iterations: int, bound: float | None = None,
+    ) -> "Result[V]":
+        """
+        Construct a success result (path found).
+        If the path is not always optimal, the searcher can give a proven `bound`:
+        the cost is at most `bound` times the optimal cost.
+        """
+        return Result(self, True, cost, path, iterations, bound=bound)
 
-    def failure(self, iterations: int) -> "Result[V]":
-        """Construct a failure result (no path found)."""
-        return Result(self, False, -1, None, iterations)
+    def failure(self, iterations: int, reason: str | None = None) -> "Result[V]":
+        """
+        Construct a failure result (no path found).
+        If we know why there is no path, without searching, it can be given as the `reason`.
+        """
+        return Result(self, False, -1, None, iterations, reason)
 
 
 # Dataclasses provide a lot of methods for free, such as __init__ and comparison:
@@ -51,6 +60,8 @@ class Result(Generic[V]):
     cost: float
     path: list[Edge[V]] | None
     iterations: int
+    reason: str | None = None   # why there is no path (if known without searching)
+    bound: float | None = None  # the cost is at most this many times the optimal cost (if known)
 
     @property
     def graph(self):
@@ -88,7 +99,8 @@ class Result(Generic[V]):
                 raise ValueError("Failure reported, but path is not null.")
 
     def validate_iterations(self):
-        if self.iterations <= 0:
+        # If we know the reason for a failure, we don't have to search at all.
+        if self.iterations <= 0 and self.reason is None:
             raise ValueError("The number of iterations should be > 0.")
 
     def validate(self):
@@ -114,8 +126,12 @@ class Result(Generic[V]):
             c = self.cost
             decimals = 0 if c == round(c, 0) else 1 if c == round(c, 1) else 2
             lines.append(f"Cost of path from {self.start} to {self.goal}: {c:.{decimals}f}")
+            if self.bound is not None:
+                lines.append(f"Suboptimality bound: {self.bound:.3f} (at most {100 * (self.bound - 1):.1f}% above the optimal cost)")
         else:
             lines.append(f"No path from {self.start} to {self.goal} found.")
+            if self.reason:
+                lines.append(f"Reason: {self.reason}.")
 
         try:
             self.validate_path()
@@ -0,0 +1,151 @@
+import heapq
+from collections.abc import Iterable
+from typing import Generic
+
+from graph.edge import Edge, V
+from graph.graph import Graph
+from .searcher import Searcher, Result
+
+
+class ShortestPathTree(Generic[V]):
+    """
+    The shortest path tree of Dijkstra's algorithm from one root node,
+    for answering many queries with the same start (or, backwards, with the same goal).
+
+    The tree is grown lazily: `grow` continues the search only until the requested
+    nodes are settled, and keeps the heap so that a later call can continue where
+    the previous one stopped. So a batch of queries from one start costs a single
+    search, as far as the farthest goal, instead of one search per goal.
+
+    If `forward` is False, the tree follows the incoming edges,
+    and contains the shortest paths from every node to the root.
+    """
+    graph: Graph[V]
+    root: V
+    forward: bool
+    cost_to: dict[V, float]                 # the best known cost for each reached node
+    parent: dict[V, tuple[V, float] | None] # the previous node of the best known path, and the edge weight
+    settled: dict[V, int]                   # the settled nodes, with the iterations needed to settle them
+    heap: list[tuple[float, int, V]]
+    counter: int
+    iterations: int
+
+    def __init__(self, graph: Graph[V], root: V, forward: bool = True):
+        self.graph = graph
+        self.root = root
+        self.forward = forward
+        self.cost_to = {root: 0.0}
+        self.parent = {root: None}
+        self.settled = {}
+        self.heap = [(0.0, 0, root)]
+        self.counter = -1
+        self.iterations = 0
+
+    def grow(self, nodes: Iterable[V]):
+        """
+        Continues Dijkstra's algorithm until all the given nodes are settled,
+        or until everything reachable is settled.
+        Nodes that the graph knows to be unreachable (see `Graph.unreachable_reason`) are skipped.
+        """
+        settled, root = self.settled, self.root
+        unreachable_reason = self.graph.unreachable_reason
+        remaining = {
+            v for v in nodes if v not in settled and
+            (unreachable_reason(root, v) if self.forward else unreachable_reason(v, root)) is None
+        }
+        if not remaining:
+            return
+        heappush, heappop = heapq.heappush, heapq.heappop
+        neighbours_of = self.graph.outgoing_neighbours if self.forward else self.graph.incoming_neighbours
+        cost_to, parent, heap = self.cost_to, self.parent, self.heap
+        infinity = float("inf")
+        counter, iterations = self.counter, self.iterations
+
+        while heap and remaining:
+            _, _, node = heappop(heap)
+            iterations += 1
+            if node in settled:
+                continue
+            settled[node] = iterations
+            remaining.discard(node)
+
+            cost_to_node = cost_to[node]
+            for neighbour, weight in neighbours_of(node):
+                cost_to_here = cost_to_node + weight
+                if cost_to_here < cost_to.get(neighbour, infinity):
+                    cost_to[neighbour] = cost_to_here
+                    parent[neighbour] = (node, weight)
+                    heappush(heap, (cost_to_here, counter, neighbour))
+                    counter -= 1
+
+        self.counter, self.iterations = counter, iterations
+
+    def distance(self, node: V) -> float | None:
+        """
+        The cost of the shortest path between the root and `node`,
+        or None if there is no path. Grows the tree if necessary.
+        """
+        self.grow((node,))
+        return self.cost_to[node] if node in self.settled else None
+
+    def path(self, node: V) -> list[Edge[V]]:
+        """
+        The shortest path between the root and the settled node `node`, in the direction of the edges:
+        from the root to `node` if the tree is forward, and from `node` to the root otherwise.
+        """
+        path: list[Edge[V]] = []
+        step = self.parent[node]
+        while step is not None:
+            previous, weight = step
+            path.append(Edge(previous, node, weight) if self.forward else Edge(node, previous, weight))
+            node = previous
+            step = self.parent[node]
+        if self.forward:
+            path.reverse()
+        return path
+
+
+class TreeSearch(Searcher[V]):
+    """
+    A query that is answered from a shared forward `ShortestPathTree` from `start`.
+
+    The iteration count is the number of iterations the tree needed to settle the goal,
+    which is what a separate run of Dijkstra's algorithm would have needed.
+    """
+    tree: ShortestPathTree[V]
+
+    def __init__(self, tree: ShortestPathTree[V], goal: V):
+        assert tree.forward, "Queries need a forward tree"
+        self.tree = tree
+        super().__init__(tree.graph, tree.root, goal)
+
+    def search(self) -> Result[V]:
+        tree, goal = self.tree, self.goal
+        if tree.distance(goal) is None:
+            return self.failure(tree.iterations, self.graph.unreachable_reason(self.start, goal))
+        path = tree.path(goal)
+        cost = 0.0
+        for edge in path:
+            cost += edge.weight
+        return self.success(cost, path, tree.settled[goal])
+
+
+def distance_matrix(graph: Graph[V], sources: list[V], targets: list[V]) -> list[list[float | None]]:
+    """
+    The costs of the shortest paths from every source to every target (None if there is no path).
+    We grow one shortest path tree per source, forward until all targets are settled;
+    or, if there are fewer targets than sources, one tree per target, backwards.
+    """
+    if len(targets) < len(sources):
+        columns: list[list[float | None]] = []
+        for target in targets:
+            tree = ShortestPathTree(graph, target, forward=False)
+            tree.grow(sources)
+            columns.append([tree.distance(source) for source in sources])
+        return [list(row) for row in zip(*columns)] if columns else [[] for _ in sources]
+    matrix: list[list[float | None]] = []
+    for source in sources:
+        tree = ShortestPathTree(graph, source)
+        tree.grow(targets)
+        matrix.append([tree.distance(target) for target in targets])
+    return matrix
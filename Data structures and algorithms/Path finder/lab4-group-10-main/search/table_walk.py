@@ -0,0 +1,52 @@
+from graph.edge import Edge
+from graph.graph import Graph
+from graph.sliding_puzzle import SlidingPuzzle, SlidingPuzzleState
+from .searcher import Searcher, Result
+
+
+class TableWalk(Searcher[SlidingPuzzleState]):
+    """
+    Solves a small sliding puzzle without searching, using a precomputed
+    solution table (see `graph.solution_table.SolutionTable`).
+
+    The table gives the exact distance from every state to the goal.
+    So from every state on an optimal path, some move leads to a state
+    with distance one less, and we just follow such moves until we reach the goal.
+    """
+    graph: SlidingPuzzle
+
+    def __init__(self, graph: Graph[SlidingPuzzleState], start: SlidingPuzzleState, goal: SlidingPuzzleState):
+        if not (isinstance(graph, SlidingPuzzle) and graph.solution_table is not None):
+            raise ValueError("Table walk only works on sliding puzzles with a solution table (--solution-table).")
+        super().__init__(graph, start, goal)
+
+    def search(self) -> Result[SlidingPuzzleState]:
+        """
+        Walks from `start` to `goal` along decreasing distances.
+        Every state on the path counts as one iteration.
+        """
+        graph, goal = self.graph, self.goal
+        table = graph.solution_table
+        assert table is not None
+        iterations = 1
+        distance = table.distance(self.start.board, goal.board)
+        if distance is None:
+            return self.failure(iterations)
+
+        path: list[Edge[SlidingPuzzleState]] = []
+        node = self.start
+        while distance > 0:
+            for neighbour, weight in graph.outgoing_neighbours(node):
+                if table.distance(neighbour.board, goal.board) == distance - 1:
+                    break
+            else:
+                raise ValueError("The solution table is inconsistent.")
+            path.append(Edge(node, neighbour, weight))
+            node = neighbour
+            distance -= 1
+            iterations += 1
+
+        cost = 0.0
+        for edge in path:
+            cost += edge.weight
+        return self.success(cost, path, iterations)
@@ -34,7 +34,8 @@ class CommandParser(ArgumentParser):
 
     def parse_interactive(self, result: Namespace) -> Namespace:
         """
-        Ask for the value of each argument interactively.
+        Ask for the value of each required argument interactively.
+        Optional arguments get their default values.
         """
         print("Note: You can also pass command-line arguments.")
         print()
@@ -48,6 +49,9 @@ class CommandParser(ArgumentParser):
             if action.nargs == "?" or action.nargs == "*":
                 setattr(result, action.dest, None)
                 continue
+            if not action.required:
+                setattr(result, action.dest, action.default)
+                continue
 
             prompt = " * " + (action.help or f"value for variable {action.dest}")
             if action.const:
@@ -58,8 +62,6 @@ class CommandParser(ArgumentParser):
                 prompt += f" (ENTER for {action.default})"
             elif action.const is True:
                 prompt += f" (no/-/ENTER for False)"
-            elif not action.required:
-                prompt += f" (ENTER for nothing)"
             prompt += ": "
 
             value: Any = None
@@ -91,9 +93,6 @@ class CommandParser(ArgumentParser):
                         value = None
                         continue
 
-                if not action.required:
-                    break
-
             setattr(result, action.dest, value)
 
         return result
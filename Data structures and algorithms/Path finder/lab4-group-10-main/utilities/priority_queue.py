@@ -1,6 +1,6 @@
 
 import heapq
-from typing import TypeVar, Generic, List
+from typing import Any, Dict, Generic, List, Tuple, TypeVar
 
 E = TypeVar('E')
 
@@ -45,3 +45,306 @@ class PriorityQueue(Generic[E]):
         return self.heap[0]
 
 
+
+class IndexedPriorityQueue(Generic[E]):
+    """
+    An addressable priority queue, implemented as a d-ary heap.
+
+    Unlike `PriorityQueue`, every element is stored together with a separate
+    priority, and every element can be in the queue at most once.
+    A dictionary keeps track of the position of each element in the heap,
+    so that the priority of an element can be decreased in O(log n) time.
+    This means that the size of the queue is bounded by the number of
+    distinct elements, not by the number of times they were added.
+
+    A 4-ary heap is usually faster than a binary heap, because it is shallower
+    and sifting down is dominated by comparisons of adjacent list elements.
+    """
+    arity: int
+    elements: List[E]
+    priorities: List[Any]
+    index: Dict[E, int]
+
+    def __init__(self, arity: int = 4):
+        if arity < 2:
+            raise ValueError("The arity of the heap must be at least 2.")
+        self.arity = arity
+        self.elements = []
+        self.priorities = []
+        self.index = {}
+
+    def is_empty(self) -> bool:
+        """Returns true if the priority queue is empty."""
+        return len(self.elements) == 0
+
+    def size(self) -> int:
+        """Returns the number of elements in this priority queue."""
+        return len(self.elements)
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def __contains__(self, e: E) -> bool:
+        return e in self.index
+
+    def priority(self, e: E) -> Any:
+        """
+        Returns the priority of an element in the queue.
+        Raises a KeyError if the element is not in the queue.
+        """
+        return self.priorities[self.index[e]]
+
+    def add(self, e: E, priority: Any):
+        """
+        Adds e to the priority queue.
+        Raises a KeyError if e is already in the queue.
+        """
+        if e in self.index:
+            raise KeyError(f"Element is already in the queue: {e}")
+        self.elements.append(e)
+        self.priorities.append(priority)
+        self.index[e] = len(self.elements) - 1
+        self.sift_up(len(self.elements) - 1)
+
+    def decrease_key(self, e: E, priority: Any):
+        """
+        Lowers the priority of an element in the queue.
+        Raises a KeyError if e is not in the queue,
+        and a ValueError if the new priority is larger than the old one.
+        """
+        i = self.index[e]
+        if self.priorities[i] < priority:
+            raise ValueError("The new priority must not be larger than the old one.")
+        self.priorities[i] = priority
+        self.sift_up(i)
+
+    def add_or_decrease(self, e: E, priority: Any) -> bool:
+        """
+        Adds e with the given priority, or lowers its priority if it is already in the queue.
+        Returns False (and does nothing) if e is already in the queue with a lower priority.
+        """
+        i = self.index.get(e)
+        if i is None:
+            self.add(e, priority)
+        elif priority < self.priorities[i]:
+            self.priorities[i] = priority
+            self.sift_up(i)
+        else:
+            return False
+        return True
+
+    def remove_min(self) -> Tuple[E, Any]:
+        """
+        Removes and returns the minimum element, together with its priority.
+        Raises an IndexError if the priority queue is empty.
+        """
+        elements, priorities = self.elements, self.priorities
+        e, p = elements[0], priorities[0]
+        del self.index[e]
+        last_e, last_p = elements.pop(), priorities.pop()
+        if elements:
+            elements[0], priorities[0] = last_e, last_p
+            self.index[last_e] = 0
+            self.sift_down(0)
+        return e, p
+
+    def get_min(self) -> Tuple[E, Any]:
+        """
+        Returns the minimum element together with its priority, without removing it.
+        Raises an IndexError if the priority queue is empty.
+        """
+        return self.elements[0], self.priorities[0]
+
+    def sift_up(self, i: int):
+        """Moves the element at position i upwards until the heap is ordered."""
+        elements, priorities, index, arity = self.elements, self.priorities, self.index, self.arity
+        e, p = elements[i], priorities[i]
+        while i > 0:
+            parent = (i - 1) // arity
+            if not p < priorities[parent]:
+                break
+            elements[i] = elements[parent]
+            priorities[i] = priorities[parent]
+            index[elements[i]] = i
+            i = parent
+        elements[i], priorities[i] = e, p
+        index[e] = i
+
+    def sift_down(self, i: int):
+        """Moves the element at position i downwards until the heap is ordered."""
+        elements, priorities, index, arity = self.elements, self.priorities, self.index, self.arity
+        n = len(elements)
+        e, p = elements[i], priorities[i]
+        while True:
+            first = i * arity + 1
+            if first >= n:
+                break
+            smallest = first
+            for child in range(first + 1, min(first + arity, n)):
+                if priorities[child] < priorities[smallest]:
+                    smallest = child
+            if not priorities[smallest] < p:
+                break
+            elements[i] = elements[smallest]
+            priorities[i] = priorities[smallest]
+            index[elements[i]] = i
+            i = smallest
+        elements[i], priorities[i] = e, p
+        index[e] = i
+
+
+class PairingHeapNode(Generic[E]):
+    """A node of a pairing heap: the element, its priority, and its links."""
+    __slots__ = ("element", "priority", "child", "sibling", "previous")
+
+    def __init__(self, element: E, priority: Any):
+        self.element = element
+        self.priority = priority
+        self.child: PairingHeapNode[E] | None = None
+        self.sibling: PairingHeapNode[E] | None = None
+        # The previous sibling, or the parent for the leftmost child.
+        self.previous: PairingHeapNode[E] | None = None
+
+
+class PairingHeap(Generic[E]):
+    """
+    An addressable priority queue, implemented as a pairing heap.
+    It has the same interface as `IndexedPriorityQueue`.
+
+    Adding elements and decreasing priorities take O(1) time,
+    by linking a new (or cut-off) subtree to the root.
+    Removing the minimum takes amortised O(log n) time,
+    using the standard two-pass pairing of the root's children.
+    """
+    root: PairingHeapNode[E] | None
+    nodes: Dict[E, PairingHeapNode[E]]
+
+    def __init__(self):
+        self.root = None
+        self.nodes = {}
+
+    def is_empty(self) -> bool:
+        """Returns true if the priority queue is empty."""
+        return self.root is None
+
+    def size(self) -> int:
+        """Returns the number of elements in this priority queue."""
+        return len(self.nodes)
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def __contains__(self, e: E) -> bool:
+        return e in self.nodes
+
+    def priority(self, e: E) -> Any:
+        """
+        Returns the priority of an element in the queue.
+        Raises a KeyError if the element is not in the queue.
+        """
+        return self.nodes[e].priority
+
+    def add(self, e: E, priority: Any):
+        """
+        Adds e to the priority queue.
+        Raises a KeyError if e is already in the queue.
+        """
+        if e in self.nodes:
+            raise KeyError(f"Element is already in the queue: {e}")
+        node = self.nodes[e] = PairingHeapNode(e, priority)
+        self.root = node if self.root is None else self.link(self.root, node)
+
+    def decrease_key(self, e: E, priority: Any):
+        """
+        Lowers the priority of an element in the queue.
+        Raises a KeyError if e is not in the queue,
+        and a ValueError if the new priority is larger than the old one.
+        """
+        node = self.nodes[e]
+        if node.priority < priority:
+            raise ValueError("The new priority must not be larger than the old one.")
+        node.priority = priority
+        if node is self.root:
+            return
+        # Cut the subtree out of its parent's child list, and link it with the root.
+        previous = node.previous
+        assert previous is not None and self.root is not None
+        if previous.child is node:
+            previous.child = node.sibling
+        else:
+            previous.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.previous = previous
+        node.sibling = node.previous = None
+        self.root = self.link(self.root, node)
+
+    def add_or_decrease(self, e: E, priority: Any) -> bool:
+        """
+        Adds e with the given priority, or lowers its priority if it is already in the queue.
+        Returns False (and does nothing) if e is already in the queue with a lower priority.
+        """
+        node = self.nodes.get(e)
+        if node is None:
+            self.add(e, priority)
+        elif priority < node.priority:
+            self.decrease_key(e, priority)
+        else:
+            return False
+        return True
+
+    def remove_min(self) -> Tuple[E, Any]:
+        """
+        Removes and returns the minimum element, together with its priority.
+        Raises an IndexError if the priority queue is empty.
+        """
+        root = self.root
+        if root is None:
+            raise IndexError("remove from an empty priority queue")
+        del self.nodes[root.element]
+
+        # First pass: link the children pairwise, from left to right.
+        pairs: List[PairingHeapNode[E]] = []
+        child = root.child
+        while child is not None:
+            second = child.sibling
+            if second is None:
+                child.previous = None
+                pairs.append(child)
+                break
+            rest = second.sibling
+            child.sibling = child.previous = None
+            second.sibling = second.previous = None
+            pairs.append(self.link(child, second))
+            child = rest
+
+        # Second pass: link the pairs from right to left.
+        new_root = pairs.pop() if pairs else None
+        while pairs:
+            assert new_root is not None
+            new_root = self.link(pairs.pop(), new_root)
+        self.root = new_root
+        return root.element, root.priority
+
+    def get_min(self) -> Tuple[E, Any]:
+        """
+        Returns the minimum element together with its priority, without removing it.
+        Raises an IndexError if the priority queue is empty.
+        """
+        if self.root is None:
+            raise IndexError("get_min from an empty priority queue")
+        return self.root.element, self.root.priority
+
+    @staticmethod
+    def link(a: PairingHeapNode[E], b: PairingHeapNode[E]) -> PairingHeapNode[E]:
+        """
+        Links two heap-ordered trees (both without siblings),
+        by making the one with larger priority the leftmost child of the other.
+        """
+        if b.priority < a.priority:
+            a, b = b, a
+        b.previous = a
+        b.sibling = a.child
+        if a.child is not None:
+            a.child.previous = b
+        a.child = b
+        return a
@@ -0,0 +1,47 @@
+import sys
+from collections.abc import Iterator
+from typing import TextIO
+
+
+def open_input(file: str) -> TextIO:
+    """Opens a text file for reading, where "-" means standard input."""
+    if file == "-":
+        return sys.stdin
+    return open(file, encoding="utf-8")
+
+
+def read_lines(file: str) -> Iterator[tuple[int, str]]:
+    """
+    Yields the numbered lines of a text file (or standard input),
+    without the line endings, skipping empty lines and comments starting with "#".
+    """
+    IN = open_input(file)
+    try:
+        for n, line in enumerate(IN, 1):
+            line = line.rstrip("\r\n")
+            if line.strip() and not line.lstrip().startswith("#"):
+                yield n, line
+    finally:
+        if IN is not sys.stdin:
+            IN.close()
+
+
+def read_queries(file: str) -> list[tuple[str, str]]:
+    """
+    Reads a file of queries, one "start goal" pair per line.
+    If a line contains a tab, the start and goal are separated by the tab
+    (so that node names may contain spaces, as in the road graphs),
+    otherwise they are separated by whitespace.
+    """
+    queries: list[tuple[str, str]] = []
+    for n, line in read_lines(file):
+        fields = line.split("\t") if "\t" in line else line.split()
+        if len(fields) != 2:
+            raise ValueError(f"{file}, line {n}: expected a start and a goal node: {line}")
+        queries.append((fields[0].strip(), fields[1].strip()))
+    return queries
+
+
+def read_node_list(file: str) -> list[str]:
+    """Reads a file of nodes, one per line."""
+    return [line.strip() for _, line in read_lines(file)]
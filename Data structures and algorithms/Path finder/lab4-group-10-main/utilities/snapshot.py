@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import mmap
+from array import array
+from typing import Any
+
+
+# Set this to False to never read or write snapshot files.
+enabled = True
+
+MAGIC = b"PFSNAP01"
+ALIGNMENT = 8
+
+
+class Snapshot:
+    """
+    A binary file containing some named arrays, plus a small JSON header.
+
+    The file is memory-mapped when it is read, and the arrays are returned
+    as read-only `memoryview`s into the mapping. So loading a snapshot
+    takes (almost) no time, regardless of its size: the operating system
+    only reads the pages that are actually used.
+
+    Every snapshot has a `key` which is stored in the header. A snapshot is only
+    returned by `read` if its key is equal to the expected key, otherwise it is
+    considered stale. Use `source_key` to build a key for a snapshot of a text file.
+
+    File format:
+        MAGIC, header length (8 bytes little-endian), header (JSON),
+        followed by the raw array data, aligned to 8 bytes.
+    """
+    arrays: dict[str, memoryview]
+    meta: dict[str, Any]
+
+    def __init__(self, arrays: dict[str, memoryview], meta: dict[str, Any]):
+        self.arrays = arrays
+        self.meta = meta
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.arrays[name]
+
+    @staticmethod
+    def read(path: str, key: dict[str, Any]) -> 'Snapshot | None':
+        """
+        Memory-maps the snapshot file at `path`.
+        Returns None if the file doesn't exist, is malformed, or has a different key.
+        """
+        if not enabled:
+            return None
+        try:
+            with open(path, "rb") as IN:
+                data = mmap.mmap(IN.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            if data[:len(MAGIC)] != MAGIC:
+                return None
+            start = len(MAGIC) + 8
+            header_size = int.from_bytes(data[len(MAGIC):start], "little")
+            header = json.loads(data[start:start + header_size].decode("utf-8"))
+            if header["key"] != key:
+                return None
+            buffer = memoryview(data)
+            arrays: dict[str, memoryview] = {}
+            for name, (typecode, offset, nbytes) in header["arrays"].items():
+                if offset + nbytes > len(data):
+                    return None
+                arrays[name] = buffer[offset : offset + nbytes].cast(typecode)
+            return Snapshot(arrays, header["meta"])
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def write(path: str, key: dict[str, Any], arrays: dict[str, array], meta: dict[str, Any]) -> bool:
+        """
+        Writes a snapshot file, atomically: the file is first written to a temporary
+        file which then replaces `path`, so readers never see a half-written snapshot.
+        Returns False (but does not fail) if the file could not be written,
+        e.g. because the directory is read-only.
+        """
+        if not enabled:
+            return False
+        entries: dict[str, list[Any]] = {}
+        header_bytes = b""
+        # The array offsets depend on the header size, which depends on the offsets.
+        # So we recompute until the header size doesn't change any more.
+        while True:
+            offset = aligned(len(MAGIC) + 8 + len(header_bytes))
+            for name, arr in arrays.items():
+                nbytes = len(arr) * arr.itemsize
+                entries[name] = [arr.typecode, offset, nbytes]
+                offset = aligned(offset + nbytes)
+            header = {"key": key, "meta": meta, "arrays": entries}
+            new_header_bytes = json.dumps(header).encode("utf-8")
+            done = len(new_header_bytes) == len(header_bytes)
+            header_bytes = new_header_bytes
+            if done:
+                break
+
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "wb") as OUT:
+                OUT.write(MAGIC)
+                OUT.write(len(header_bytes).to_bytes(8, "little"))
+                OUT.write(header_bytes)
+                for name, arr in arrays.items():
+                    OUT.write(bytes(entries[name][1] - OUT.tell()))
+                    arr.tofile(OUT)
+            os.replace(tmp, path)
+            return True
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return False
+
+
+def aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def snapshot_file(source: str, kind: str) -> str:
+    """The snapshot file for a certain kind of data, derived from the text file `source`."""
+    return f"{source}.{kind}.snapshot"
+
+
+def source_key(source: str, kind: str, **extra: Any) -> dict[str, Any] | None:
+    """
+    A snapshot key for data derived from the text file `source`.
+    It consists of the file's absolute path, size and modification time,
+    so the snapshot becomes stale as soon as the text file changes.
+    Returns None if the source file can't be accessed.
+    """
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return None
+    return {
+        "kind": kind,
+        "source": os.path.abspath(source),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+        "byteorder": sys.byteorder,
+        **extra,
+    }
+
+
+def encode_strings(strings: list[str]) -> array:
+    """
+    Encodes a list of strings as a byte array.
+    The strings must not contain newlines.
+    """
+    return array('B', "\n".join(strings).encode("utf-8"))
+
+
+def decode_strings(data: memoryview, count: int) -> list[str]:
+    """Decodes a list of `count` strings encoded by `encode_strings`."""
+    if count == 0:
+        return []
+    return bytes(data).decode("utf-8").split("\n")